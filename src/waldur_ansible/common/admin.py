@@ -0,0 +1,9 @@
+class OutputAdminMixin(object):
+    """
+    Shows legacy output column together with output chunks appended while request is processed.
+    """
+
+    def full_output(self, obj):
+        return obj.get_output()
+
+    full_output.short_description = 'Output'
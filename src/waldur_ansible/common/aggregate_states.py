@@ -0,0 +1,69 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+
+from waldur_core.core import models as core_models
+
+States = core_models.StateMixin.States
+
+REQUESTS_COUNT_FIELDS = {
+    States.CREATION_SCHEDULED: 'scheduled_requests_count',
+    States.CREATING: 'creating_requests_count',
+    States.ERRED: 'erred_requests_count',
+}
+
+
+def get_application_queryset(request):
+    application_field = request._meta.get_field(request.APPLICATION_FIELD_NAME)
+    application_id = getattr(request, application_field.attname)
+    return application_field.related_model.objects.filter(pk=application_id)
+
+
+def build_aggregate_state_expression():
+    return Case(
+        When(creating_requests_count__gt=0, then=Value(States.CREATING)),
+        When(scheduled_requests_count__gt=0, then=Value(States.CREATION_SCHEDULED)),
+        When(erred_requests_count__gt=0, then=Value(States.ERRED)),
+        default=Value(States.OK),
+        output_field=IntegerField(),
+    )
+
+
+@transaction.atomic
+def update_aggregate_state(request, source=None, target=None):
+    """
+    Moves request from the counter of the source state to the counter of the target state
+    and recalculates aggregate state of the application.
+    Erred requests are forgotten as soon as a new request is issued while nothing is in progress,
+    so that errors of the previous group of requests do not shadow the outcome of the new one.
+    """
+    applications = get_application_queryset(request)
+    updates = {}
+
+    if source is None:
+        updates['erred_requests_count'] = Case(
+            When(scheduled_requests_count=0, creating_requests_count=0, then=Value(0)),
+            default=F('erred_requests_count'),
+            output_field=IntegerField(),
+        )
+    elif source in REQUESTS_COUNT_FIELDS:
+        field_name = REQUESTS_COUNT_FIELDS[source]
+        updates[field_name] = Greatest(F(field_name) - 1, Value(0))
+
+    if target in REQUESTS_COUNT_FIELDS:
+        field_name = REQUESTS_COUNT_FIELDS[target]
+        updates[field_name] = updates.get(field_name, F(field_name)) + 1
+
+    # counters are updated first, because expressions of a single UPDATE statement see values prior to it
+    applications.update(**updates)
+    applications.update(aggregate_state=build_aggregate_state_expression())
+
+
+def handle_request_created(sender, instance, created=False, **kwargs):
+    if created:
+        update_aggregate_state(instance, target=instance.state)
+
+
+def handle_request_state_transition(sender, instance, source, target, **kwargs):
+    if source != target:
+        update_aggregate_state(instance, source=source, target=target)
@@ -2,6 +2,7 @@ import json
 import logging
 import os
 import subprocess  # nosec
+import time
 
 import six
 from django.conf import settings
@@ -9,11 +10,31 @@ from django.conf import settings
 from waldur_ansible.common import exceptions
 from waldur_core.core.views import RefreshTokenMixin
 
-from . import utils
+from . import cache_utils, output_writers, utils, warm_executor
 
 logger = logging.getLogger(__name__)
 
 
+class LockHeartbeat(object):
+    """
+    Renews locks of the request while playbook is running. Processing is interrupted if locks have been lost,
+    because another request could have acquired them already.
+    """
+
+    def __init__(self, backend, request):
+        self.backend = backend
+        self.request = request
+        self.renewal_interval = settings.WALDUR_ANSIBLE_COMMON.get('ANSIBLE_LOCK_RENEWAL_INTERVAL', 15)
+        self.renewed_at = time.time()
+
+    def __call__(self):
+        if time.time() - self.renewed_at < self.renewal_interval:
+            return
+        if not self.backend.renew_lock_for_processing(self.request):
+            raise exceptions.LockLostError('Lock of the request has expired before processing has been finished.')
+        self.renewed_at = time.time()
+
+
 class ManagementRequestsBackend(object):
 
     def is_processing_allowed(self, request):
@@ -23,6 +44,12 @@ class ManagementRequestsBackend(object):
         raise NotImplementedError
 
     def lock_for_processing(self, request):
+        """
+        Atomically acquires locks required by the request, returns False if request cannot be processed now.
+        """
+        raise NotImplementedError
+
+    def renew_lock_for_processing(self, request):
         raise NotImplementedError
 
     def handle_on_processing_finished(self, request):
@@ -47,40 +74,40 @@ class ManagementRequestsBackend(object):
         raise NotImplementedError
 
     def process_request(self, request):
-        if not self.is_processing_allowed(request):
+        if not self.lock_for_processing(request):
             request.output = self.build_locked_for_processing_message(request)
             request.save(update_fields=['output'])
             raise exceptions.LockedForProcessingError('Could not process request %s ' % request)
         try:
-            self.lock_for_processing(request)
-
             command = self.build_command(request)
             command_str = ' '.join(command)
 
             logger.debug('Executing command "%s".', command_str)
-            env = dict(
-                os.environ,
-                ANSIBLE_LIBRARY=settings.WALDUR_ANSIBLE_COMMON['ANSIBLE_LIBRARY'],
-                ANSIBLE_HOST_KEY_CHECKING='False',
-                ANSIBLE_RETRY_FILES_ENABLED='False',
-                ANSIBLE_REMOTE_PORT=settings.WALDUR_ANSIBLE_COMMON['REMOTE_VM_SSH_PORT'],
-            )
+            env = utils.build_management_ansible_env()
             lines_post_processor_instance = self.instantiate_line_post_processor_class(request)
             extracted_information_handler = self.instantiate_extracted_information_handler_class(request)
             error_handler = self.instantiate_error_handler_class(request)
+            output_writer = output_writers.BufferedOutputWriter(request)
             try:
-                for output_line in utils.subprocess_output_iterator(command, env):
-                    request.output += output_line
-                    request.save(update_fields=['output'])
+                for output_line in warm_executor.command_output_iterator(
+                        command, env, is_cancelled=lambda: cache_utils.is_cancellation_requested(request),
+                        heartbeat=LockHeartbeat(self, request)):
+                    output_writer.write(output_line)
                     lines_post_processor_instance.post_process_line(output_line)
-            except subprocess.CalledProcessError as e:
+            except (subprocess.CalledProcessError, exceptions.ProcessingInterruptedError) as e:
+                if isinstance(e, exceptions.ProcessingInterruptedError):
+                    output_writer.write('%s\n' % e)
+                output_writer.flush()
                 logger.error('%s - failed to execute command "%s".', request, command_str)
-                logger.error('%s - Ansible request processing output: \n %s.', request, request.output)
+                logger.error('%s - Ansible request processing output: \n %s.', request, request.get_output())
                 error_handler.handle_error(request, lines_post_processor_instance)
                 six.reraise(exceptions.AnsibleBackendError, e)
             else:
                 logger.info('Command "%s" was successfully executed.', command_str)
+                output_writer.flush()
                 extracted_information_handler.handle_extracted_information(request, lines_post_processor_instance)
+            finally:
+                output_writer.flush()
         finally:
             self.handle_on_processing_finished(request)
 
@@ -1,20 +1,135 @@
-from django.core.cache import cache
+import threading
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+CANCELLATION_FLAG = 'waldur_ansible_cancellation_%s_%s'
 
 
 def is_syncing(cache_key):
     """
     This function checks if task is already running.
     """
-    return cache.get(cache_key)
+    return cache.get(cache_key) is not None
+
+
+def acquire_lock(cache_key, owner, timeout):
+    """
+    Atomically sets lock only if it is not held yet, so that concurrent workers cannot acquire it both.
+    Owner token is stored as lock value, so that lock can be renewed and released only by its owner.
+    """
+    return get_locks_backend().acquire(cache_key, owner, timeout)
+
+
+def renew_lock(cache_key, owner, timeout):
+    """
+    Extends lock expiration time, if it is still held by the owner.
+    """
+    return get_locks_backend().renew(cache_key, owner, timeout)
+
+
+def release_lock(cache_key, owner):
+    """
+    Deletes lock only if it is held by the owner, so that lock which has expired
+    and has been acquired by another worker is not released accidentally.
+    """
+    get_locks_backend().release(cache_key, owner)
+
+
+def get_locks_backend():
+    """
+    Owner is compared and lock is updated in one atomic operation, which is not provided by Django cache API,
+    so only Redis and local memory cache backends are supported.
+    """
+    default_cache = caches[DEFAULT_CACHE_ALIAS]
+    if isinstance(default_cache, LocMemCache):
+        return LocalMemoryLocksBackend(default_cache)
+    # django-redis
+    if hasattr(default_cache, 'client') and hasattr(default_cache.client, 'get_client'):
+        return RedisLocksBackend(default_cache, default_cache.client.get_client(write=True), default_cache.client.encode)
+    # django-redis-cache
+    if hasattr(default_cache, 'get_master_client'):
+        return RedisLocksBackend(default_cache, default_cache.get_master_client(), default_cache.prep_value)
+    raise ImproperlyConfigured('Locks of ansible requests require Redis or local memory cache backend, '
+                               '%s is not supported.' % type(default_cache).__name__)
+
+
+class RedisLocksBackend(object):
+    RENEW_SCRIPT = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('expire', KEYS[1], ARGV[2])
+        end
+        return 0
+    """
+    RELEASE_SCRIPT = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('del', KEYS[1])
+        end
+        return 0
+    """
+
+    def __init__(self, cache, client, encode):
+        self.cache = cache
+        self.client = client
+        # owner is compared with the value serialized by the cache backend
+        self.encode = encode
+
+    def acquire(self, cache_key, owner, timeout):
+        return self.cache.add(cache_key, owner, timeout)
+
+    def renew(self, cache_key, owner, timeout):
+        return bool(self.client.eval(self.RENEW_SCRIPT, 1, self.cache.make_key(cache_key), self.encode(owner), int(timeout)))
+
+    def release(self, cache_key, owner):
+        self.client.eval(self.RELEASE_SCRIPT, 1, self.cache.make_key(cache_key), self.encode(owner))
+
+
+class LocalMemoryLocksBackend(object):
+    """
+    Local memory cache is not shared between processes, so operations are made atomic by the process-wide mutex.
+    """
+    mutex = threading.Lock()
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def acquire(self, cache_key, owner, timeout):
+        with self.mutex:
+            return self.cache.add(cache_key, owner, timeout)
+
+    def renew(self, cache_key, owner, timeout):
+        with self.mutex:
+            if self.cache.get(cache_key) != owner:
+                return False
+            self.cache.set(cache_key, owner, timeout)
+            return True
+
+    def release(self, cache_key, owner):
+        with self.mutex:
+            if self.cache.get(cache_key) == owner:
+                self.cache.delete(cache_key)
+
+
+def get_lock_timeout():
+    return settings.WALDUR_ANSIBLE_COMMON.get('ANSIBLE_LOCK_TIMEOUT', 60)
+
+
+def build_lock_owner(instance):
+    return instance.uuid.hex
+
+
+def build_cancellation_key(instance):
+    return CANCELLATION_FLAG % (instance._meta.model_name, instance.uuid.hex)
 
 
-def renew_task_status(cache_key, timeout):
+def request_cancellation(instance):
     """
-    This function sets lock with timeout. Lock is valid only for 10 minutes.
-    Then it should be renewed. Otherwise, lock is released.
+    Marks instance processing as cancelled. Flag is checked by the output reading loop.
     """
-    cache.set(cache_key, True, timeout)
+    cache.set(build_cancellation_key(instance), True, settings.WALDUR_ANSIBLE_COMMON['ANSIBLE_REQUEST_TIMEOUT'])
 
 
-def release_task_status(cache_key):
-    cache.set(cache_key, False)
+def is_cancellation_requested(instance):
+    return bool(cache.get(build_cancellation_key(instance)))
@@ -7,3 +7,19 @@ class AnsibleBackendError(SerializableBackendError):
 
 class LockedForProcessingError(Exception):
     pass
+
+
+class ProcessingInterruptedError(Exception):
+    pass
+
+
+class ProcessingTimeoutError(ProcessingInterruptedError):
+    pass
+
+
+class ProcessingCancelledError(ProcessingInterruptedError):
+    pass
+
+
+class LockLostError(ProcessingInterruptedError):
+    pass
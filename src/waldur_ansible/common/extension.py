@@ -10,8 +10,38 @@ class AnsibleCommonExtension(WaldurExtension):
             'PRIVATE_KEY_PATH': '/etc/waldur/id_rsa',
             'PUBLIC_KEY_UUID': 'Corresponding public key should be stored in the database. Specify here its UUID.',
             'ANSIBLE_REQUEST_TIMEOUT': 3600,
+            # Locks of the processed request expire unless they are renewed while playbook is running,
+            # so that locks of a crashed worker are released quickly
+            'ANSIBLE_LOCK_TIMEOUT': 60,
+            'ANSIBLE_LOCK_RENEWAL_INTERVAL': 15,
+            # Execution is killed if playbook does not print anything for the given number of seconds
+            'ANSIBLE_IDLE_OUTPUT_TIMEOUT': 900,
+            'ANSIBLE_OUTPUT_POLL_INTERVAL': 1,
+            # Excess requests are queued until slots are freed, None disables the limit
+            'MAX_CONCURRENT_REQUESTS_PER_INSTANCE': 3,
+            'MAX_CONCURRENT_REQUESTS': 20,
+            # 'subprocess' spawns ansible-playbook for every request, 'warm' hands requests over to the warm executor
+            # started by waldur_ansible_warm_executor command, subprocess is used while it is not running
+            'EXECUTION_ENGINE': 'subprocess',
+            'WARM_EXECUTOR_SOCKET': '/run/waldur-ansible/executor.sock',
             'ANSIBLE_LIBRARY': '/usr/share/ansible-waldur/',
+            # SSH connections to VM are kept open for the given number of seconds after playbook has finished,
+            # so that consecutive requests skip handshake. 0 disables connection sharing, None keeps ansible defaults
+            'SSH_CONTROL_PERSIST': 300,
+            'SSH_CONTROL_PATH_DIR': '~/.ansible/cp',
+            # Modules are executed without copying them to VM, requires "requiretty" to be disabled in sudoers of VM
+            'ANSIBLE_PIPELINING': True,
             'REMOTE_VM_SSH_PORT': '22',
+            # Output of the playbook is persisted in batches, buffer is flushed when any of the thresholds is exceeded
+            'OUTPUT_FLUSH_LINES_THRESHOLD': 100,
+            'OUTPUT_FLUSH_BYTES_THRESHOLD': 64 * 1024,
+            'OUTPUT_FLUSH_INTERVAL': 2,
+            # Incremental output reads return at most this number of chunks
+            'OUTPUT_TAIL_MAX_CHUNKS': 100,
+            # Long polling waits up to given seconds for new output. Waiting client holds a web server worker
+            # for the whole time, so a few open output views may exhaust synchronous workers. 0 disables it
+            'OUTPUT_LONG_POLL_MAX_WAIT': 0,
+            'OUTPUT_LONG_POLL_INTERVAL': 1,
         }
 
     @staticmethod
@@ -27,6 +57,17 @@ class AnsibleCommonExtension(WaldurExtension):
         from .urls import register_in
         return register_in
 
+    @staticmethod
+    def celery_tasks():
+        from datetime import timedelta
+        return {
+            'waldur-ansible-dispatch-queued-requests': {
+                'task': 'waldur_ansible.dispatch_queued_requests',
+                'schedule': timedelta(minutes=1),
+                'args': (),
+            },
+        }
+
     @staticmethod
     def get_public_settings():
         return ['ANSIBLE_REQUEST_TIMEOUT', 'PUBLIC_KEY_UUID']
@@ -0,0 +1,18 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from waldur_ansible.common import utils, warm_executor
+
+
+class Command(BaseCommand):
+    help = 'Runs warm executor of ansible playbooks, which is used if EXECUTION_ENGINE is set to "warm".'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', dest='socket_path', default=None,
+                            help='Path of the unix socket, WARM_EXECUTOR_SOCKET setting is used by default.')
+
+    def handle(self, *args, **options):
+        # ansible modules are preloaded with the configuration shared by management requests and jobs
+        os.environ.update(utils.build_ansible_env())
+        warm_executor.WarmExecutorServer(options['socket_path']).serve_forever()
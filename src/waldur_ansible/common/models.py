@@ -1,6 +1,8 @@
 from __future__ import unicode_literals
 
 from django.apps import apps
+from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.lru_cache import lru_cache
@@ -9,8 +11,67 @@ from waldur_core.core import models as core_models
 from waldur_core.structure import models as structure_models
 
 
+class OutputChunk(models.Model):
+    """
+    Append-only piece of the output produced by the playbook execution.
+    Chunks of the same request are ordered by the sequence number.
+    """
+    content_type = models.ForeignKey(ContentType, related_name='+')
+    object_id = models.PositiveIntegerField()
+    request = GenericForeignKey('content_type', 'object_id')
+    sequence = models.PositiveIntegerField()
+    content = models.TextField()
+
+    class Meta(object):
+        unique_together = ('content_type', 'object_id', 'sequence')
+        ordering = ['sequence']
+
+
 class OutputMixin(models.Model):
+    # holds output which has been persisted before chunked storage was introduced, as well as locking messages
     output = models.TextField(blank=True)
+    output_chunks = GenericRelation(OutputChunk)
+
+    class Meta(object):
+        abstract = True
+
+    def get_output(self):
+        return self.output + ''.join(chunk.content for chunk in self.output_chunks.all())
+
+    def get_output_chunks(self, after_sequence=0):
+        return self.output_chunks.filter(sequence__gt=after_sequence)
+
+    def get_last_output_chunk_sequence(self):
+        return self.output_chunks.aggregate(last_sequence=models.Max('sequence'))['last_sequence'] or 0
+
+
+class AggregateStateMixin(models.Model):
+    """
+    Holds state aggregated from the states of the application requests along with
+    counters of in-flight and erred requests. It is maintained by the signal handlers
+    whenever a request is created or changes its state, so reading it does not
+    require inspecting history of requests.
+    """
+    States = core_models.StateMixin.States
+
+    aggregate_state = models.PositiveSmallIntegerField(default=States.OK, choices=States.CHOICES, db_index=True)
+    scheduled_requests_count = models.PositiveIntegerField(default=0)
+    creating_requests_count = models.PositiveIntegerField(default=0)
+    erred_requests_count = models.PositiveIntegerField(default=0)
+
+    class Meta(object):
+        abstract = True
+
+    @property
+    def human_readable_aggregate_state(self):
+        return core_models.StateMixin(state=self.aggregate_state).human_readable_state
+
+
+class QueuedMixin(models.Model):
+    """
+    Queued request has been accepted, but it is not started until conflicting requests are processed.
+    """
+    queued = models.BooleanField(default=False, db_index=True)
 
     class Meta(object):
         abstract = True
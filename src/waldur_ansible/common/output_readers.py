@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+
+from waldur_core.core import models as core_models
+
+FINISHED_STATES = (core_models.StateMixin.States.OK, core_models.StateMixin.States.ERRED)
+
+
+def is_finished(instance):
+    return instance.state in FINISHED_STATES
+
+
+def read_output_tail(instance, cursor=None, wait=0):
+    """
+    Returns output appended after the cursor along with the next cursor.
+    Cursor is a sequence number of the last received output chunk, output stored
+    before the first chunk is returned only if cursor is not specified.
+    If wait time is specified, blocks until new output appears, processing finishes or time elapses.
+    Wait time is limited by OUTPUT_LONG_POLL_MAX_WAIT setting, long polling is disabled by default,
+    because the web server worker is blocked while waiting.
+    """
+    common_settings = settings.WALDUR_ANSIBLE_COMMON
+    max_chunks = common_settings.get('OUTPUT_TAIL_MAX_CHUNKS', 100)
+    poll_interval = common_settings.get('OUTPUT_LONG_POLL_INTERVAL', 1)
+    deadline = time.time() + min(wait, common_settings.get('OUTPUT_LONG_POLL_MAX_WAIT', 0))
+    after_sequence = cursor or 0
+    finished = is_finished(instance)
+
+    while True:
+        chunks = list(instance.get_output_chunks(after_sequence=after_sequence)[:max_chunks])
+        if chunks or cursor is None or finished or time.time() >= deadline:
+            break
+        time.sleep(poll_interval)
+        try:
+            instance.refresh_from_db(fields=['state'])
+        except ObjectDoesNotExist:
+            finished = True
+        else:
+            finished = is_finished(instance)
+
+    output = ''.join(chunk.content for chunk in chunks)
+    if cursor is None:
+        output = instance.output + output
+
+    return dict(
+        output=output,
+        cursor=chunks[-1].sequence if chunks else after_sequence,
+        finished=finished and len(chunks) < max_chunks,
+    )
@@ -0,0 +1,59 @@
+import time
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+
+from . import models
+
+
+class BufferedOutputWriter(object):
+    """
+    Accumulates output lines in memory and appends them as output chunks in batches,
+    so that chatty playbooks do not issue a database query per printed line.
+    Buffer is flushed when either lines count, size or time threshold is exceeded.
+    """
+
+    def __init__(self, instance, lines_threshold=None, bytes_threshold=None, flush_interval=None):
+        common_settings = settings.WALDUR_ANSIBLE_COMMON
+        self.instance = instance
+        # threshold set to 0 flushes every line immediately
+        if lines_threshold is None:
+            lines_threshold = common_settings.get('OUTPUT_FLUSH_LINES_THRESHOLD', 100)
+        if bytes_threshold is None:
+            bytes_threshold = common_settings.get('OUTPUT_FLUSH_BYTES_THRESHOLD', 64 * 1024)
+        if flush_interval is None:
+            flush_interval = common_settings.get('OUTPUT_FLUSH_INTERVAL', 2)
+        self.lines_threshold = lines_threshold
+        self.bytes_threshold = bytes_threshold
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.buffered_bytes = 0
+        self.last_flush_time = time.time()
+        self.content_type = ContentType.objects.get_for_model(instance)
+        self.last_sequence = instance.get_last_output_chunk_sequence()
+
+    def write(self, output_line):
+        self.buffer.append(output_line)
+        self.buffered_bytes += len(output_line)
+        if self.is_flush_required():
+            self.flush()
+
+    def is_flush_required(self):
+        return len(self.buffer) >= self.lines_threshold \
+            or self.buffered_bytes >= self.bytes_threshold \
+            or time.time() - self.last_flush_time >= self.flush_interval
+
+    def flush(self):
+        self.last_flush_time = time.time()
+        if not self.buffer:
+            return
+
+        output_chunk = ''.join(self.buffer)
+        self.buffer = []
+        self.buffered_bytes = 0
+        self.last_sequence += 1
+        models.OutputChunk.objects.create(
+            content_type=self.content_type,
+            object_id=self.instance.pk,
+            sequence=self.last_sequence,
+            content=output_chunk)
@@ -0,0 +1,141 @@
+import collections
+import datetime
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from waldur_core.core import models as core_models
+
+from . import cache_utils
+
+logger = logging.getLogger(__name__)
+
+States = core_models.StateMixin.States
+IN_FLIGHT_STATES = (States.CREATION_SCHEDULED, States.CREATING)
+FINAL_STATES = (States.OK, States.ERRED)
+
+DISPATCH_LOCK = 'waldur_ansible_requests_dispatch'
+DISPATCH_REQUESTED_FLAG = 'waldur_ansible_requests_dispatch_requested'
+DISPATCH_LOCK_TIMEOUT = 60
+
+registered_queues = []
+
+
+class RequestsQueue(object):
+    """
+    Requests of the application are persisted as queued and started in FIFO order as soon as
+    they do not conflict with the requests which are being processed or have been queued earlier
+    and concurrency limits of the target instance and of the whole workers pool are not exceeded.
+    """
+    request_models = NotImplemented
+    executor = NotImplemented
+    # path to the python management of the request, used to find out target instance
+    python_management_path = NotImplemented
+
+    def conflicts(self, request, other_request):
+        raise NotImplementedError
+
+    def is_processing_allowed(self, request):
+        return True
+
+    def is_ready(self, request):
+        return True
+
+    def enqueue(self, request):
+        """
+        Returns request which is going to be processed, which is not necessarily the given one.
+        """
+        request.queued = True
+        request.save()
+        transaction.on_commit(dispatch)
+        return request
+
+    def get_pending_requests(self, modified_after):
+        """
+        Requests which have not been finished for longer than the processing time limit are considered lost
+        together with the worker and neither block the queue nor occupy slots.
+        """
+        pending_requests = []
+        for request_model in self.request_models:
+            pending_requests.extend(request_model.objects
+                                    .filter(state__in=IN_FLIGHT_STATES)
+                                    .exclude(queued=False, modified__lt=modified_after)
+                                    .select_related(self.python_management_path))
+        return pending_requests
+
+    def get_application_key(self, request):
+        return type(self), getattr(request, request._meta.get_field(request.APPLICATION_FIELD_NAME).attname)
+
+    def get_instance_key(self, request):
+        python_management = request
+        for field_name in self.python_management_path.split('__'):
+            python_management = getattr(python_management, field_name)
+        return python_management.instance_content_type_id, python_management.instance_object_id
+
+    def start(self, request):
+        # modification time is refreshed, so that request is not considered lost because of the time spent in the queue
+        type(request).objects.filter(pk=request.pk).update(queued=False, modified=timezone.now())
+        request.queued = False
+        logger.info('Starting queued request %s.', request)
+        self.executor.execute(request, async=True)
+
+    def handle_request_finished(self, sender, instance, created=False, **kwargs):
+        if not created and instance.state in FINAL_STATES:
+            transaction.on_commit(dispatch)
+
+
+def register(queue):
+    registered_queues.append(queue)
+    return queue
+
+
+def dispatch():
+    """
+    Dispatching is serialized by the lock, so that concurrent dispatchers neither start conflicting requests
+    nor exceed concurrency limits. If lock is held, dispatcher which holds it runs once more.
+    """
+    cache.set(DISPATCH_REQUESTED_FLAG, True, DISPATCH_LOCK_TIMEOUT)
+    owner = uuid.uuid4().hex
+    while cache.get(DISPATCH_REQUESTED_FLAG):
+        if not cache_utils.acquire_lock(DISPATCH_LOCK, owner, DISPATCH_LOCK_TIMEOUT):
+            return
+        try:
+            cache.delete(DISPATCH_REQUESTED_FLAG)
+            with transaction.atomic():
+                dispatch_queued_requests()
+        finally:
+            cache_utils.release_lock(DISPATCH_LOCK, owner)
+
+
+def dispatch_queued_requests():
+    common_settings = settings.WALDUR_ANSIBLE_COMMON
+    max_requests_per_instance = common_settings.get('MAX_CONCURRENT_REQUESTS_PER_INSTANCE')
+    max_requests = common_settings.get('MAX_CONCURRENT_REQUESTS')
+    modified_after = timezone.now() - datetime.timedelta(seconds=common_settings.get('ANSIBLE_REQUEST_TIMEOUT', 3600))
+
+    pending_requests = [(queue, request) for queue in registered_queues for request in queue.get_pending_requests(modified_after)]
+    pending_requests.sort(key=lambda queue_request: (queue_request[1].created, queue_request[1].pk))
+
+    running_requests = [(queue, request) for queue, request in pending_requests if not request.queued]
+    instances_requests_count = collections.Counter(queue.get_instance_key(request) for queue, request in running_requests)
+    requests_count = len(running_requests)
+
+    blocking_requests = collections.defaultdict(list)
+    for queue, request in pending_requests:
+        application_blocking_requests = blocking_requests[queue.get_application_key(request)]
+        if request.queued:
+            instance_key = queue.get_instance_key(request)
+            has_free_slot = (max_requests is None or requests_count < max_requests) and \
+                (max_requests_per_instance is None or instances_requests_count[instance_key] < max_requests_per_instance)
+            if has_free_slot \
+                    and not any(queue.conflicts(request, other_request) for other_request in application_blocking_requests) \
+                    and queue.is_ready(request) \
+                    and queue.is_processing_allowed(request):
+                queue.start(request)
+                instances_requests_count[instance_key] += 1
+                requests_count += 1
+        application_blocking_requests.append(request)
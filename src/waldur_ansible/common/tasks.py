@@ -0,0 +1,12 @@
+from celery import shared_task
+
+from . import request_queue
+
+
+@shared_task(name='waldur_ansible.dispatch_queued_requests')
+def dispatch_queued_requests():
+    """
+    Queued requests are dispatched as soon as other requests are finished,
+    this task starts requests whose dispatch has been missed, e.g. because worker has been lost.
+    """
+    request_queue.dispatch()
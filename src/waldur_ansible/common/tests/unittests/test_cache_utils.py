@@ -0,0 +1,48 @@
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from mock import patch
+
+from waldur_ansible.common import cache_utils
+
+LOCK = 'waldur_ansible_test_lock'
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class LockTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_lock_acquired_by_another_owner_after_expiration_is_neither_renewed_nor_released(self):
+        self.assertTrue(cache_utils.acquire_lock(LOCK, 'first', 60))
+        # lock expires and is acquired by another worker
+        cache.delete(LOCK)
+        self.assertTrue(cache_utils.acquire_lock(LOCK, 'second', 60))
+
+        self.assertFalse(cache_utils.renew_lock(LOCK, 'first', 60))
+        cache_utils.release_lock(LOCK, 'first')
+
+        self.assertEqual(cache.get(LOCK), 'second')
+
+    def test_lock_is_not_acquired_while_owner_renews_it(self):
+        cache_utils.acquire_lock(LOCK, 'first', 60)
+        backend = cache_utils.get_locks_backend()
+        cache_get = backend.cache.get
+        acquired_while_renewing = []
+
+        def get_and_expire(cache_key):
+            value = cache_get(cache_key)
+            # lock expires between reading and renewing it, another worker tries to acquire it
+            backend.cache.delete(cache_key)
+            acquired_while_renewing.append(backend.mutex.acquire(False))
+            return value
+
+        with patch.object(backend.cache, 'get', side_effect=get_and_expire):
+            self.assertTrue(backend.renew(LOCK, 'first', 60))
+
+        self.assertEqual(acquired_while_renewing, [False])
+        self.assertEqual(cache_get(LOCK), 'first')
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_unsupported_cache_backend_is_rejected(self):
+        self.assertRaises(ImproperlyConfigured, cache_utils.acquire_lock, LOCK, 'first', 60)
@@ -0,0 +1,32 @@
+from django.test import TestCase, override_settings
+from mock import MagicMock, patch
+
+from waldur_ansible.common import output_writers
+
+
+@patch('waldur_ansible.common.output_writers.models.OutputChunk.objects.create')
+@patch('waldur_ansible.common.output_writers.ContentType.objects.get_for_model')
+class BufferedOutputWriterTest(TestCase):
+    def build_writer(self):
+        instance = MagicMock(pk=1)
+        instance.get_last_output_chunk_sequence.return_value = 0
+        return output_writers.BufferedOutputWriter(instance)
+
+    @override_settings(WALDUR_ANSIBLE_COMMON={'OUTPUT_FLUSH_LINES_THRESHOLD': 3, 'OUTPUT_FLUSH_INTERVAL': 3600})
+    def test_lines_are_buffered_until_threshold_is_exceeded(self, get_for_model, create_chunk):
+        writer = self.build_writer()
+
+        writer.write('first\n')
+        writer.write('second\n')
+        self.assertFalse(create_chunk.called)
+
+        writer.write('third\n')
+        self.assertEqual(create_chunk.call_args[1]['content'], 'first\nsecond\nthird\n')
+
+    @override_settings(WALDUR_ANSIBLE_COMMON={'OUTPUT_FLUSH_LINES_THRESHOLD': 0, 'OUTPUT_FLUSH_INTERVAL': 3600})
+    def test_zero_threshold_flushes_every_line(self, get_for_model, create_chunk):
+        writer = self.build_writer()
+
+        self.assertEqual(writer.lines_threshold, 0)
+        writer.write('first\n')
+        self.assertEqual(create_chunk.call_args[1]['content'], 'first\n')
@@ -0,0 +1,109 @@
+import os
+import subprocess  # nosec
+
+from django.test import TestCase, override_settings
+from mock import patch
+
+from waldur_ansible.common import exceptions, utils
+
+
+class FakeClock(object):
+    """
+    Advances by the given number of seconds on every reading, so that timeouts expire without waiting.
+    """
+
+    def __init__(self, step):
+        self.step = step
+        self.now = 0
+
+    def time(self):
+        self.now += self.step
+        return self.now
+
+
+@override_settings(WALDUR_ANSIBLE_COMMON={'ANSIBLE_REQUEST_TIMEOUT': 10, 'ANSIBLE_IDLE_OUTPUT_TIMEOUT': 5, 'ANSIBLE_OUTPUT_POLL_INTERVAL': 0.01})
+class SubprocessOutputIteratorTest(TestCase):
+    def iterate(self, shell_command, **kwargs):
+        return list(utils.subprocess_output_iterator(['sh', '-c', shell_command], dict(os.environ), **kwargs))
+
+    def iterate_with_fake_clock(self, shell_command, **kwargs):
+        with patch('waldur_ansible.common.utils.time', FakeClock(step=1)):
+            return self.iterate(shell_command, **kwargs)
+
+    @patch('waldur_ansible.common.utils.READ_CHUNK_SIZE', 4)
+    def test_lines_are_yielded_including_the_last_incomplete_one(self):
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, b'first\nsecond\nlast')
+        os.close(write_fd)
+
+        try:
+            lines = list(utils.output_lines_iterator(read_fd))
+        finally:
+            os.close(read_fd)
+
+        self.assertEqual(lines, ['first\n', 'second\n', 'last'])
+
+    def test_error_is_raised_if_command_fails(self):
+        self.assertRaises(subprocess.CalledProcessError, self.iterate, 'echo first; exit 3')
+
+    def test_process_is_killed_if_it_does_not_produce_output(self):
+        self.assertRaises(exceptions.ProcessingTimeoutError, self.iterate_with_fake_clock, 'sleep 30')
+
+    @override_settings(WALDUR_ANSIBLE_COMMON={'ANSIBLE_REQUEST_TIMEOUT': 3, 'ANSIBLE_IDLE_OUTPUT_TIMEOUT': 100, 'ANSIBLE_OUTPUT_POLL_INTERVAL': 0.01})
+    def test_process_is_killed_if_deadline_is_exceeded(self):
+        with self.assertRaises(exceptions.ProcessingTimeoutError) as context:
+            self.iterate_with_fake_clock('sleep 30')
+
+        self.assertIn('time limit', str(context.exception))
+
+    def test_process_is_killed_if_processing_is_cancelled(self):
+        self.assertRaises(exceptions.ProcessingCancelledError, self.iterate, 'sleep 30', is_cancelled=lambda: True)
+
+    def test_heartbeat_is_invoked_while_command_is_silent(self):
+        heartbeats = []
+
+        def heartbeat():
+            heartbeats.append(True)
+            if len(heartbeats) == 3:
+                raise exceptions.LockLostError()
+
+        self.assertRaises(exceptions.LockLostError, self.iterate, 'sleep 30', heartbeat=heartbeat)
+        self.assertEqual(len(heartbeats), 3)
+
+    def test_process_is_killed_if_heartbeat_fails(self):
+        def heartbeat():
+            raise exceptions.LockLostError()
+
+        self.assertRaises(exceptions.LockLostError, self.iterate, 'sleep 30', heartbeat=heartbeat)
+
+
+class BuildSSHConnectionEnvTest(TestCase):
+    @override_settings(WALDUR_ANSIBLE_COMMON={'SSH_CONTROL_PERSIST': 120, 'SSH_CONTROL_PATH_DIR': '/var/lib/waldur/cp'})
+    def test_connections_are_persisted(self):
+        env = utils.build_ssh_connection_env()
+
+        self.assertIn('ControlPersist=120s', env['ANSIBLE_SSH_ARGS'])
+        self.assertEqual(env['ANSIBLE_SSH_CONTROL_PATH_DIR'], '/var/lib/waldur/cp')
+        self.assertEqual(env['ANSIBLE_PIPELINING'], 'True')
+
+    @override_settings(WALDUR_ANSIBLE_COMMON={'SSH_CONTROL_PERSIST': 0, 'ANSIBLE_PIPELINING': False})
+    def test_connection_sharing_is_disabled(self):
+        env = utils.build_ssh_connection_env()
+
+        self.assertIn('ControlMaster=no', env['ANSIBLE_SSH_ARGS'])
+        self.assertEqual(env['ANSIBLE_PIPELINING'], 'False')
+
+    @override_settings(WALDUR_ANSIBLE_COMMON={'SSH_CONTROL_PERSIST': None})
+    def test_ansible_ssh_arguments_are_kept_intact(self):
+        self.assertNotIn('ANSIBLE_SSH_ARGS', utils.build_ssh_connection_env())
+
+
+@override_settings(WALDUR_ANSIBLE_COMMON={'ANSIBLE_LIBRARY': '/usr/share/ansible-waldur/', 'REMOTE_VM_SSH_PORT': '2222'})
+class BuildAnsibleEnvTest(TestCase):
+    def test_remote_port_is_set_only_for_management_requests(self):
+        shared_env = utils.build_ansible_env()
+        management_env = utils.build_management_ansible_env()
+
+        self.assertEqual(management_env['ANSIBLE_REMOTE_PORT'], '2222')
+        self.assertNotEqual(shared_env.get('ANSIBLE_REMOTE_PORT'), '2222')
+        self.assertEqual(dict(management_env, **shared_env), management_env)
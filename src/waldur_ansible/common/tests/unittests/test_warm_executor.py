@@ -0,0 +1,126 @@
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import subprocess  # nosec
+import sys
+import tempfile
+import threading
+
+from django.test import TestCase, override_settings
+
+from waldur_ansible.common import exceptions, warm_executor
+
+
+class FakeWarmExecutor(object):
+    """
+    Replies to the request with predefined output, exit code is reported using marker sent by the client.
+    """
+
+    def __init__(self, output, return_code=0, report_return_code=True):
+        self.client_connection, self.connection = socket.socketpair()
+        self.output = output
+        self.return_code = return_code
+        self.report_return_code = report_return_code
+        self.thread = threading.Thread(target=self.reply)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def reply(self):
+        request = json.loads(warm_executor.read_line(self.connection).decode('utf-8'))
+        response = self.output
+        if self.report_return_code:
+            response += '%s%s\n' % (request['marker'], self.return_code)
+        self.connection.sendall(response.encode('utf-8'))
+        self.connection.close()
+
+
+@override_settings(WALDUR_ANSIBLE_COMMON={'ANSIBLE_REQUEST_TIMEOUT': 10, 'ANSIBLE_IDLE_OUTPUT_TIMEOUT': 5, 'ANSIBLE_OUTPUT_POLL_INTERVAL': 0.01})
+class WarmOutputIteratorTest(TestCase):
+    def iterate(self, fake_executor):
+        return list(warm_executor.warm_output_iterator(fake_executor.client_connection, ['ansible-playbook'], {}))
+
+    def test_output_is_yielded_until_exit_code_is_reported(self):
+        self.assertEqual(self.iterate(FakeWarmExecutor('first\nlast')), ['first\n', 'last'])
+
+    def test_error_is_raised_if_command_fails(self):
+        with self.assertRaises(subprocess.CalledProcessError) as context:
+            self.iterate(FakeWarmExecutor('first\n', return_code=3))
+
+        self.assertEqual(context.exception.returncode, 3)
+
+    def test_error_is_raised_if_connection_is_lost(self):
+        self.assertRaises(subprocess.CalledProcessError, self.iterate, FakeWarmExecutor('first\n', report_return_code=False))
+
+
+class WarmExecutorServerTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.socket_path = os.path.join(self.directory, 'executor.sock')
+        settings = override_settings(WALDUR_ANSIBLE_COMMON={
+            'EXECUTION_ENGINE': 'warm',
+            'WARM_EXECUTOR_SOCKET': self.socket_path,
+            'ANSIBLE_REQUEST_TIMEOUT': 10,
+            'ANSIBLE_IDLE_OUTPUT_TIMEOUT': 5,
+            'ANSIBLE_OUTPUT_POLL_INTERVAL': 0.01,
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def start_server(self):
+        server = warm_executor.WarmExecutorServer(self.socket_path)
+        # socket is bound before server process is started, so that requests are queued until it accepts them
+        server.bind()
+        self.addCleanup(server.server.close)
+        server_process = multiprocessing.Process(target=server.serve_forever)
+        server_process.daemon = True
+        server_process.start()
+        self.addCleanup(server_process.terminate)
+
+    def execute(self, command, **kwargs):
+        return list(warm_executor.command_output_iterator(command, dict(os.environ), **kwargs))
+
+    def create_python_script(self, source):
+        script_path = os.path.join(self.directory, 'script')
+        with open(script_path, 'w') as script:
+            script.write('#!%s\n%s' % (sys.executable, source))
+        os.chmod(script_path, 0o700)
+        return script_path
+
+    def test_python_script_is_executed_by_warm_process(self):
+        self.start_server()
+        script_path = self.create_python_script('import os, sys\nprint("first")\nsys.stdout.write(str(os.getppid()))\nsys.exit(3)\n')
+        output = []
+
+        with self.assertRaises(subprocess.CalledProcessError) as context:
+            for line in warm_executor.command_output_iterator([script_path], dict(os.environ)):
+                output.append(line)
+
+        self.assertEqual(context.exception.returncode, 3)
+        self.assertEqual(output[0], 'first\n')
+        # script is run by the process forked for request rather than by the interpreter spawned for it
+        self.assertNotEqual(int(output[1]), os.getpid())
+
+    def test_other_commands_are_executed_as_subprocess(self):
+        self.start_server()
+
+        self.assertEqual(self.execute(['sh', '-c', 'echo first; printf last']), ['first\n', 'last'])
+
+    def test_processing_is_cancelled(self):
+        self.start_server()
+
+        self.assertRaises(exceptions.ProcessingCancelledError, self.execute, ['sh', '-c', 'sleep 30'], is_cancelled=lambda: True)
+
+    def test_subprocess_is_used_if_warm_executor_is_not_running(self):
+        self.assertEqual(self.execute(['sh', '-c', 'echo first']), ['first\n'])
+
+    def test_reimport_is_not_required_for_preloaded_configuration(self):
+        server = warm_executor.WarmExecutorServer(self.socket_path)
+        server.warm_ansible_env = {'ANSIBLE_LIBRARY': '/usr/share/ansible-waldur/'}
+
+        self.assertFalse(server.is_reimport_required({'ANSIBLE_LIBRARY': '/usr/share/ansible-waldur/', 'PATH': '/usr/bin'}))
+        self.assertFalse(server.is_reimport_required({'ANSIBLE_LIBRARY': '/usr/share/ansible-waldur/', 'ANSIBLE_REMOTE_PORT': '2222'}))
+        self.assertTrue(server.is_reimport_required({'ANSIBLE_LIBRARY': '/usr/share/other/'}))
+        self.assertTrue(server.is_reimport_required({}))
@@ -1,11 +1,133 @@
+import codecs
+import errno
+import os
+import select
+import signal
 import subprocess  # nosec
+import time
 
+from django.conf import settings
+
+from . import exceptions
+
+READ_CHUNK_SIZE = 4096
+
+
+def subprocess_output_iterator(command, env, is_cancelled=None, heartbeat=None, **kwargs):
+    """
+    Yields output lines of the command as soon as they are available without blocking on readline.
+    Whole process group is killed if either wall-clock deadline or idle output timeout expires,
+    or if is_cancelled callback reports that processing has been cancelled.
+    Heartbeat callback is invoked on every poll even if command is silent, it may interrupt processing by raising an error.
+    """
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=env,  # nosec
+                               preexec_fn=os.setsid, **kwargs)
+    try:
+        for line in output_lines_iterator(process.stdout.fileno(), is_cancelled, heartbeat):
+            yield line
+    except (exceptions.ProcessingInterruptedError, GeneratorExit):
+        kill_process_group(process)
+        raise
+    finally:
+        process.stdout.close()
 
-def subprocess_output_iterator(command, env, **kwargs):
-    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, bufsize=1, env=env, **kwargs)  # nosec
-    for stdout_line in iter(process.stdout.readline, ""):
-        yield stdout_line
-    process.stdout.close()
     return_code = process.wait()
     if return_code:
         raise subprocess.CalledProcessError(return_code, command)
+
+
+def output_lines_iterator(fd, is_cancelled=None, heartbeat=None):
+    """
+    Yields lines read from the file descriptor until end of file, timeouts and callbacks are applied
+    the same way as by subprocess_output_iterator.
+    """
+    common_settings = settings.WALDUR_ANSIBLE_COMMON
+    request_timeout = common_settings.get('ANSIBLE_REQUEST_TIMEOUT', 3600)
+    idle_timeout = common_settings.get('ANSIBLE_IDLE_OUTPUT_TIMEOUT', 900)
+    poll_interval = common_settings.get('ANSIBLE_OUTPUT_POLL_INTERVAL', 1)
+
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    started_at = last_output_at = time.time()
+    incomplete_line = ''
+
+    while True:
+        now = time.time()
+        if now - started_at > request_timeout:
+            raise exceptions.ProcessingTimeoutError(
+                'Execution has exceeded the time limit of %s seconds.' % request_timeout)
+        if now - last_output_at > idle_timeout:
+            raise exceptions.ProcessingTimeoutError(
+                'Execution has not produced any output for %s seconds.' % idle_timeout)
+        if is_cancelled and is_cancelled():
+            raise exceptions.ProcessingCancelledError('Execution has been cancelled.')
+        if heartbeat:
+            heartbeat()
+
+        readable, _, _ = select.select([fd], [], [], poll_interval)
+        if not readable:
+            continue
+
+        data = os.read(fd, READ_CHUNK_SIZE)
+        if not data:
+            break
+        last_output_at = time.time()
+
+        lines = (incomplete_line + decoder.decode(data)).splitlines(True)
+        incomplete_line = lines.pop() if lines and not lines[-1].endswith(('\n', '\r')) else ''
+        for line in lines:
+            yield line
+
+    incomplete_line += decoder.decode(b'', final=True)
+    if incomplete_line:
+        yield incomplete_line
+
+
+def build_ansible_env():
+    """
+    Environment of ansible-playbook shared by management requests and playbook jobs,
+    it is also used to preload ansible modules by the warm executor.
+    """
+    return dict(
+        os.environ,
+        ANSIBLE_LIBRARY=settings.WALDUR_ANSIBLE_COMMON['ANSIBLE_LIBRARY'],
+        ANSIBLE_HOST_KEY_CHECKING='False',
+        **build_ssh_connection_env()
+    )
+
+
+def build_management_ansible_env():
+    """
+    Applications are managed on the VM which is reachable on the configured SSH port.
+    """
+    return dict(
+        build_ansible_env(),
+        ANSIBLE_RETRY_FILES_ENABLED='False',
+        ANSIBLE_REMOTE_PORT=settings.WALDUR_ANSIBLE_COMMON['REMOTE_VM_SSH_PORT'],
+    )
+
+
+def build_ssh_connection_env():
+    """
+    SSH connection to the VM is kept open by ControlPersist master after playbook has finished, so that
+    consecutive requests to the same VM reuse it instead of performing handshake again. Control sockets are
+    named by ansible after target host, port and user, lifetime set to None leaves ansible SSH arguments intact.
+    """
+    common_settings = settings.WALDUR_ANSIBLE_COMMON
+    env = dict(
+        ANSIBLE_SSH_CONTROL_PATH_DIR=common_settings.get('SSH_CONTROL_PATH_DIR', '~/.ansible/cp'),
+        ANSIBLE_PIPELINING=str(common_settings.get('ANSIBLE_PIPELINING', True)),
+    )
+    control_persist = common_settings.get('SSH_CONTROL_PERSIST', 300)
+    if control_persist is not None:
+        env['ANSIBLE_SSH_ARGS'] = '-C -o ControlMaster=auto -o ControlPersist=%ss' % control_persist if control_persist \
+            else '-C -o ControlMaster=no'
+    return env
+
+
+def kill_process_group(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError as e:
+        if e.errno != errno.ESRCH:
+            raise
+    process.wait()
@@ -1,12 +1,16 @@
 import logging
 
+from django.http import Http404
+from django.utils.translation import ugettext_lazy as _
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import exceptions, response, status
 from rest_framework.mixins import ListModelMixin
 from rest_framework.viewsets import GenericViewSet
 
+from waldur_core.core import exceptions as core_exceptions
 from waldur_core.structure import views as structure_views, filters as structure_filters
 
-from . import filters, managers, models, serializers
+from . import cache_utils, filters, managers, models, output_readers, serializers
 
 logger = logging.getLogger(__name__)
 
@@ -29,3 +33,53 @@ class ApplicationsSummaryViewSet(ListModelMixin, GenericViewSet):
 
     def get_queryset(self):
         return get_applications_queryset()
+
+
+def get_single_request_or_404(requests):
+    requests = list(requests)
+    if not requests:
+        raise Http404()
+    return requests[0]
+
+
+class RequestOutputTailMixin(object):
+    """
+    Allows clients to fetch only the output which has been appended since the last read.
+    Supports optional long polling via "wait" query parameter (in seconds) if it is enabled by
+    OUTPUT_LONG_POLL_MAX_WAIT setting.
+    """
+
+    def build_output_tail_response(self, requests):
+        output_instance = get_single_request_or_404(requests)
+
+        cursor = self.parse_non_negative_integer_query_param('cursor')
+        wait = self.parse_non_negative_integer_query_param('wait') or 0
+
+        return response.Response(output_readers.read_output_tail(output_instance, cursor, wait))
+
+    def parse_non_negative_integer_query_param(self, name):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+        try:
+            value = int(value)
+        except ValueError:
+            value = -1
+        if value < 0:
+            raise exceptions.ValidationError({name: _('Value should be a non-negative integer.')})
+        return value
+
+
+class RequestCancellationMixin(object):
+    """
+    Allows clients to stop processing of the request. Cancellation is cooperative:
+    output reading loop kills ansible process as soon as it notices the cancellation flag.
+    """
+
+    def build_cancellation_response(self, requests):
+        cancelled_instance = get_single_request_or_404(requests)
+        if output_readers.is_finished(cancelled_instance):
+            raise core_exceptions.IncorrectStateException(_('Processing has already been finished.'))
+
+        cache_utils.request_cancellation(cancelled_instance)
+        return response.Response({'status': _('Cancellation has been scheduled.')}, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,259 @@
+import errno
+import importlib
+import json
+import logging
+import os
+import runpy
+import signal
+import socket
+import subprocess  # nosec
+import sys
+import threading
+import traceback
+import uuid
+from distutils.spawn import find_executable
+
+from django.conf import settings
+from django.db import connections
+
+from . import utils
+
+logger = logging.getLogger(__name__)
+
+SUBPROCESS_ENGINE = 'subprocess'
+WARM_ENGINE = 'warm'
+DEFAULT_SOCKET_PATH = '/run/waldur-ansible/executor.sock'
+
+# modules which take most of the ansible-playbook startup time, missing ones are skipped
+PRELOADED_MODULES = (
+    'ansible.cli.playbook',
+    'ansible.executor.playbook_executor',
+    'ansible.executor.task_queue_manager',
+    'ansible.inventory.manager',
+    'ansible.parsing.dataloader',
+    'ansible.playbook',
+    'ansible.plugins.loader',
+    'ansible.plugins.callback.default',
+    'ansible.plugins.connection.ssh',
+    'ansible.plugins.strategy.linear',
+    'ansible.template',
+    'ansible.vars.manager',
+    'jinja2',
+    'yaml',
+)
+
+
+def command_output_iterator(command, env, is_cancelled=None, heartbeat=None):
+    """
+    Executes command using configured engine, falls back to subprocess if warm executor is not running.
+    """
+    if settings.WALDUR_ANSIBLE_COMMON.get('EXECUTION_ENGINE', SUBPROCESS_ENGINE) == WARM_ENGINE:
+        try:
+            connection = connect()
+        except socket.error as e:
+            logger.warning('Warm executor is not available, falling back to subprocess: %s.', e)
+        else:
+            return warm_output_iterator(connection, command, env, is_cancelled, heartbeat)
+    return utils.subprocess_output_iterator(command, env, is_cancelled=is_cancelled, heartbeat=heartbeat)
+
+
+def get_socket_path():
+    return settings.WALDUR_ANSIBLE_COMMON.get('WARM_EXECUTOR_SOCKET', DEFAULT_SOCKET_PATH)
+
+
+def connect():
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(get_socket_path())
+    except socket.error:
+        connection.close()
+        raise
+    return connection
+
+
+def warm_output_iterator(connection, command, env, is_cancelled=None, heartbeat=None):
+    """
+    Exit code is reported in the last line prefixed with the marker, which is unique for each request.
+    Warm process kills the command as soon as connection is closed.
+    """
+    marker = uuid.uuid4().hex
+    return_code = None
+    try:
+        connection.sendall(json.dumps(dict(command=command, env=env, marker=marker)).encode('utf-8') + b'\n')
+        for line in utils.output_lines_iterator(connection.fileno(), is_cancelled, heartbeat):
+            if marker in line:
+                output, _, status = line.partition(marker)
+                if output:
+                    yield output
+                # command has finished, output of its daemonized children is not awaited
+                return_code = int(status)
+                break
+            else:
+                yield line
+    finally:
+        connection.close()
+
+    if return_code is None:
+        logger.error('Warm executor has closed connection without reporting exit code of command "%s".', ' '.join(command))
+        raise subprocess.CalledProcessError(-1, command)
+    if return_code:
+        raise subprocess.CalledProcessError(return_code, command)
+
+
+class WarmExecutorServer(object):
+    """
+    Keeps ansible modules imported and forks a warm process for every request, so that playbook is started
+    without interpreter and plugins initialization. Commands which are not python scripts run by
+    the same interpreter are executed as a subprocess of the forked process.
+    """
+
+    def __init__(self, socket_path=None):
+        self.socket_path = socket_path or get_socket_path()
+        self.warm_ansible_env = {}
+        self.server = None
+
+    def preload(self):
+        for module_name in PRELOADED_MODULES:
+            try:
+                importlib.import_module(module_name)
+            except ImportError:
+                logger.debug('Module %s is not available, it is not preloaded.', module_name)
+        # configuration of ansible is read from environment variables on import
+        self.warm_ansible_env = get_ansible_env(os.environ)
+
+    def serve_forever(self):
+        self.preload()
+        # forked processes must not share database connections of the management command
+        connections.close_all()
+        # forked processes are not waited for, they are reaped by the kernel
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+        if self.server is None:
+            self.bind()
+        logger.info('Warm executor is listening on %s.', self.socket_path)
+
+        while True:
+            try:
+                connection, _ = self.server.accept()
+            except socket.error as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+
+            if os.fork() == 0:
+                self.server.close()
+                return_code = 1
+                try:
+                    return_code = self.handle_connection(connection)
+                finally:
+                    os._exit(return_code)
+            connection.close()
+
+    def bind(self):
+        """
+        Connections are accepted as soon as socket is bound, even if requests are not served yet.
+        """
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # requests contain commands to execute, so socket is accessible only by its owner
+        old_umask = os.umask(0o177)
+        try:
+            self.server.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        self.server.listen(socket.SOMAXCONN)
+
+    def handle_connection(self, connection):
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        # command and its children are killed together if client closes connection
+        os.setsid()
+
+        request = json.loads(read_line(connection).decode('utf-8'))
+        watcher = threading.Thread(target=kill_on_disconnect, args=(connection,))
+        watcher.daemon = True
+        watcher.start()
+
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(connection.fileno(), 1)
+        os.dup2(connection.fileno(), 2)
+
+        return_code = self.execute(request['command'], request['env'])
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.write(1, ('%s%s\n' % (request['marker'], return_code)).encode('utf-8'))
+        return 0
+
+    def is_reimport_required(self, env):
+        """
+        Preloaded ansible modules have to be imported again if configuration shared by management requests
+        and jobs differs. Variables which are set only for management requests, such as remote port,
+        are passed to the command in its environment.
+        """
+        return any(env.get(key) != value for key, value in self.warm_ansible_env.items())
+
+    def execute(self, command, env):
+        os.environ.clear()
+        os.environ.update(env)
+
+        executable = find_executable(command[0], env.get('PATH'))
+        if not executable or get_script_interpreter(executable) != os.path.realpath(sys.executable):
+            return subprocess.call(command, env=env)  # nosec
+
+        if self.is_reimport_required(env):
+            for module_name in list(sys.modules):
+                if module_name == 'ansible' or module_name.startswith('ansible.'):
+                    del sys.modules[module_name]
+
+        sys.argv = [executable] + command[1:]
+        try:
+            runpy.run_path(executable, run_name='__main__')
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                return e.code or 0
+            sys.stderr.write('%s\n' % e.code)
+            return 1
+        except Exception:
+            traceback.print_exc()
+            return 1
+        return 0
+
+
+def get_ansible_env(env):
+    return {key: value for key, value in env.items() if key.startswith('ANSIBLE_')}
+
+
+def get_script_interpreter(path):
+    """
+    Returns resolved interpreter of the script shebang or None if file is not a script.
+    """
+    with open(path, 'rb') as script:
+        shebang = script.readline().decode('utf-8', 'replace')
+    if not shebang.startswith('#!'):
+        return None
+    parts = shebang[2:].split()
+    if not parts:
+        return None
+    interpreter = parts[0]
+    if os.path.basename(interpreter) == 'env' and len(parts) > 1:
+        interpreter = find_executable(parts[1])
+    return os.path.realpath(interpreter) if interpreter else None
+
+
+def read_line(connection):
+    data = b''
+    while not data.endswith(b'\n'):
+        chunk = connection.recv(1)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def kill_on_disconnect(connection):
+    try:
+        connection.recv(1)
+    except socket.error:
+        pass
+    os.killpg(os.getpgrp(), signal.SIGKILL)
@@ -2,6 +2,8 @@ from django import forms
 from django.contrib import admin
 from django.core import urlresolvers
 
+from waldur_ansible.common.admin import OutputAdminMixin
+
 from . import models
 
 
@@ -13,8 +15,8 @@ class JupyterHubManagementAdminForm(forms.ModelForm):
 
 
 class JupyterHubManagementAdmin(admin.ModelAdmin):
-    list_filter = ('session_time_to_live_hours',)
-    list_display = ('uuid', 'created', 'instance_content_type', 'instance_object_id', 'python_management_link', 'project', 'user')
+    list_filter = ('aggregate_state', 'session_time_to_live_hours',)
+    list_display = ('uuid', 'created', 'aggregate_state', 'instance_content_type', 'instance_object_id', 'python_management_link', 'project', 'user')
     list_display_links = ('uuid',)
 
     def python_management_link(self, obj):
@@ -47,11 +49,13 @@ class JupyterHubOAuthConfigAdmin(admin.ModelAdmin):
 
 class RequestAdminForm(forms.ModelForm):
     class Meta:
-        fields = ('state', 'output')
-        readonly_fields = ('uuid', 'created', 'output')
+        fields = ('state',)
+        readonly_fields = ('uuid', 'created', 'full_output')
 
 
-class RequestAdmin(admin.ModelAdmin):
+class RequestAdmin(OutputAdminMixin, admin.ModelAdmin):
+    exclude = ('output',)
+    readonly_fields = ('full_output',)
     list_display = ('uuid', 'created', 'state', 'jupyter_hub_management_link')
     list_display_links = ('uuid',)
 
@@ -60,7 +60,10 @@ class JupyterHubManagementBackend(common_backend.ManagementRequestsBackend):
         return JupyterHubManagementBackend.LOCKED_FOR_PROCESSING
 
     def lock_for_processing(self, request):
-        locking_service.JupyterHubManagementBackendLockingService.lock_for_processing(request)
+        return locking_service.JupyterHubManagementBackendLockingService.lock_for_processing(request)
+
+    def renew_lock_for_processing(self, request):
+        return locking_service.JupyterHubManagementBackendLockingService.renew_lock_for_processing(request)
 
     def handle_on_processing_finished(self, request):
         locking_service.JupyterHubManagementBackendLockingService.handle_on_processing_finished(request)
@@ -1,4 +1,3 @@
-from django.conf import settings
 from waldur_ansible.common import cache_utils as python_cache_utils
 from waldur_ansible.jupyter_hub_management import models
 from waldur_ansible.python_management.backend import locking_service as python_locking_service
@@ -9,15 +8,17 @@ JUPYTOR_HUB_MANAGEMENT_LOCK = 'waldur_jupyter_hub_management_global_%s'
 
 class JupyterHubConfigRequestProcessingFinishedLockingHandler(object):
     def handle_on_processing_finished(self, request):
-        python_cache_utils.release_task_status(
-            JupyterHubManagementBackendLockBuilder.build_global_lock(request.jupyter_hub_management.python_management))
+        python_cache_utils.release_lock(
+            JupyterHubManagementBackendLockBuilder.build_global_lock(request.jupyter_hub_management.python_management),
+            python_cache_utils.build_lock_owner(request))
 
 
 class JupyterHubConfigRelatedToVirtualEnvRequestProcessingFinishedLockingHandler(object):
     def handle_on_processing_finished(self, request):
-        python_cache_utils.release_task_status(
+        python_cache_utils.release_lock(
             python_locking_service.PythonManagementBackendLockBuilder.build_related_to_virt_env_lock(
-                request.jupyter_hub_management.python_management, request.virtual_env_name))
+                request.jupyter_hub_management.python_management, request.virtual_env_name),
+            python_cache_utils.build_lock_owner(request))
 
 
 class JupyterHubConfigProcessingAllowedDecider(object):
@@ -37,14 +38,33 @@ class JupyterHubRelatedToVirtualEnvProcessingAllowedDecider(object):
 class JupyterHubConfigSynchronizer(object):
     def lock(self, request):
         global_lock = JupyterHubManagementBackendLockBuilder.build_global_lock(request.jupyter_hub_management.python_management)
-        python_cache_utils.renew_task_status(global_lock, settings.WALDUR_ANSIBLE_COMMON['ANSIBLE_REQUEST_TIMEOUT'])
+        return python_cache_utils.acquire_lock(
+            global_lock, python_cache_utils.build_lock_owner(request), python_cache_utils.get_lock_timeout())
+
+    def renew(self, request):
+        global_lock = JupyterHubManagementBackendLockBuilder.build_global_lock(request.jupyter_hub_management.python_management)
+        return python_cache_utils.renew_lock(
+            global_lock, python_cache_utils.build_lock_owner(request), python_cache_utils.get_lock_timeout())
 
 
 class JupyterHubRelatedToVirtualEnvSynchronizer(object):
     def lock(self, request):
+        python_management = request.jupyter_hub_management.python_management
+        virtual_env_lock = PythonManagementBackendLockBuilder.build_related_to_virt_env_lock(python_management, request.virtual_env_name)
+        global_lock = PythonManagementBackendLockBuilder.build_global_lock(python_management)
+        owner = python_cache_utils.build_lock_owner(request)
+        if not python_cache_utils.acquire_lock(virtual_env_lock, owner, python_cache_utils.get_lock_timeout()):
+            return False
+        if python_cache_utils.is_syncing(global_lock):
+            python_cache_utils.release_lock(virtual_env_lock, owner)
+            return False
+        return True
+
+    def renew(self, request):
         virtual_env_lock = PythonManagementBackendLockBuilder.build_related_to_virt_env_lock(
             request.jupyter_hub_management.python_management, request.virtual_env_name)
-        python_cache_utils.renew_task_status(virtual_env_lock, settings.WALDUR_ANSIBLE_COMMON['ANSIBLE_REQUEST_TIMEOUT'])
+        return python_cache_utils.renew_lock(
+            virtual_env_lock, python_cache_utils.build_lock_owner(request), python_cache_utils.get_lock_timeout())
 
 
 class JupyterHubManagementBackendLockingService(object):
@@ -54,6 +74,11 @@ class JupyterHubManagementBackendLockingService(object):
         synchronizer = JupyterHubManagementBackendLockBuilder.intantiate_synchronizer(type(request))
         return synchronizer.lock(request)
 
+    @staticmethod
+    def renew_lock_for_processing(request):
+        synchronizer = JupyterHubManagementBackendLockBuilder.intantiate_synchronizer(type(request))
+        return synchronizer.renew(request)
+
     @staticmethod
     def is_processing_allowed(request):
         processing_allowed_decider = JupyterHubManagementBackendLockBuilder.intantiate_processing_allowed_decider(type(request))
@@ -0,0 +1,34 @@
+from waldur_ansible.common import request_queue
+from waldur_ansible.jupyter_hub_management import executors, models
+from waldur_ansible.python_management import models as python_management_models
+
+from . import locking_service
+
+
+class JupyterHubManagementRequestsQueue(request_queue.RequestsQueue):
+    """
+    Requests related to a virtual environment conflict with the requests related to the same virtual environment,
+    whereas configuration and removal requests conflict with all of them.
+    """
+    request_models = (
+        models.JupyterHubManagementSyncConfigurationRequest,
+        models.JupyterHubManagementMakeVirtualEnvironmentGlobalRequest,
+        models.JupyterHubManagementMakeVirtualEnvironmentLocalRequest,
+        models.JupyterHubManagementDeleteRequest,
+    )
+    executor = executors.JupyterHubManagementRequestExecutor
+    python_management_path = 'jupyter_hub_management__python_management'
+
+    def conflicts(self, request, other_request):
+        if not self.is_related_to_virtual_env(request) or not self.is_related_to_virtual_env(other_request):
+            return True
+        return request.virtual_env_name == other_request.virtual_env_name
+
+    def is_related_to_virtual_env(self, request):
+        return isinstance(request, python_management_models.VirtualEnvMixin)
+
+    def is_processing_allowed(self, request):
+        return locking_service.JupyterHubManagementBackendLockingService.is_processing_allowed(request)
+
+
+requests_queue = request_queue.register(JupyterHubManagementRequestsQueue())
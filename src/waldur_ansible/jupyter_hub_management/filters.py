@@ -0,0 +1,14 @@
+from __future__ import unicode_literals
+
+from waldur_ansible.common import filters as common_filters
+
+from waldur_core.core import filters as core_filters
+from . import models
+
+
+class JupyterHubManagementFilter(common_filters.ApplicationFilter):
+    state = core_filters.StateFilter(name='aggregate_state')
+
+    class Meta(object):
+        model = models.JupyterHubManagement
+        fields = []
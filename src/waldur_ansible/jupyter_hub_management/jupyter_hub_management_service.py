@@ -1,24 +1,19 @@
-from rest_framework.exceptions import APIException
-from rest_framework.status import HTTP_423_LOCKED
-from waldur_ansible.jupyter_hub_management.backend import locking_service
+from waldur_ansible.jupyter_hub_management.backend import queueing_service
 from waldur_ansible.python_management import models as python_management_models, utils as python_management_utils
 
 from waldur_core.core import models as core_models
-from . import models, executors
+from . import models
 
 
 class JupyterHubManagementService(object):
-    executor = executors.JupyterHubManagementRequestExecutor
+    """
+    Requests are never refused because environment is being processed, they are queued instead.
+    """
+    requests_queue = queueing_service.requests_queue
 
     def schedule_jupyter_hub_management_removal(self, persisted_jupyter_hub_management):
         delete_request = models.JupyterHubManagementDeleteRequest(jupyter_hub_management=persisted_jupyter_hub_management)
-
-        if not locking_service.JupyterHubManagementBackendLockingService.is_processing_allowed(delete_request):
-            raise APIException(code=HTTP_423_LOCKED)
-
-        delete_request.save()
-
-        self.executor.execute(delete_request, async=True)
+        self.requests_queue.enqueue(delete_request)
 
     def issue_localize_globalize_requests(self, updated_jupyter_hub_management, validated_data):
         virtual_environments = validated_data['updated_virtual_environments']
@@ -36,24 +31,16 @@ class JupyterHubManagementService(object):
         for virtual_environment_to_globalize in virtual_environments_to_globalize:
             globalize_request = models.JupyterHubManagementMakeVirtualEnvironmentGlobalRequest(
                 jupyter_hub_management=updated_jupyter_hub_management, virtual_env_name=virtual_environment_to_globalize['name'])
-            self.execute_or_refuse_request(globalize_request)
+            self.requests_queue.enqueue(globalize_request)
 
         for virtual_environment_to_localize in virtual_environments_to_localize:
             localize_request = models.JupyterHubManagementMakeVirtualEnvironmentLocalRequest(
                 jupyter_hub_management=updated_jupyter_hub_management, virtual_env_name=virtual_environment_to_localize['name'])
-            self.execute_or_refuse_request(localize_request)
-
-    def execute_or_refuse_request(self, localize_request):
-        if locking_service.JupyterHubManagementBackendLockingService.is_processing_allowed(localize_request):
-            localize_request.save()
-            self.executor.execute(localize_request, async=True)
+            self.requests_queue.enqueue(localize_request)
 
-    def execute_sync_configuration_request_if_allowed(self, persisted_jupyter_hub_management):
+    def schedule_sync_configuration_request(self, persisted_jupyter_hub_management):
         sync_config_request = models.JupyterHubManagementSyncConfigurationRequest(jupyter_hub_management=persisted_jupyter_hub_management)
-        if not locking_service.JupyterHubManagementBackendLockingService.is_processing_allowed(sync_config_request):
-            raise APIException(code=HTTP_423_LOCKED)
-        sync_config_request.save()
-        self.executor.execute(sync_config_request, async=True)
+        self.requests_queue.enqueue(sync_config_request)
 
     def has_jupyter_hub_config_changed(self, incoming_validated_data, persisted_jupyter_hub_management):
         removed_jupyter_hub_users = self.find_removed_users(persisted_jupyter_hub_management.jupyter_hub_users.all(), incoming_validated_data.get('jupyter_hub_users'))
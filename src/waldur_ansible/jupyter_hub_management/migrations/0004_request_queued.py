@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jupyter_hub_management', '0003_aggregate_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jupyterhubmanagementdeleterequest',
+            name='queued',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='jupyterhubmanagementmakevirtualenvironmentglobalrequest',
+            name='queued',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='jupyterhubmanagementmakevirtualenvironmentlocalrequest',
+            name='queued',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='jupyterhubmanagementsyncconfigurationrequest',
+            name='queued',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
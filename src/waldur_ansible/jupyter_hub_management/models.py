@@ -38,6 +38,7 @@ class JupyterHubOAuthConfig(common_models.UuidStrMixin):
 
 class JupyterHubManagement(common_models.UuidStrMixin,
                            TimeStampedModel,
+                           common_models.AggregateStateMixin,
                            common_models.ApplicationModel):
     user = models.ForeignKey(User, related_name='+')
     python_management = models.ForeignKey(python_management_models.PythonManagement, related_name='jupyter_hub_management')
@@ -88,9 +89,12 @@ class JupyterHubUser(common_models.UuidStrMixin):
 class JupyterHubManagementRequest(common_models.UuidStrMixin,
                                   core_models.StateMixin,
                                   TimeStampedModel,
-                                  common_models.OutputMixin):
+                                  common_models.OutputMixin,
+                                  common_models.QueuedMixin):
     jupyter_hub_management = models.ForeignKey(JupyterHubManagement, on_delete=models.CASCADE, related_name='+')
 
+    APPLICATION_FIELD_NAME = 'jupyter_hub_management'
+
     class Meta(object):
         abstract = True
 
@@ -1,16 +1,13 @@
 from __future__ import unicode_literals
 
-import datetime
-from itertools import chain
-
 from django.core import validators
 from django.db import transaction
 from passlib.hash import sha512_crypt
 from rest_framework import serializers, exceptions
 from waldur_ansible.common import serializers as common_serializers
-from waldur_ansible.python_management import serializers as python_management_serializers, utils as pythhon_management_utils, models as python_management_models
+from waldur_ansible.python_management import serializers as python_management_serializers, models as python_management_models
 
-from waldur_core.core import models as core_models, serializers as core_serializers
+from waldur_core.core import serializers as core_serializers
 from waldur_core.structure import permissions as structure_permissions, serializers as structure_serializers
 from . import models, jupyter_hub_management_service
 
@@ -58,7 +55,7 @@ class JupyterHubManagementRequestMixin(core_serializers.AugmentedSerializerMixin
 
     def get_output(self, obj):
         if self.context.get('select_output'):
-            return obj.output
+            return obj.get_output()
         else:
             return None
 
@@ -111,8 +108,6 @@ class JupyterHubOAuthConfigSerializer(core_serializers.AugmentedSerializerMixin,
 class JupyterHubManagementSerializer(
         common_serializers.BaseApplicationSerializer,
         structure_serializers.PermissionFieldFilteringMixin):
-    REQUEST_IN_PROGRESS_STATES = (core_models.StateMixin.States.CREATION_SCHEDULED, core_models.StateMixin.States.CREATING)
-
     python_management = serializers.HyperlinkedRelatedField(
         lookup_field='uuid',
         view_name='python_management-detail',
@@ -146,68 +141,7 @@ class JupyterHubManagementSerializer(
         return 'JupyterHub - %s - %s' % (jupyter_hub_management.python_management.virtual_envs_dir_path, instance_name)
 
     def get_state(self, jupyter_hub_management):
-        states = []
-        configuration_request = pythhon_management_utils.execute_safely(
-            lambda: models.JupyterHubManagementSyncConfigurationRequest.objects.filter(jupyter_hub_management=jupyter_hub_management).latest('id'))
-        if configuration_request and self.is_in_progress_or_errored(configuration_request):
-            return [self.build_state(configuration_request)]
-
-        states.extend(self.get_request_state(
-            pythhon_management_utils.execute_safely(
-                lambda: models.JupyterHubManagementDeleteRequest.objects.filter(jupyter_hub_management=jupyter_hub_management).latest('id'))))
-        states.extend(self.build_states_from_last_group_of_the_request(jupyter_hub_management))
-
-        if not states:
-            return core_models.StateMixin(state=core_models.StateMixin.States.OK).human_readable_state
-        else:
-            creation_scheduled_state = core_models.StateMixin(state=core_models.StateMixin.States.CREATION_SCHEDULED).human_readable_state
-            creating_state = core_models.StateMixin(state=core_models.StateMixin.States.CREATING).human_readable_state
-            erred_state = core_models.StateMixin(state=core_models.StateMixin.States.ERRED).human_readable_state
-            if creating_state in states:
-                return creating_state
-            elif creation_scheduled_state in states:
-                return creation_scheduled_state
-            elif erred_state in states:
-                return erred_state
-
-    def build_states_from_last_group_of_the_request(self, jupyter_hub_management):
-        states = []
-        global_requests = models.JupyterHubManagementMakeVirtualEnvironmentGlobalRequest.objects.filter(jupyter_hub_management=jupyter_hub_management).order_by('-pk')
-        local_requests = models.JupyterHubManagementMakeVirtualEnvironmentLocalRequest.objects.filter(jupyter_hub_management=jupyter_hub_management).order_by('-pk')
-        merged_requests = list(chain(global_requests, local_requests))
-        merged_requests.sort(key=lambda r: r.pk, reverse=True)
-        last_request_group = self.get_last_requests_group(merged_requests)
-        for request in last_request_group:
-            if self.is_in_progress_or_errored(request):
-                states.append(self.build_state(request))
-        return states
-
-    def get_request_state(self, request):
-        if request and self.is_in_progress_or_errored(request):
-            return [self.build_state(request)]
-        else:
-            return []
-
-    def get_last_requests_group(self, requests):
-        last_request_group = []
-
-        last_request_time = None
-        for request in requests:
-            if not last_request_time:
-                last_request_time = request.created - datetime.timedelta(minutes=1)
-            if request.created < last_request_time:
-                break
-            last_request_group.append(request)
-
-        return last_request_group
-
-    def is_in_progress_or_errored(self, request):
-        return request.state in JupyterHubManagementSerializer.REQUEST_IN_PROGRESS_STATES \
-            or request.state == core_models.StateMixin.States.ERRED
-
-    def build_state(self, request, state=None):
-        request_with_state = state if state else request
-        return request_with_state.human_readable_state
+        return jupyter_hub_management.human_readable_aggregate_state
 
     @transaction.atomic
     def create(self, validated_data):
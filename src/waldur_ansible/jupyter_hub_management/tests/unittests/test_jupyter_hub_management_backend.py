@@ -14,7 +14,7 @@ class JupyterHubManagementBackendTest(TestCase):
     def test_do_not_process_when_locked(self):
         jupyter_hub_management_backend = backend.JupyterHubManagementBackend()
         with patch(self.module_path + 'locking_service.JupyterHubManagementBackendLockingService') as locking_service:
-            locking_service.is_processing_allowed.return_value = False
+            locking_service.lock_for_processing.return_value = False
             sync_request = factories.JupyterHubManagementSyncConfigurationRequestFactory(
                 jupyter_hub_management=self.fixture.jupyter_hub_management)
 
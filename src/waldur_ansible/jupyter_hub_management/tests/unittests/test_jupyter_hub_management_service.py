@@ -1,14 +1,21 @@
+from django.core.cache import cache
 from django.test import TestCase
 from mock import patch
-from rest_framework.exceptions import APIException
-from waldur_ansible.jupyter_hub_management import jupyter_hub_management_service
-from waldur_ansible.jupyter_hub_management.tests import fixtures
+from waldur_ansible.jupyter_hub_management import jupyter_hub_management_service, models
+from waldur_ansible.jupyter_hub_management.tests import factories, fixtures
 from waldur_ansible.python_management.tests import factories as python_management_factories
 
 
 class JupyterHubManagementServiceTest(TestCase):
+    executor_path = 'waldur_ansible.jupyter_hub_management.backend.queueing_service.executors.JupyterHubManagementRequestExecutor.execute'
+
     def setUp(self):
         self.fixture = fixtures.JupyterHubManagementOAuthFixture()
+        cache.clear()
+        # requests are dispatched once transaction is committed, which never happens in the test case
+        patcher = patch('waldur_ansible.common.request_queue.transaction.on_commit', side_effect=lambda callback: callback())
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
     def test_issue_globalize_request(self):
         jupyter_hub_management = self.fixture.jupyter_hub_management
@@ -19,7 +26,7 @@ class JupyterHubManagementServiceTest(TestCase):
 
         module_under_test = 'waldur_ansible.jupyter_hub_management.jupyter_hub_management_service.'
         with patch(module_under_test + 'python_management_models.VirtualEnvironment.objects.get') as find_virtual_env_mock, \
-                patch(module_under_test + 'executors.JupyterHubManagementRequestExecutor.execute') as executor_mock:
+                patch(self.executor_path) as executor_mock:
             find_virtual_env_mock.return_value = virtual_env
 
             jupyter_hub_management_service.JupyterHubManagementService().issue_localize_globalize_requests(jupyter_hub_management, validated_data)
@@ -36,7 +43,7 @@ class JupyterHubManagementServiceTest(TestCase):
 
         module_under_test = 'waldur_ansible.jupyter_hub_management.jupyter_hub_management_service.'
         with patch(module_under_test + 'python_management_models.VirtualEnvironment.objects.get') as find_virtual_env_mock, \
-                patch(module_under_test + 'executors.JupyterHubManagementRequestExecutor.execute') as executor_mock:
+                patch(self.executor_path) as executor_mock:
             find_virtual_env_mock.return_value = virtual_env
 
             jupyter_hub_management_service.JupyterHubManagementService().issue_localize_globalize_requests(jupyter_hub_management, validated_data)
@@ -46,21 +53,17 @@ class JupyterHubManagementServiceTest(TestCase):
     def test_schedule_jupyter_hub_management_removal_not_locked(self):
         jupyter_hub_management = self.fixture.jupyter_hub_management
 
-        module_under_test = 'waldur_ansible.jupyter_hub_management.jupyter_hub_management_service.'
-        with patch(module_under_test + 'locking_service.JupyterHubManagementBackendLockingService.is_processing_allowed') as is_processing_allowed_mock, \
-                patch(module_under_test + 'executors.JupyterHubManagementRequestExecutor.execute') as executor_mock:
-            is_processing_allowed_mock.return_value = True
-
+        with patch(self.executor_path) as executor_mock:
             jupyter_hub_management_service.JupyterHubManagementService().schedule_jupyter_hub_management_removal(jupyter_hub_management)
 
             executor_mock.assert_called_once()
 
-    def test_schedule_jupyter_hub_management_removal_locked_exception_thrown(self):
+    def test_schedule_jupyter_hub_management_removal_locked_request_is_queued(self):
         jupyter_hub_management = self.fixture.jupyter_hub_management
+        factories.JupyterHubManagementSyncConfigurationRequestFactory(jupyter_hub_management=jupyter_hub_management)
 
-        module_under_test = 'waldur_ansible.jupyter_hub_management.jupyter_hub_management_service.'
-        with patch(module_under_test + 'locking_service.JupyterHubManagementBackendLockingService.is_processing_allowed') as is_processing_allowed_mock, \
-                patch(module_under_test + 'executors.JupyterHubManagementRequestExecutor.execute'):
-            is_processing_allowed_mock.return_value = False
+        with patch(self.executor_path) as executor_mock:
+            jupyter_hub_management_service.JupyterHubManagementService().schedule_jupyter_hub_management_removal(jupyter_hub_management)
 
-            self.assertRaises(APIException, jupyter_hub_management_service.JupyterHubManagementService().schedule_jupyter_hub_management_removal, jupyter_hub_management)
+            executor_mock.assert_not_called()
+            self.assertTrue(models.JupyterHubManagementDeleteRequest.objects.get(jupyter_hub_management=jupyter_hub_management).queued)
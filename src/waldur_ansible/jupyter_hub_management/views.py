@@ -2,12 +2,12 @@ import logging
 
 from rest_framework import decorators, response
 
-from waldur_ansible.common import serializers as common_serializers
+from waldur_ansible.common import serializers as common_serializers, views as common_views
 from waldur_ansible.python_management import views as python_management_views
 from waldur_ansible.python_management import serializers as python_management_serializers
 
 from waldur_core.core import views as core_views, managers as core_managers, mixins as core_mixins, models as core_models
-from . import models, serializers, executors, jupyter_hub_management_service
+from . import filters, models, serializers, jupyter_hub_management_service
 
 jupyter_hub_management_requests_models = [models.JupyterHubManagementSyncConfigurationRequest,
                                           models.JupyterHubManagementDeleteRequest,
@@ -17,11 +17,14 @@ jupyter_hub_management_requests_models = [models.JupyterHubManagementSyncConfigu
 logger = logging.getLogger(__name__)
 
 
-class JupyterHubManagementViewSet(core_mixins.AsyncExecutor, core_views.ActionsViewSet):
+class JupyterHubManagementViewSet(core_mixins.AsyncExecutor,
+                                  common_views.RequestOutputTailMixin,
+                                  common_views.RequestCancellationMixin,
+                                  core_views.ActionsViewSet):
     lookup_field = 'uuid'
     queryset = models.JupyterHubManagement.objects.all().order_by('pk')
     serializer_class = serializers.JupyterHubManagementSerializer
-    python_management_request_executor = executors.JupyterHubManagementRequestExecutor
+    filter_class = filters.JupyterHubManagementFilter
     service = jupyter_hub_management_service.JupyterHubManagementService()
 
     def retrieve(self, request, *args, **kwargs):
@@ -61,14 +64,13 @@ class JupyterHubManagementViewSet(core_mixins.AsyncExecutor, core_views.ActionsV
         # user cannot create jupyter management if python management has not been created
         jupyter_hub_management = serializer.save()
 
-        self.service.execute_sync_configuration_request_if_allowed(jupyter_hub_management)
+        self.service.schedule_sync_configuration_request(jupyter_hub_management)
 
         for virtual_env in serializer.validated_data.get('updated_virtual_environments'):
             if virtual_env['jupyter_hub_global']:
                 virtual_env_request = models.JupyterHubManagementMakeVirtualEnvironmentGlobalRequest(
                     jupyter_hub_management=jupyter_hub_management, virtual_env_name=virtual_env['name'])
-                virtual_env_request.save()
-                executors.JupyterHubManagementRequestExecutor.execute(virtual_env_request, async=self.async_executor)
+                self.service.requests_queue.enqueue(virtual_env_request)
 
     @core_mixins.ensure_atomic_transaction
     def perform_update(self, serializer):
@@ -78,7 +80,7 @@ class JupyterHubManagementViewSet(core_mixins.AsyncExecutor, core_views.ActionsV
         if self.service.has_jupyter_hub_config_changed(incoming_validated_data, persisted_jupyter_hub_management) \
                 or self.service.is_last_sync_request_erred(persisted_jupyter_hub_management):
             persisted_jupyter_hub_management = serializer.save()
-            self.service.execute_sync_configuration_request_if_allowed(persisted_jupyter_hub_management)
+            self.service.schedule_sync_configuration_request(persisted_jupyter_hub_management)
 
         self.service.issue_localize_globalize_requests(persisted_jupyter_hub_management, serializer.validated_data)
 
@@ -86,7 +88,19 @@ class JupyterHubManagementViewSet(core_mixins.AsyncExecutor, core_views.ActionsV
     def perform_destroy(self, persisted_jupyter_hub_management):
         self.service.schedule_jupyter_hub_management_removal(persisted_jupyter_hub_management)
 
-    @decorators.detail_route(url_path="requests/(?P<request_uuid>.+)", methods=['get'])
+    @decorators.detail_route(url_path="requests/(?P<request_uuid>[^/]+)/cancel", methods=['post'])
+    def cancel_request(self, request, uuid=None, request_uuid=None):
+        requests = core_managers.SummaryQuerySet(jupyter_hub_management_requests_models).filter(
+            jupyter_hub_management=self.get_object(), uuid=request_uuid)
+        return self.build_cancellation_response(requests)
+
+    @decorators.detail_route(url_path="requests/(?P<request_uuid>[^/]+)/output", methods=['get'])
+    def find_request_output_tail(self, request, uuid=None, request_uuid=None):
+        requests = core_managers.SummaryQuerySet(jupyter_hub_management_requests_models).filter(
+            jupyter_hub_management=self.get_object(), uuid=request_uuid)
+        return self.build_output_tail_response(requests)
+
+    @decorators.detail_route(url_path="requests/(?P<request_uuid>[^/]+)", methods=['get'])
     def find_request_with_output_by_uuid(self, request, uuid=None, request_uuid=None):
         requests = core_managers.SummaryQuerySet(jupyter_hub_management_requests_models).filter(
             jupyter_hub_management=self.get_object(), uuid=request_uuid)
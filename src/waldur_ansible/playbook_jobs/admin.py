@@ -7,6 +7,8 @@ from django.core.exceptions import ValidationError
 from django.utils.translation import ugettext_lazy as _
 from jsoneditor.forms import JSONEditor
 
+from waldur_ansible.common.admin import OutputAdminMixin
+
 from . import models
 
 
@@ -140,13 +142,13 @@ class JobAdminForm(forms.ModelForm):
         return super(JobAdminForm, self).save(commit)
 
 
-class JobAdmin(admin.ModelAdmin):
+class JobAdmin(OutputAdminMixin, admin.ModelAdmin):
     form = JobAdminForm
     fields = ('name', 'description', 'state', 'service_project_link',
-              'playbook', 'arguments', 'output')
+              'playbook', 'arguments', 'full_output')
     list_filter = ('name', 'description', 'service_project_link', 'playbook')
     list_display = ('name', 'state', 'service_project_link', 'playbook')
-    readonly_fields = ('output', 'created', 'modified')
+    readonly_fields = ('full_output', 'created', 'modified')
 
     def get_readonly_fields(self, request, obj=None):
         if obj is not None:
@@ -6,7 +6,8 @@ import subprocess  # nosec
 import six
 from django.conf import settings
 
-from waldur_ansible.common.exceptions import AnsibleBackendError
+from waldur_ansible.common import cache_utils, output_writers, utils, warm_executor
+from waldur_ansible.common.exceptions import AnsibleBackendError, ProcessingInterruptedError
 from waldur_core.core.views import RefreshTokenMixin
 
 logger = logging.getLogger(__name__)
@@ -54,22 +55,21 @@ class AnsiblePlaybookBackend(object):
         command_str = ' '.join(command)
 
         logger.debug('Executing command "%s".', command_str)
-        env = dict(
-            os.environ,
-            ANSIBLE_LIBRARY=settings.WALDUR_ANSIBLE_COMMON['ANSIBLE_LIBRARY'],
-            ANSIBLE_HOST_KEY_CHECKING='False',
-        )
+        env = utils.build_ansible_env()
+        output_writer = output_writers.BufferedOutputWriter(job)
         try:
-            output = subprocess.check_output(command, stderr=subprocess.STDOUT, env=env)  # nosec
-        except subprocess.CalledProcessError as e:
+            for output_line in warm_executor.command_output_iterator(
+                    command, env, is_cancelled=lambda: cache_utils.is_cancellation_requested(job)):
+                output_writer.write(output_line)
+        except (subprocess.CalledProcessError, ProcessingInterruptedError) as e:
+            if isinstance(e, ProcessingInterruptedError):
+                output_writer.write('%s\n' % e)
             logger.info('Failed to execute command "%s".', command_str)
-            job.output = e.output
-            job.save(update_fields=['output'])
             six.reraise(AnsibleBackendError, e)
         else:
             logger.info('Command "%s" was successfully executed.', command_str)
-            job.output = output
-            job.save(update_fields=['output'])
+        finally:
+            output_writer.flush()
 
     def decode_output(self, output):
         items = []
@@ -88,6 +88,7 @@ class Job(core_models.UuidMixin,
           core_models.NameMixin,
           core_models.DescribableMixin,
           TimeStampedModel,
+          common_models.OutputMixin,
           common_models.ApplicationModel):
     class Meta(object):
         pass
@@ -102,7 +103,6 @@ class Job(core_models.UuidMixin,
     subnet = models.ForeignKey(openstack_models.SubNet, related_name='+')
     playbook = models.ForeignKey(Playbook, related_name='jobs')
     arguments = core_fields.JSONField(default=dict, blank=True, null=True)
-    output = models.TextField(blank=True)
 
     @staticmethod
     def get_url_name():
@@ -123,6 +123,7 @@ class JobSerializer(common_serializers.BaseApplicationSerializer,
     playbook_image = serializers.FileField(source='playbook.image', read_only=True)
     playbook_description = serializers.ReadOnlyField(source='playbook.description')
     arguments = serializers.JSONField(default=dict)
+    output = serializers.ReadOnlyField(source='get_output')
     state = serializers.SerializerMethodField()
     tag = serializers.SerializerMethodField()
     type = serializers.SerializerMethodField()
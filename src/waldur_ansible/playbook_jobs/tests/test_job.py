@@ -2,13 +2,17 @@ from __future__ import unicode_literals
 
 import mock
 from ddt import data, ddt
+from django.conf import settings
+from django.test import override_settings
 from rest_framework import status
 from rest_framework.test import APITransactionTestCase
+from waldur_ansible.common import cache_utils, utils, warm_executor
 from waldur_core.structure.tests import factories as structure_factories
 from waldur_openstack.openstack_tenant import models as openstack_models
 from waldur_openstack.openstack_tenant.tests import factories as openstack_factories
 
 from . import factories, fixtures
+from .. import models
 
 
 class JobBaseTest(APITransactionTestCase):
@@ -134,6 +138,27 @@ class JobDeleteTest(JobBaseTest):
         self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
 
 
+class JobCancelTest(JobBaseTest):
+    def test_running_job_can_be_cancelled(self):
+        self.job.state = models.Job.States.CREATING
+        self.job.save()
+        self.client.force_authenticate(self.fixture.staff)
+
+        response = self.client.post(factories.JobFactory.get_url(self.job, action='cancel'))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertTrue(cache_utils.is_cancellation_requested(self.job))
+
+    def test_finished_job_cannot_be_cancelled(self):
+        self.job.state = models.Job.States.OK
+        self.job.save()
+        self.client.force_authenticate(self.fixture.staff)
+
+        response = self.client.post(factories.JobFactory.get_url(self.job, action='cancel'))
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+
 class CountersTest(JobBaseTest):
     def test_project_counter_has_experts(self):
         url = structure_factories.ProjectFactory.get_url(self.fixture.project, action='counters')
@@ -146,13 +171,48 @@ class CountersTest(JobBaseTest):
 
 
 class JobBackendTest(JobBaseTest):
-    @mock.patch('subprocess.check_output')
+    @mock.patch('waldur_ansible.common.utils.subprocess_output_iterator')
     @mock.patch('os.path.exists')
-    def test_job_id_is_passed_as_extra_argument_to_ansible(self, path_exists, check_output):
+    def test_job_id_is_passed_as_extra_argument_to_ansible(self, path_exists, subprocess_output_iterator):
         path_exists.return_value = True
-        check_output.return_value = 'OK'
+        subprocess_output_iterator.return_value = iter(['OK'])
 
         self.job.get_backend().run_job(self.job)
-        args = check_output.call_args[0][0]
+        args = subprocess_output_iterator.call_args[0][0]
         command = ' '.join(args)
         self.assertTrue(self.job.get_tag() in command)
+
+    @mock.patch('waldur_ansible.common.utils.subprocess_output_iterator')
+    @mock.patch('os.path.exists')
+    def test_job_output_is_persisted_while_job_is_running(self, path_exists, subprocess_output_iterator):
+        path_exists.return_value = True
+        subprocess_output_iterator.return_value = iter(['PLAY [all]\n', 'ok: [localhost]\n'])
+
+        self.job.get_backend().run_job(self.job)
+
+        self.assertEqual(self.job.get_output(), 'PLAY [all]\nok: [localhost]\n')
+
+    @mock.patch('waldur_ansible.common.utils.subprocess_output_iterator')
+    @mock.patch('os.path.exists')
+    def test_job_is_executed_with_preloaded_ansible_configuration(self, path_exists, subprocess_output_iterator):
+        path_exists.return_value = True
+        subprocess_output_iterator.return_value = iter(['OK'])
+        server = warm_executor.WarmExecutorServer()
+        server.warm_ansible_env = warm_executor.get_ansible_env(utils.build_ansible_env())
+
+        self.job.get_backend().run_job(self.job)
+        env = subprocess_output_iterator.call_args[0][1]
+
+        self.assertFalse(server.is_reimport_required(env))
+
+    @override_settings(WALDUR_ANSIBLE_COMMON=dict(settings.WALDUR_ANSIBLE_COMMON, REMOTE_VM_SSH_PORT='2222'))
+    @mock.patch('waldur_ansible.common.utils.subprocess_output_iterator')
+    @mock.patch('os.path.exists')
+    def test_remote_port_of_managed_applications_is_not_used_by_job(self, path_exists, subprocess_output_iterator):
+        path_exists.return_value = True
+        subprocess_output_iterator.return_value = iter(['OK'])
+
+        self.job.get_backend().run_job(self.job)
+        env = subprocess_output_iterator.call_args[0][1]
+
+        self.assertNotEqual(env.get('ANSIBLE_REMOTE_PORT'), '2222')
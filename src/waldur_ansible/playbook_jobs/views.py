@@ -1,5 +1,8 @@
 from django.utils.translation import ugettext_lazy as _
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import decorators, response, status
+
+from waldur_ansible.common import cache_utils
 
 from waldur_core.core import exceptions as core_exceptions
 from waldur_core.core import mixins as core_mixins
@@ -30,7 +33,7 @@ def check_all_related_resource_are_stable(job):
 
 class JobViewSet(core_mixins.CreateExecutorMixin, core_views.ActionsViewSet):
     lookup_field = 'uuid'
-    queryset = models.Job.objects.all().order_by('pk')
+    queryset = models.Job.objects.all().order_by('pk').prefetch_related('output_chunks')
     filter_backends = (structure_filters.GenericRoleFilter, DjangoFilterBackend)
     filter_class = filters.AnsibleJobsFilter
     unsafe_methods_permissions = [structure_permissions.is_administrator]
@@ -43,3 +46,10 @@ class JobViewSet(core_mixins.CreateExecutorMixin, core_views.ActionsViewSet):
         core_validators.StateValidator(models.Job.States.OK, models.Job.States.ERRED)
     ]
     delete_executor = executors.DeleteJobExecutor
+
+    @decorators.detail_route(methods=['post'])
+    def cancel(self, request, uuid=None):
+        cache_utils.request_cancellation(self.get_object())
+        return response.Response({'status': _('Cancellation has been scheduled.')}, status=status.HTTP_202_ACCEPTED)
+
+    cancel_validators = [core_validators.StateValidator(models.Job.States.CREATION_SCHEDULED, models.Job.States.CREATING)]
@@ -2,6 +2,8 @@ from django import forms
 from django.contrib import admin
 from django.core import urlresolvers
 
+from waldur_ansible.common.admin import OutputAdminMixin
+
 from . import models
 
 
@@ -24,18 +26,21 @@ class PythonManagementAdminForm(forms.ModelForm):
 
 
 class PythonManagementAdmin(admin.ModelAdmin):
-    list_filter = ('virtual_envs_dir_path', 'python_version', 'system_user', 'project', 'user')
-    list_display = ('uuid', 'created', 'instance_content_type', 'instance_object_id', 'virtual_envs_dir_path', 'python_version', 'system_user', 'project', 'user')
+    list_filter = ('aggregate_state', 'virtual_envs_dir_path', 'python_version', 'system_user', 'project', 'user')
+    list_display = ('uuid', 'created', 'aggregate_state', 'instance_content_type', 'instance_object_id', 'virtual_envs_dir_path', 'python_version', 'system_user', 'project',
+                    'user')
     list_display_links = ('uuid',)
 
 
 class RequestAdminForm(forms.ModelForm):
     class Meta:
-        fields = ('state', 'output')
-        readonly_fields = ('uuid', 'created', 'output')
+        fields = ('state',)
+        readonly_fields = ('uuid', 'created', 'full_output')
 
 
-class RequestAdmin(admin.ModelAdmin):
+class RequestAdmin(OutputAdminMixin, admin.ModelAdmin):
+    exclude = ('output',)
+    readonly_fields = ('full_output',)
     list_display = ('uuid', 'created', 'state', 'python_management_link')
     list_display_links = ('uuid',)
 
@@ -101,6 +106,15 @@ class PythonManagementFindInstalledLibrariesRequestAdmin(RequestAdmin):
     pass
 
 
+class PythonManagementFindInstalledLibrariesBatchRequestAdminForm(RequestAdminForm):
+    class Meta(RequestAdminForm.Meta):
+        model = models.PythonManagementFindInstalledLibrariesBatchRequest
+
+
+class PythonManagementFindInstalledLibrariesBatchRequestAdmin(RequestAdmin):
+    pass
+
+
 admin.site.register(models.CachedRepositoryPythonLibrary, CachedRepositoryPythonLibraryAdmin)
 admin.site.register(models.PythonManagement, PythonManagementAdmin)
 admin.site.register(models.PythonManagementInitializeRequest, PythonManagementInitializeRequestAdmin)
@@ -109,3 +123,4 @@ admin.site.register(models.PythonManagementDeleteRequest, PythonManagementDelete
 admin.site.register(models.PythonManagementDeleteVirtualEnvRequest, PythonManagementDeleteVirtualEnvRequestAdmin)
 admin.site.register(models.PythonManagementFindVirtualEnvsRequest, PythonManagementFindVirtualEnvsRequestAdmin)
 admin.site.register(models.PythonManagementFindInstalledLibrariesRequest, PythonManagementFindInstalledLibrariesRequestAdmin)
+admin.site.register(models.PythonManagementFindInstalledLibrariesBatchRequest, PythonManagementFindInstalledLibrariesBatchRequestAdmin)
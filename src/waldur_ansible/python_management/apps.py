@@ -1,6 +1,35 @@
 from django.apps import AppConfig
+from django.db.models import signals
+from django_fsm import signals as fsm_signals
 
 
 class PythonManagementConfig(AppConfig):
     name = 'waldur_ansible.python_management'
     verbose_name = 'Waldur Python Management'
+
+    def ready(self):
+        from waldur_ansible.common import aggregate_states
+        from . import models
+        from .backend import queueing_service
+
+        for request_model in self.get_models():
+            if not issubclass(request_model, models.PythonManagementRequest):
+                continue
+
+            signals.post_save.connect(
+                aggregate_states.handle_request_created,
+                sender=request_model,
+                dispatch_uid='waldur_ansible.python_management.handle_request_created_%s' % request_model.__name__,
+            )
+
+            signals.post_save.connect(
+                queueing_service.requests_queue.handle_request_finished,
+                sender=request_model,
+                dispatch_uid='waldur_ansible.python_management.handle_request_finished_%s' % request_model.__name__,
+            )
+
+            fsm_signals.post_transition.connect(
+                aggregate_states.handle_request_state_transition,
+                sender=request_model,
+                dispatch_uid='waldur_ansible.python_management.handle_request_state_transition_%s' % request_model.__name__,
+            )
@@ -11,3 +11,9 @@ def build_sync_request_extra_args(synchronization_request):
     )
     extra_vars.update(build_additional_extra_args(synchronization_request))
     return extra_vars
+
+
+def build_batch_request_extra_args(batch_request):
+    return dict(
+        virtual_env_names=batch_request.virtual_env_names
+    )
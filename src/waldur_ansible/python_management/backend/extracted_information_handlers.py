@@ -1,6 +1,8 @@
-from waldur_ansible.python_management import executors, models, utils
+from django.conf import settings
+from django.db import transaction
+from waldur_ansible.python_management import models, utils
 
-from . import locking_service
+from . import queueing_service
 
 
 class InstalledLibrariesExtractedInformationHandler(object):
@@ -10,6 +12,7 @@ class InstalledLibrariesExtractedInformationHandler(object):
             request.virtual_env_name,
             lines_post_processor.installed_libraries_after_modifications)
 
+    @transaction.atomic
     def persist_installed_libraries_in_db(self, python_management, virtual_environment_name, existing_packages):
         virtual_environment = utils.execute_safely(
             lambda: python_management.virtual_environments.get(name=virtual_environment_name))
@@ -21,30 +24,64 @@ class InstalledLibrariesExtractedInformationHandler(object):
             virtual_environment = models.VirtualEnvironment(name=virtual_environment_name, python_management=python_management)
             virtual_environment.save()
 
-        persisted_packages = virtual_environment.installed_libraries.all()
+        persisted_packages = {
+            (name, version): pk
+            for pk, name, version in virtual_environment.installed_libraries.values_list('pk', 'name', 'version')}
+        existing_packages = set((package.name, package.version) for package in existing_packages)
 
-        self.save_newly_installed_libraries(
-            existing_packages, persisted_packages, virtual_environment)
+        models.InstalledLibrary.objects.bulk_create([
+            models.InstalledLibrary(name=name, version=version, virtual_environment=virtual_environment)
+            for name, version in sorted(existing_packages - set(persisted_packages))])
 
-        self.delete_removed_libs(existing_packages, persisted_packages)
+        removed_packages_ids = [pk for package, pk in persisted_packages.items() if package not in existing_packages]
+        if removed_packages_ids:
+            models.InstalledLibrary.objects.filter(pk__in=removed_packages_ids).delete()
 
-    def delete_removed_libs(self, existing_packages, persisted_packages):
-        for persisted_package in persisted_packages:
-            if not self.is_package_present(persisted_package, existing_packages):
-                persisted_package.delete()
 
-    def save_newly_installed_libraries(self, existing_packages, persisted_installed_libraries, virtual_environment):
-        for installed_package in existing_packages:
-            if not self.is_package_present(installed_package, persisted_installed_libraries):
-                models.InstalledLibrary.objects.create(
-                    name=installed_package.name, version=installed_package.version,
-                    virtual_environment=virtual_environment)
+class InstalledLibrariesOfVirtualEnvironmentsExtractedInformationHandler(object):
+    """
+    Libraries of all virtual environments are persisted at once. Virtual environments which are missing
+    in the output are left intact, whereas virtual environments without libraries are deleted.
+    """
 
-    def is_package_present(self, package, packages_list):
-        for p in packages_list:
-            if package.name == p.name and package.version == p.version:
-                return True
-        return False
+    def handle_extracted_information(self, request, lines_post_processor):
+        self.persist_installed_libraries_in_db(
+            request.python_management, lines_post_processor.installed_libraries_by_virtual_environment)
+
+    @transaction.atomic
+    def persist_installed_libraries_in_db(self, python_management, installed_libraries_by_virtual_environment):
+        virtual_environments = {
+            virtual_environment.name: virtual_environment
+            for virtual_environment in python_management.virtual_environments.filter(name__in=installed_libraries_by_virtual_environment.keys())}
+
+        removed_virtual_environment_names = [
+            name for name, installed_libraries in installed_libraries_by_virtual_environment.items()
+            if not installed_libraries and name in virtual_environments]
+        if removed_virtual_environment_names:
+            python_management.virtual_environments.filter(name__in=removed_virtual_environment_names).delete()
+
+        for name, installed_libraries in installed_libraries_by_virtual_environment.items():
+            if installed_libraries and name not in virtual_environments:
+                virtual_environments[name] = models.VirtualEnvironment.objects.create(name=name, python_management=python_management)
+
+        existing_packages = set(
+            (virtual_environments[name].pk, package.name, package.version)
+            for name, installed_libraries in installed_libraries_by_virtual_environment.items()
+            for package in installed_libraries)
+        persisted_packages = {
+            (virtual_environment_id, name, version): pk
+            for pk, virtual_environment_id, name, version in models.InstalledLibrary.objects
+            .filter(virtual_environment__in=[virtual_environments[name] for name, installed_libraries
+                                             in installed_libraries_by_virtual_environment.items() if installed_libraries])
+            .values_list('pk', 'virtual_environment_id', 'name', 'version')}
+
+        models.InstalledLibrary.objects.bulk_create([
+            models.InstalledLibrary(virtual_environment_id=virtual_environment_id, name=name, version=version)
+            for virtual_environment_id, name, version in sorted(existing_packages - set(persisted_packages))])
+
+        removed_packages_ids = [pk for package, pk in persisted_packages.items() if package not in existing_packages]
+        if removed_packages_ids:
+            models.InstalledLibrary.objects.filter(pk__in=removed_packages_ids).delete()
 
 
 class PythonManagementDeletionRequestExtractedInformationHandler(object):
@@ -59,16 +96,25 @@ class PythonManagementDeleteVirtualEnvExtractedInformationHandler(object):
 
 class PythonManagementFindVirtualEnvsRequestExtractedInformationHandler(object):
     def handle_extracted_information(self, request, lines_post_processor):
-        for persisted_virtual_env in request.python_management.virtual_environments.all():
-            if persisted_virtual_env not in lines_post_processor.installed_virtual_environments:
-                persisted_virtual_env.delete()
+        request.python_management.virtual_environments \
+            .exclude(name__in=lines_post_processor.installed_virtual_environments) \
+            .delete()
 
-        locking_service.PythonManagementBackendLockingService.handle_on_processing_finished(request)
+        virtual_env_names = list(lines_post_processor.installed_virtual_environments)
+        if not virtual_env_names:
+            return
 
-        for virtual_env_name in lines_post_processor.installed_virtual_environments:
-            find_libs_request = models.PythonManagementFindInstalledLibrariesRequest.objects.create(
+        # requests are started as soon as current request is finished
+        if settings.WALDUR_PYTHON_MANAGEMENT.get('FIND_INSTALLED_LIBRARIES_BATCH_ENABLED', False):
+            find_libs_requests = [models.PythonManagementFindInstalledLibrariesBatchRequest(
+                python_management=request.python_management, virtual_env_names=virtual_env_names)]
+        else:
+            find_libs_requests = [models.PythonManagementFindInstalledLibrariesRequest(
                 python_management=request.python_management, virtual_env_name=virtual_env_name)
-            executors.PythonManagementRequestExecutor.execute(find_libs_request, async=True)
+                for virtual_env_name in virtual_env_names]
+
+        for find_libs_request in find_libs_requests:
+            queueing_service.requests_queue.enqueue(find_libs_request)
 
 
 class InitializationRequestExtractedInformationHandler(object):
@@ -1,4 +1,3 @@
-from django.conf import settings
 from waldur_ansible.common import cache_utils
 from waldur_ansible.python_management import models
 
@@ -15,15 +14,17 @@ class NullProcessingFinishedLockingHandler(object):
 
 class RelatedToVirtualEnvRequestProcessingFinishedLockingHandler(object):
     def handle_on_processing_finished(self, request):
-        cache_utils.release_task_status(
+        cache_utils.release_lock(
             PythonManagementBackendLockBuilder.build_related_to_virt_env_lock(
-                request.python_management, request.virtual_env_name))
+                request.python_management, request.virtual_env_name),
+            cache_utils.build_lock_owner(request))
 
 
 class GlobalRequestProcessingFinishedLockingHandler(object):
     def handle_on_processing_finished(self, request):
-        cache_utils.release_task_status(
-            PythonManagementBackendLockBuilder.build_global_lock(request.python_management))
+        cache_utils.release_lock(
+            PythonManagementBackendLockBuilder.build_global_lock(request.python_management),
+            cache_utils.build_lock_owner(request))
 
 
 class NullProcessingAllowedDecider(object):
@@ -47,29 +48,63 @@ class GlobalProcessingAllowedDecider(object):
 
 class NullSynchronizer(object):
     def lock(self, request):
-        pass
+        return True
+
+    def renew(self, request):
+        return True
 
 
 class RelatedToVirtualEnvSynchronizer(object):
     def lock(self, request):
+        """
+        Virtual environment lock is acquired first, so that global request cannot start in between,
+        and is given back if global request is already being processed.
+        """
+        virtual_env_lock = PythonManagementBackendLockBuilder.build_related_to_virt_env_lock(
+            request.python_management, request.virtual_env_name)
+        global_lock = PythonManagementBackendLockBuilder.build_global_lock(request.python_management)
+        owner = cache_utils.build_lock_owner(request)
+        if not cache_utils.acquire_lock(virtual_env_lock, owner, cache_utils.get_lock_timeout()):
+            return False
+        if cache_utils.is_syncing(global_lock):
+            cache_utils.release_lock(virtual_env_lock, owner)
+            return False
+        return True
+
+    def renew(self, request):
         virtual_env_lock = PythonManagementBackendLockBuilder.build_related_to_virt_env_lock(
             request.python_management, request.virtual_env_name)
-        cache_utils.renew_task_status(virtual_env_lock, settings.WALDUR_ANSIBLE_COMMON['ANSIBLE_REQUEST_TIMEOUT'])
+        return cache_utils.renew_lock(virtual_env_lock, cache_utils.build_lock_owner(request), cache_utils.get_lock_timeout())
 
 
 class GlobalSynchronizer(object):
     def lock(self, request):
         global_lock = PythonManagementBackendLockBuilder.build_global_lock(request.python_management)
-        cache_utils.renew_task_status(global_lock, settings.WALDUR_ANSIBLE_COMMON['ANSIBLE_REQUEST_TIMEOUT'])
+        return cache_utils.acquire_lock(global_lock, cache_utils.build_lock_owner(request), cache_utils.get_lock_timeout())
+
+    def renew(self, request):
+        global_lock = PythonManagementBackendLockBuilder.build_global_lock(request.python_management)
+        return cache_utils.renew_lock(global_lock, cache_utils.build_lock_owner(request), cache_utils.get_lock_timeout())
 
 
 class PythonManagementBackendLockingService(object):
 
     @staticmethod
     def lock_for_processing(request):
+        """
+        Atomically acquires locks required by the request, returns False if they are held by another request.
+        """
         synchronizer = PythonManagementBackendLockBuilder.intantiate_synchronizer(type(request))
         return synchronizer.lock(request)
 
+    @staticmethod
+    def renew_lock_for_processing(request):
+        """
+        Extends expiration time of the locks held by the request, returns False if they have been lost.
+        """
+        synchronizer = PythonManagementBackendLockBuilder.intantiate_synchronizer(type(request))
+        return synchronizer.renew(request)
+
     @staticmethod
     def is_processing_allowed(request):
         processing_allowed_decider = PythonManagementBackendLockBuilder.intantiate_processing_allowed_decider(type(request))
@@ -88,6 +123,7 @@ class PythonManagementBackendLockBuilder(object):
         models.PythonManagementSynchronizeRequest: RelatedToVirtualEnvProcessingAllowedDecider,
         models.PythonManagementFindVirtualEnvsRequest: GlobalProcessingAllowedDecider,
         models.PythonManagementFindInstalledLibrariesRequest: RelatedToVirtualEnvProcessingAllowedDecider,
+        models.PythonManagementFindInstalledLibrariesBatchRequest: GlobalProcessingAllowedDecider,
         models.PythonManagementDeleteVirtualEnvRequest: RelatedToVirtualEnvProcessingAllowedDecider,
         models.PythonManagementDeleteRequest: GlobalProcessingAllowedDecider,
     }
@@ -96,6 +132,7 @@ class PythonManagementBackendLockBuilder(object):
         models.PythonManagementSynchronizeRequest: RelatedToVirtualEnvSynchronizer,
         models.PythonManagementFindVirtualEnvsRequest: GlobalSynchronizer,
         models.PythonManagementFindInstalledLibrariesRequest: RelatedToVirtualEnvSynchronizer,
+        models.PythonManagementFindInstalledLibrariesBatchRequest: GlobalSynchronizer,
         models.PythonManagementDeleteVirtualEnvRequest: RelatedToVirtualEnvSynchronizer,
         models.PythonManagementDeleteRequest: GlobalSynchronizer,
     }
@@ -104,6 +141,7 @@ class PythonManagementBackendLockBuilder(object):
         models.PythonManagementSynchronizeRequest: RelatedToVirtualEnvRequestProcessingFinishedLockingHandler,
         models.PythonManagementFindVirtualEnvsRequest: GlobalRequestProcessingFinishedLockingHandler,
         models.PythonManagementFindInstalledLibrariesRequest: RelatedToVirtualEnvRequestProcessingFinishedLockingHandler,
+        models.PythonManagementFindInstalledLibrariesBatchRequest: GlobalRequestProcessingFinishedLockingHandler,
         models.PythonManagementDeleteVirtualEnvRequest: RelatedToVirtualEnvRequestProcessingFinishedLockingHandler,
         models.PythonManagementDeleteRequest: GlobalRequestProcessingFinishedLockingHandler,
     }
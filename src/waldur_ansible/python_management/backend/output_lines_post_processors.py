@@ -4,6 +4,15 @@ from collections import namedtuple
 LibraryDs = namedtuple('LibraryDs', ['name', 'version'])
 
 
+def parse_installed_libraries(installed_libraries_with_versions):
+    installed_libraries = []
+    for installed_library_with_version in installed_libraries_with_versions:
+        name_and_version_parts = installed_library_with_version.split('==')
+        if name_and_version_parts[0] != 'pkg-resources':
+            installed_libraries.append(LibraryDs(name=name_and_version_parts[0], version=name_and_version_parts[1]))
+    return installed_libraries
+
+
 class InstalledLibrariesOutputLinesPostProcessor(object):
     INSTALLED_LIBRARIES_AFTER_MODIFICATIONS_TASK = 'Final list of all installed libraries in the venv'
 
@@ -21,14 +30,34 @@ class InstalledLibrariesOutputLinesPostProcessor(object):
             else:
                 ip_and_command_info_parts = output_line.split(' => ')
                 command_info = json.loads(ip_and_command_info_parts[1])
-                installed_libraries_with_versions = command_info['stdout_lines']
+                self.installed_libraries_after_modifications.extend(parse_installed_libraries(command_info['stdout_lines']))
+                self.stop_line_processing = True
+
+
+class InstalledLibrariesOfVirtualEnvironmentsOutputLinesPostProcessor(object):
+    """
+    Task is executed in a loop over virtual environments, so its output consists of a line per virtual environment,
+    e.g. 'ok: [remote_ip] => (item=first-virt-env) => {"item": "first-virt-env", "stdout_lines": [...]}'.
+    """
+    INSTALLED_LIBRARIES_TASK = 'Final list of all installed libraries in each venv'
+    NEXT_TASK_MARKERS = ('TASK [', 'PLAY RECAP')
 
-                for installed_library_with_version in installed_libraries_with_versions:
-                    name_and_version_parts = installed_library_with_version.split('==')
-                    if name_and_version_parts[0] != 'pkg-resources':
-                        self.installed_libraries_after_modifications.append(
-                            LibraryDs(name=name_and_version_parts[0], version=name_and_version_parts[1]))
+    def __init__(self):
+        self.stop_line_processing = False
+        self.next_lines_contain_installed_libraries = False
+        self.installed_libraries_by_virtual_environment = {}
+
+    def post_process_line(self, output_line):
+        if not self.stop_line_processing:
+            if not self.next_lines_contain_installed_libraries:
+                if InstalledLibrariesOfVirtualEnvironmentsOutputLinesPostProcessor.INSTALLED_LIBRARIES_TASK in output_line:
+                    self.next_lines_contain_installed_libraries = True
+            elif output_line.startswith(InstalledLibrariesOfVirtualEnvironmentsOutputLinesPostProcessor.NEXT_TASK_MARKERS):
                 self.stop_line_processing = True
+            elif ' => {' in output_line:
+                command_info = json.loads(output_line[output_line.index(' => {') + len(' => '):])
+                self.installed_libraries_by_virtual_environment[command_info['item']] = \
+                    parse_installed_libraries(command_info['stdout_lines'])
 
 
 class InstalledVirtualEnvironmentsOutputLinesPostProcessor(object):
@@ -70,7 +99,7 @@ class InitializationOutputLinesPostProcessor(object):
             else:
                 ip_and_command_info_parts = output_line.split(' => ')
                 command_info = json.loads(ip_and_command_info_parts[1])
-                self.python_version = command_info['stdout_lines'][0].replace('Python', '')
+                self.python_version = command_info['stdout_lines'][0].replace('Python', '').strip()
                 self.stop_line_processing = True
 
 
@@ -2,7 +2,7 @@ import logging
 
 from django.conf import settings
 from waldur_ansible.common import backend as common_backend
-from waldur_ansible.python_management import models, constants, executors
+from waldur_ansible.python_management import models, constants
 
 from . import output_lines_post_processors, locking_service, extracted_information_handlers, additional_extra_args_builders, error_handlers
 
@@ -15,6 +15,7 @@ class PythonManagementBackend(common_backend.ManagementRequestsBackend):
         models.PythonManagementSynchronizeRequest: constants.PythonManagementConstants.SYNCHRONIZE_PACKAGES,
         models.PythonManagementFindVirtualEnvsRequest: constants.PythonManagementConstants.FIND_INSTALLED_VIRTUAL_ENVIRONMENTS,
         models.PythonManagementFindInstalledLibrariesRequest: constants.PythonManagementConstants.FIND_INSTALLED_LIBRARIES_FOR_VIRTUAL_ENVIRONMENT,
+        models.PythonManagementFindInstalledLibrariesBatchRequest: constants.PythonManagementConstants.FIND_INSTALLED_LIBRARIES_FOR_VIRTUAL_ENVIRONMENTS,
         models.PythonManagementDeleteVirtualEnvRequest: constants.PythonManagementConstants.DELETE_VIRTUAL_ENVIRONMENT,
         models.PythonManagementDeleteRequest: constants.PythonManagementConstants.DELETE_PYTHON_ENVIRONMENT,
     }
@@ -24,6 +25,7 @@ class PythonManagementBackend(common_backend.ManagementRequestsBackend):
         models.PythonManagementSynchronizeRequest: additional_extra_args_builders.build_sync_request_extra_args,
         models.PythonManagementFindVirtualEnvsRequest: None,
         models.PythonManagementFindInstalledLibrariesRequest: additional_extra_args_builders.build_additional_extra_args,
+        models.PythonManagementFindInstalledLibrariesBatchRequest: additional_extra_args_builders.build_batch_request_extra_args,
         models.PythonManagementDeleteVirtualEnvRequest: additional_extra_args_builders.build_additional_extra_args,
         models.PythonManagementDeleteRequest: None,
     }
@@ -33,6 +35,7 @@ class PythonManagementBackend(common_backend.ManagementRequestsBackend):
         models.PythonManagementSynchronizeRequest: output_lines_post_processors.InstalledLibrariesOutputLinesPostProcessor,
         models.PythonManagementFindVirtualEnvsRequest: output_lines_post_processors.InstalledVirtualEnvironmentsOutputLinesPostProcessor,
         models.PythonManagementFindInstalledLibrariesRequest: output_lines_post_processors.InstalledLibrariesOutputLinesPostProcessor,
+        models.PythonManagementFindInstalledLibrariesBatchRequest: output_lines_post_processors.InstalledLibrariesOfVirtualEnvironmentsOutputLinesPostProcessor,
         models.PythonManagementDeleteVirtualEnvRequest: output_lines_post_processors.NullOutputLinesPostProcessor,
         models.PythonManagementDeleteRequest: output_lines_post_processors.NullOutputLinesPostProcessor,
     }
@@ -42,6 +45,7 @@ class PythonManagementBackend(common_backend.ManagementRequestsBackend):
         models.PythonManagementSynchronizeRequest: extracted_information_handlers.InstalledLibrariesExtractedInformationHandler,
         models.PythonManagementFindVirtualEnvsRequest: extracted_information_handlers.PythonManagementFindVirtualEnvsRequestExtractedInformationHandler,
         models.PythonManagementFindInstalledLibrariesRequest: extracted_information_handlers.InstalledLibrariesExtractedInformationHandler,
+        models.PythonManagementFindInstalledLibrariesBatchRequest: extracted_information_handlers.InstalledLibrariesOfVirtualEnvironmentsExtractedInformationHandler,
         models.PythonManagementDeleteVirtualEnvRequest: extracted_information_handlers.PythonManagementDeleteVirtualEnvExtractedInformationHandler,
         models.PythonManagementDeleteRequest: extracted_information_handlers.PythonManagementDeletionRequestExtractedInformationHandler,
     }
@@ -51,6 +55,7 @@ class PythonManagementBackend(common_backend.ManagementRequestsBackend):
         models.PythonManagementSynchronizeRequest: error_handlers.NullErrorHandler,
         models.PythonManagementFindVirtualEnvsRequest: error_handlers.NullErrorHandler,
         models.PythonManagementFindInstalledLibrariesRequest: error_handlers.NullErrorHandler,
+        models.PythonManagementFindInstalledLibrariesBatchRequest: error_handlers.NullErrorHandler,
         models.PythonManagementDeleteVirtualEnvRequest: error_handlers.NullErrorHandler,
         models.PythonManagementDeleteRequest: error_handlers.DeleteRequestErrorHandler,
     }
@@ -67,7 +72,10 @@ class PythonManagementBackend(common_backend.ManagementRequestsBackend):
         return PythonManagementBackend.LOCKED_FOR_PROCESSING
 
     def lock_for_processing(self, request):
-        locking_service.PythonManagementBackendLockingService.lock_for_processing(request)
+        return locking_service.PythonManagementBackendLockingService.lock_for_processing(request)
+
+    def renew_lock_for_processing(self, request):
+        return locking_service.PythonManagementBackendLockingService.renew_lock_for_processing(request)
 
     def handle_on_processing_finished(self, request):
         locking_service.PythonManagementBackendLockingService.handle_on_processing_finished(request)
@@ -107,12 +115,3 @@ class PythonManagementBackend(common_backend.ManagementRequestsBackend):
     def instantiate_error_handler_class(self, request):
         extracted_information_handler_class = PythonManagementBackend.REQUEST_TYPES_ERROR_HANDLERS_CORRESPONDENCE.get(type(request))
         return extracted_information_handler_class()
-
-
-class PythonManagementInitializationBackend(PythonManagementBackend):
-
-    def process_python_management_request(self, python_management_initialization_request):
-        super(PythonManagementInitializationBackend, self).process_python_management_request(python_management_initialization_request)
-
-        for synchronization_request in python_management_initialization_request.sychronization_requests.all():
-            executors.PythonManagementRequestExecutor.execute(synchronization_request, async=True)
@@ -0,0 +1,132 @@
+from django.db import transaction
+
+from waldur_ansible.common import request_queue
+from waldur_ansible.python_management import executors, models
+from waldur_core.core import models as core_models
+
+from . import locking_service
+
+
+class PythonManagementRequestsQueue(request_queue.RequestsQueue):
+    """
+    Requests related to a virtual environment conflict with the requests related to the same virtual environment,
+    whereas requests related to the whole python management conflict with all of them.
+    """
+    request_models = (
+        models.PythonManagementInitializeRequest,
+        models.PythonManagementSynchronizeRequest,
+        models.PythonManagementFindVirtualEnvsRequest,
+        models.PythonManagementFindInstalledLibrariesRequest,
+        models.PythonManagementFindInstalledLibrariesBatchRequest,
+        models.PythonManagementDeleteVirtualEnvRequest,
+        models.PythonManagementDeleteRequest,
+    )
+    executor = executors.PythonManagementRequestExecutor
+    python_management_path = 'python_management'
+
+    def conflicts(self, request, other_request):
+        if not self.is_related_to_virtual_env(request) or not self.is_related_to_virtual_env(other_request):
+            return True
+        return request.virtual_env_name == other_request.virtual_env_name
+
+    def is_related_to_virtual_env(self, request):
+        return isinstance(request, models.VirtualEnvMixin)
+
+    @transaction.atomic
+    def enqueue(self, request):
+        """
+        Synchronization request is merged into the synchronization request of the same virtual environment
+        which has not been started yet, so that consecutive edits result in a single pip run.
+        """
+        if isinstance(request, models.PythonManagementSynchronizeRequest) and not request.initialization_request_id:
+            pending_request = self.get_mergeable_request(request)
+            if pending_request:
+                merge_synchronization_requests(pending_request, request)
+                pending_request.save(update_fields=['libraries_to_install', 'libraries_to_remove', 'modified'])
+                return pending_request
+        return super(PythonManagementRequestsQueue, self).enqueue(request)
+
+    def get_mergeable_request(self, request):
+        # request is locked, so that it is not started by dispatcher until merged changes are committed
+        pending_request = models.PythonManagementSynchronizeRequest.objects \
+            .select_for_update() \
+            .filter(python_management=request.python_management,
+                    virtual_env_name=request.virtual_env_name,
+                    initialization_request__isnull=True,
+                    queued=True,
+                    state=core_models.StateMixin.States.CREATION_SCHEDULED) \
+            .order_by('-created', '-pk') \
+            .first()
+        if pending_request and not self.has_later_conflicting_requests(pending_request):
+            return pending_request
+
+    def has_later_conflicting_requests(self, pending_request):
+        """
+        Changes can not be moved ahead of the conflicting request, e.g. removal of the virtual environment.
+        """
+        for request_model in self.request_models:
+            later_requests = request_model.objects.filter(
+                python_management=pending_request.python_management,
+                state__in=request_queue.IN_FLIGHT_STATES,
+                created__gte=pending_request.created)
+            if request_model == type(pending_request):
+                later_requests = later_requests.exclude(pk=pending_request.pk)
+            if any(self.conflicts(pending_request, later_request) for later_request in later_requests):
+                return True
+        return False
+
+    def is_processing_allowed(self, request):
+        return locking_service.PythonManagementBackendLockingService.is_processing_allowed(request)
+
+    def is_ready(self, request):
+        """
+        Synchronization requests issued along with the initialization are started only if it has succeeded.
+        """
+        initialization_request = getattr(request, 'initialization_request', None)
+        return initialization_request is None or initialization_request.state == core_models.StateMixin.States.OK
+
+    def handle_request_finished(self, sender, instance, created=False, **kwargs):
+        if not created and isinstance(instance, models.PythonManagementInitializeRequest) \
+                and instance.state == core_models.StateMixin.States.ERRED:
+            for synchronization_request in instance.sychronization_requests.filter(queued=True, state__in=request_queue.IN_FLIGHT_STATES):
+                synchronization_request.set_erred()
+                synchronization_request.save()
+        super(PythonManagementRequestsQueue, self).handle_request_finished(sender, instance, created, **kwargs)
+
+
+def build_library_key(library):
+    return library['name'], library['version']
+
+
+def merge_synchronization_requests(pending_request, request):
+    """
+    Within a request libraries are removed before installation, e.g. upgrade is expressed as removal of the
+    installed version and installation of the new one. Merged request produces the same result as the pending
+    request followed by the given one, changes which cancel each other are dropped.
+    """
+    removed_keys = set(build_library_key(library) for library in request.libraries_to_remove)
+    removed_names = set(name for name, version in removed_keys)
+    installed_keys = set(build_library_key(library) for library in request.libraries_to_install)
+    installed_names = set(name for name, version in installed_keys)
+    pending_installed_keys = set(build_library_key(library) for library in pending_request.libraries_to_install)
+    pending_removed_keys = set(build_library_key(library) for library in pending_request.libraries_to_remove)
+
+    libraries_to_remove = [
+        library for library in pending_request.libraries_to_remove
+        if build_library_key(library) not in installed_keys]
+    libraries_to_remove.extend(
+        library for library in request.libraries_to_remove
+        if build_library_key(library) not in pending_installed_keys | pending_removed_keys)
+
+    libraries_to_install = [
+        library for library in pending_request.libraries_to_install
+        if library['name'] not in removed_names | installed_names]
+    libraries_to_install.extend(
+        library for library in request.libraries_to_install
+        if build_library_key(library) not in pending_removed_keys)
+
+    pending_request.libraries_to_remove = libraries_to_remove
+    pending_request.libraries_to_install = libraries_to_install
+
+
+requests_queue = request_queue.register(PythonManagementRequestsQueue())
@@ -7,8 +7,31 @@ class PythonManagementExtension(WaldurExtension):
     class Settings:
         WALDUR_PYTHON_MANAGEMENT = {
             'PYTHON_MANAGEMENT_PLAYBOOKS_DIRECTORY': '%swaldur-apps/python_management/' % AnsibleCommonExtension.Settings.WALDUR_ANSIBLE_COMMON['ANSIBLE_LIBRARY'],
+            # libraries of all virtual environments are found by a single run of
+            # find_installed_libraries_for_virtual_environments.yml playbook, which has to be present in
+            # PYTHON_MANAGEMENT_PLAYBOOKS_DIRECTORY; otherwise separate request is issued for each virtual environment
+            'FIND_INSTALLED_LIBRARIES_BATCH_ENABLED': False,
             'SYNC_PIP_PACKAGES_TASK_ENABLED': False,
             'SYNC_PIP_PACKAGES_BATCH_SIZE': 300,
+            # full resync is performed instead of applying the changelog if it contains more events
+            'SYNC_PIP_PACKAGES_MAX_CHANGELOG_SIZE': 50000,
+            # index URLs may point to a mirror, e.g. devpi or Nexus; if XML-RPC API URL is empty,
+            # packages are listed using Simple API and whole index is synchronized once per given number of seconds
+            'SYNC_PIP_PACKAGES_FULL_RESYNC_INTERVAL': 24 * 60 * 60,
+            'PYPI_JSON_API_URL': 'https://pypi.org/pypi/',
+            'PYPI_SIMPLE_API_URL': 'https://pypi.org/simple/',
+            'PYPI_XMLRPC_API_URL': 'https://pypi.org/pypi',
+            'PYPI_REQUEST_TIMEOUT': 10,
+            'PYPI_MAX_RETRIES': 3,
+            # delay before retry is chosen randomly up to this value doubled after each attempt
+            'PYPI_RETRY_BACKOFF': 0.5,
+            'PYPI_MAX_CONCURRENT_REQUESTS': 10,
+            # indexed library releases are used without revalidation during this period
+            'PYPI_METADATA_CACHE_TTL': 60 * 60,
+            'AUTOCOMPLETE_RESULTS_LIMIT': 30,
+            # keeps sorted library names in memory of each worker process for faster prefix lookups
+            'AUTOCOMPLETE_SNAPSHOT_ENABLED': False,
+            'AUTOCOMPLETE_SNAPSHOT_TTL': 5 * 60,
         }
 
     @staticmethod
@@ -30,7 +53,7 @@ class PythonManagementExtension(WaldurExtension):
         return {
             'waldur-ansible-sync-pip-packages': {
                 'task': 'waldur_ansible.sync_pip_libraries',
-                'schedule': timedelta(hours=48),
+                'schedule': timedelta(minutes=10),
                 'args': (),
             },
         }
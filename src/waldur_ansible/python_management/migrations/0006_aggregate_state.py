@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import Counter
+
+from django.db import migrations, models
+
+CREATION_SCHEDULED = 5
+CREATING = 6
+OK = 3
+ERRED = 4
+
+REQUEST_MODEL_NAMES = (
+    'PythonManagementInitializeRequest',
+    'PythonManagementSynchronizeRequest',
+    'PythonManagementFindVirtualEnvsRequest',
+    'PythonManagementFindInstalledLibrariesRequest',
+    'PythonManagementDeleteRequest',
+    'PythonManagementDeleteVirtualEnvRequest',
+)
+
+
+def build_aggregate_state(scheduled_count, creating_count, erred_count):
+    if creating_count:
+        return CREATING
+    elif scheduled_count:
+        return CREATION_SCHEDULED
+    elif erred_count:
+        return ERRED
+    else:
+        return OK
+
+
+def fill_aggregate_state(apps, schema_editor):
+    PythonManagement = apps.get_model('python_management', 'PythonManagement')
+    scheduled_counts = Counter()
+    creating_counts = Counter()
+    erred_counts = Counter()
+
+    for model_name in REQUEST_MODEL_NAMES:
+        request_model = apps.get_model('python_management', model_name)
+        for python_management_id, state in request_model.objects \
+                .filter(state__in=(CREATION_SCHEDULED, CREATING)) \
+                .values_list('python_management_id', 'state'):
+            counts = scheduled_counts if state == CREATION_SCHEDULED else creating_counts
+            counts[python_management_id] += 1
+
+        latest_request_ids = request_model.objects \
+            .values('python_management_id') \
+            .annotate(latest_id=models.Max('id')) \
+            .values('latest_id')
+        for python_management_id in request_model.objects \
+                .filter(id__in=latest_request_ids, state=ERRED) \
+                .values_list('python_management_id', flat=True):
+            erred_counts[python_management_id] += 1
+
+    for python_management_id in set(scheduled_counts) | set(creating_counts) | set(erred_counts):
+        PythonManagement.objects.filter(pk=python_management_id).update(
+            scheduled_requests_count=scheduled_counts[python_management_id],
+            creating_requests_count=creating_counts[python_management_id],
+            erred_requests_count=erred_counts[python_management_id],
+            aggregate_state=build_aggregate_state(
+                scheduled_counts[python_management_id],
+                creating_counts[python_management_id],
+                erred_counts[python_management_id]),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_management', '0005_immutable_default_json'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pythonmanagement',
+            name='aggregate_state',
+            field=models.PositiveSmallIntegerField(
+                choices=[(5, 'Creation Scheduled'), (6, 'Creating'), (1, 'Update Scheduled'), (2, 'Updating'), (7, 'Deletion Scheduled'), (8, 'Deleting'), (3, 'OK'),
+                         (4, 'Erred')], db_index=True, default=3),
+        ),
+        migrations.AddField(
+            model_name='pythonmanagement',
+            name='creating_requests_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pythonmanagement',
+            name='erred_requests_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pythonmanagement',
+            name='scheduled_requests_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_aggregate_state, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_management', '0007_cachedrepositorysyncstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cachedrepositorypythonlibrary',
+            name='releases_etag',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='cachedrepositorypythonlibrary',
+            name='releases_indexed_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.CreateModel(
+            name='CachedRepositoryPythonLibraryRelease',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(max_length=255)),
+                ('upload_time', models.DateTimeField()),
+                ('python_version_not_specified', models.BooleanField(default=False)),
+                ('library', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='releases', to='python_management.CachedRepositoryPythonLibrary')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CachedRepositoryPythonLibraryReleaseCompatibility',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('python_version', models.CharField(db_index=True, max_length=10)),
+                ('release', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compatible_python_versions', to='python_management.CachedRepositoryPythonLibraryRelease')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='cachedrepositorypythonlibraryrelease',
+            unique_together=set([('library', 'version')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='cachedrepositorypythonlibraryrelease',
+            index_together=set([('library', 'upload_time')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='cachedrepositorypythonlibraryreleasecompatibility',
+            unique_together=set([('release', 'python_version')]),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import re
+
+from django.db import migrations, models
+
+
+def fill_normalized_name(apps, schema_editor):
+    CachedRepositoryPythonLibrary = apps.get_model('python_management', 'CachedRepositoryPythonLibrary')
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "UPDATE python_management_cachedrepositorypythonlibrary "
+            "SET normalized_name = lower(regexp_replace(name, '[-_.]+', '-', 'g'))")
+        return
+
+    for library in CachedRepositoryPythonLibrary.objects.only('name').iterator():
+        CachedRepositoryPythonLibrary.objects.filter(pk=library.pk).update(
+            normalized_name=re.sub(r'[-_.]+', '-', library.name).lower())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_management', '0008_library_releases_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cachedrepositorypythonlibrary',
+            name='normalized_name',
+            field=models.CharField(default='', max_length=255),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='cachedrepositorypythonlibrary',
+            name='popularity',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_normalized_name, reverse_code=migrations.RunPython.noop),
+        # on PostgreSQL index with varchar_pattern_ops is created as well, so that it serves LIKE 'prefix%' queries
+        migrations.AlterField(
+            model_name='cachedrepositorypythonlibrary',
+            name='normalized_name',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_management', '0009_library_autocomplete_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pythonmanagementdeleterequest',
+            name='queued',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='pythonmanagementdeletevirtualenvrequest',
+            name='queued',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='pythonmanagementfindinstalledlibrariesrequest',
+            name='queued',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='pythonmanagementfindvirtualenvsrequest',
+            name='queued',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='pythonmanagementinitializerequest',
+            name='queued',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='pythonmanagementsynchronizerequest',
+            name='queued',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import django_fsm
+import model_utils.fields
+import waldur_core.core.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_management', '0010_request_queued'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PythonManagementFindInstalledLibrariesBatchRequest',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', waldur_core.core.fields.UUIDField()),
+                ('error_message', models.TextField(blank=True)),
+                ('state', django_fsm.FSMIntegerField(
+                    choices=[(5, 'Creation Scheduled'), (6, 'Creating'), (1, 'Update Scheduled'), (2, 'Updating'), (7, 'Deletion Scheduled'), (8, 'Deleting'), (3, 'OK'),
+                             (4, 'Erred')], default=5)),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('output', models.TextField(blank=True)),
+                ('queued', models.BooleanField(db_index=True, default=False)),
+                ('virtual_env_names', waldur_core.core.fields.JSONField(blank=True, default=list, help_text='List of virtual environments names')),
+                ('python_management', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='python_management.PythonManagement')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=(models.Model,),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+def reset_releases_index(apps, schema_editor):
+    # releases have been indexed as compatible with any minor version of the major one,
+    # resetting index time forces full fetch instead of ETag revalidation on the next lookup
+    CachedRepositoryPythonLibrary = apps.get_model('python_management', 'CachedRepositoryPythonLibrary')
+    CachedRepositoryPythonLibrary.objects.exclude(releases_indexed_at=None).update(releases_indexed_at=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_management', '0011_find_installed_libraries_batch_request'),
+    ]
+
+    operations = [
+        migrations.RunPython(reset_releases_index, reverse_code=migrations.RunPython.noop),
+    ]
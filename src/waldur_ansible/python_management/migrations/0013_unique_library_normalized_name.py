@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def delete_duplicate_libraries(apps, schema_editor):
+    # PyPI project names are unique once normalized, duplicates could only be created by concurrent versions lookups
+    CachedRepositoryPythonLibrary = apps.get_model('python_management', 'CachedRepositoryPythonLibrary')
+    duplicated_names = CachedRepositoryPythonLibrary.objects \
+        .values('normalized_name') \
+        .annotate(libraries_count=models.Count('id')) \
+        .filter(libraries_count__gt=1) \
+        .values_list('normalized_name', flat=True)
+
+    for normalized_name in list(duplicated_names):
+        library_ids = list(CachedRepositoryPythonLibrary.objects
+                           .filter(normalized_name=normalized_name)
+                           .order_by('-popularity', 'id')
+                           .values_list('id', flat=True))
+        CachedRepositoryPythonLibrary.objects.filter(id__in=library_ids[1:]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_management', '0012_reindex_library_releases'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_libraries, reverse_code=migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='cachedrepositorypythonlibrary',
+            name='normalized_name',
+            field=models.CharField(max_length=255, unique=True),
+        ),
+    ]
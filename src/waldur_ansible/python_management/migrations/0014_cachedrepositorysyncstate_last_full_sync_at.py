@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_management', '0013_unique_library_normalized_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cachedrepositorysyncstate',
+            name='last_full_sync_at',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
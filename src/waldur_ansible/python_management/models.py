@@ -1,10 +1,13 @@
 from __future__ import unicode_literals
 
+import re
+
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.utils.translation import ugettext_lazy as _
+from model_utils.fields import AutoLastModifiedField
 from model_utils.models import TimeStampedModel
 from waldur_ansible.common import models as common_models
 
@@ -15,7 +18,8 @@ from waldur_core.structure import models as structure_models
 User = get_user_model()
 
 
-class PythonManagement(common_models.UuidStrMixin, TimeStampedModel, common_models.ApplicationModel):
+class PythonManagement(common_models.UuidStrMixin, TimeStampedModel, common_models.AggregateStateMixin,
+                       common_models.ApplicationModel):
     user = models.ForeignKey(User, related_name='+')
     virtual_envs_dir_path = models.CharField(max_length=255)
     python_version = models.CharField(max_length=10)
@@ -52,9 +56,12 @@ class InstalledLibrary(common_models.UuidStrMixin, core_models.NameMixin, models
     version = models.CharField(max_length=255)
 
 
-class PythonManagementRequest(common_models.UuidStrMixin, core_models.StateMixin, TimeStampedModel, common_models.OutputMixin):
+class PythonManagementRequest(common_models.UuidStrMixin, core_models.StateMixin, TimeStampedModel, common_models.OutputMixin,
+                              common_models.QueuedMixin):
     python_management = models.ForeignKey(PythonManagement, on_delete=models.CASCADE, related_name='+')
 
+    APPLICATION_FIELD_NAME = 'python_management'
+
     class Meta(object):
         abstract = True
 
@@ -64,12 +71,8 @@ class PythonManagementRequest(common_models.UuidStrMixin, core_models.StateMixin
 
 
 class PythonManagementInitializeRequest(PythonManagementRequest):
-
     # holds sychronization_requests One-To-Many relation
-
-    def get_backend(self):
-        from waldur_ansible.python_management.backend.python_management_backend import PythonManagementInitializationBackend
-        return PythonManagementInitializationBackend()
+    pass
 
 
 class VirtualEnvMixin(models.Model):
@@ -101,5 +104,69 @@ class PythonManagementFindInstalledLibrariesRequest(VirtualEnvMixin, PythonManag
     pass
 
 
+class PythonManagementFindInstalledLibrariesBatchRequest(PythonManagementRequest):
+    """
+    Finds installed libraries of several virtual environments in a single playbook run.
+    """
+    virtual_env_names = core_fields.JSONField(default=list, help_text=_('List of virtual environments names'), blank=True)
+
+
 class CachedRepositoryPythonLibrary(common_models.UuidStrMixin):
     name = models.CharField(max_length=255, validators=[validate_name], db_index=True)
+    # name normalized according to PEP 503, used for case insensitive prefix lookups
+    normalized_name = models.CharField(max_length=255, unique=True)
+    # count of version lookups, used to rank autocomplete suggestions
+    popularity = models.PositiveIntegerField(default=0)
+    # releases are indexed on demand, ETag allows to revalidate them without fetching whole metadata
+    releases_etag = models.CharField(max_length=255, blank=True)
+    releases_indexed_at = models.DateTimeField(null=True)
+
+    # holds releases reference
+
+    @staticmethod
+    def normalize_name(name):
+        return re.sub(r'[-_.]+', '-', name).lower()
+
+    def save(self, *args, **kwargs):
+        self.normalized_name = self.normalize_name(self.name)
+        return super(CachedRepositoryPythonLibrary, self).save(*args, **kwargs)
+
+
+class CachedRepositoryPythonLibraryRelease(models.Model):
+    library = models.ForeignKey(CachedRepositoryPythonLibrary, on_delete=models.CASCADE, related_name='releases')
+    version = models.CharField(max_length=255)
+    upload_time = models.DateTimeField()
+    # release provides files which are not bound to particular python version, e.g. source distributions
+    python_version_not_specified = models.BooleanField(default=False)
+
+    # holds compatible_python_versions reference
+
+    class Meta(object):
+        unique_together = ('library', 'version')
+        index_together = ('library', 'upload_time')
+
+
+class CachedRepositoryPythonLibraryReleaseCompatibility(models.Model):
+    """
+    Python version supported by the release, both major (e.g. "3") and major.minor (e.g. "3.6") versions are stored.
+    """
+    release = models.ForeignKey(CachedRepositoryPythonLibraryRelease, on_delete=models.CASCADE, related_name='compatible_python_versions')
+    python_version = models.CharField(max_length=10, db_index=True)
+
+    class Meta(object):
+        unique_together = ('release', 'python_version')
+
+
+class CachedRepositorySyncState(models.Model):
+    """
+    Holds serial of the last PyPI changelog event which has been applied to the cached libraries,
+    so that subsequent synchronizations fetch only the changes made after it.
+    """
+    last_serial = models.BigIntegerField(null=True)
+    last_full_sync_at = models.DateTimeField(null=True)
+    modified = AutoLastModifiedField()
+
+    @classmethod
+    def get_solo(cls):
+        sync_state, _ = cls.objects.get_or_create(pk=1)
+        return sync_state
@@ -1,56 +1,241 @@
-import string
+from __future__ import unicode_literals
+
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+from collections import namedtuple
 
 import requests
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import dateparse, timezone
+
+from . import models, pypi_client
 
-from . import models
+logger = logging.getLogger(__name__)
+
+WRONG_OS_VERSIONS = ('win', 'mac')
+PYTHON_TAG_PATTERN = re.compile(r'(?:cp|py|pp)(\d)(\d*)')
+PYTHON_VERSION_PATTERN = re.compile(r'^(\d+)(?:\.(\d+))?')
 
 
 def find_versions(queried_library_name, python_version):
-    lib_info = requests.get("https://pypi.python.org/pypi/%s/json" % queried_library_name).json()
-
-    wrong_os_versions = ["win", "mac"]
-    python_versions = build_version_criteria(python_version)
-    version_upload_date_pairs = []
-
-    for release_version, release_info in lib_info['releases'].viewitems():
-        for platform_version in release_info:
-            if not contains_any_string(platform_version['filename'], wrong_os_versions) and\
-                    (contains_any_string(platform_version['python_version'], python_versions) or
-                     version_not_specified(platform_version['filename'])):
-                version_upload_date_pairs.append(dict(version=release_version, upload_date=platform_version['upload_time']))
-                break
-
-    version_upload_date_pairs.sort(reverse=True, key=lambda pair: pair['upload_date'])
-    return map(lambda pair: pair['version'], version_upload_date_pairs)
-
-
-def build_version_criteria(python_version):
-    if python_version != '3':
-        required_version = python_version[0:find_nth(python_version, '.', 2)]
-        required_version_without_dots = string.replace(required_version, '.', '').strip()
-        return [required_version, required_version_without_dots]
-    else:
+    """
+    Versions of the library compatible with the python version, the most recently uploaded come first.
+    """
+    library = get_library_with_indexed_releases(queried_library_name)
+    if library is None:
+        return []
+    increase_popularity(library)
+
+    compatible_releases = models.CachedRepositoryPythonLibraryReleaseCompatibility.objects \
+        .filter(release__library=library, python_version__in=build_python_version_keys(python_version)) \
+        .values('release_id')
+    return list(models.CachedRepositoryPythonLibraryRelease.objects
+                .filter(library=library)
+                .filter(Q(python_version_not_specified=True) | Q(pk__in=compatible_releases))
+                .order_by('-upload_time')
+                .values_list('version', flat=True))
+
+
+def get_library_with_indexed_releases(library_name):
+    """
+    Indexed releases are used as is while they are fresh. Stale index is revalidated with ETag,
+    so PyPI sends the whole document again only if it has changed, and is used as is if PyPI is not available.
+    """
+    library = models.CachedRepositoryPythonLibrary.objects \
+        .filter(normalized_name=models.CachedRepositoryPythonLibrary.normalize_name(library_name)) \
+        .first()
+    if library and library.releases_indexed_at and not is_releases_index_stale(library):
+        return library
+
+    try:
+        return refresh_library_releases(library_name, library)
+    except requests.RequestException:
+        if not library or not library.releases_indexed_at:
+            raise
+        logger.warning('Could not revalidate releases of "%s" python library, using stale ones.', library_name, exc_info=True)
+        return library
+
+
+def is_releases_index_stale(library):
+    ttl = settings.WALDUR_PYTHON_MANAGEMENT.get('PYPI_METADATA_CACHE_TTL', 60 * 60)
+    return (timezone.now() - library.releases_indexed_at).total_seconds() >= ttl
+
+
+def refresh_library_releases(library_name, library=None):
+    response = pypi_client.get_client().get_library_info(library_name, get_releases_etag(library))
+    return apply_library_info(library_name, library, response)
+
+
+def get_releases_etag(library):
+    return library.releases_etag if library and library.releases_indexed_at else None
+
+
+def apply_library_info(library_name, library, response):
+    if response.status_code == requests.codes.not_found:
+        return None
+    elif response.status_code == requests.codes.not_modified:
+        library.releases_indexed_at = timezone.now()
+        library.save(update_fields=['releases_indexed_at'])
+        return library
+    return index_library_releases(library_name, library, response.json(), response.headers.get('ETag') or '')
+
+
+@transaction.atomic
+def index_library_releases(library_name, library, library_info, etag):
+    """
+    Library row is locked while its releases are replaced, so that concurrent lookups of the same library
+    do not index it at the same time. Index built by another lookup while waiting for the lock is used as is.
+    """
+    observed_index = (library.releases_etag, library.releases_indexed_at) if library else ('', None)
+    if library is None:
+        # name as it is typed by user may differ from the canonical one only by case and separators
+        library, _ = models.CachedRepositoryPythonLibrary.objects.get_or_create(
+            normalized_name=models.CachedRepositoryPythonLibrary.normalize_name(library_name),
+            defaults={'name': library_info.get('info', {}).get('name') or library_name})
+
+    library = models.CachedRepositoryPythonLibrary.objects.select_for_update().get(pk=library.pk)
+    if library.releases_indexed_at and (library.releases_etag, library.releases_indexed_at) != observed_index:
+        return library
+    library.releases.all().delete()
+
+    releases_python_versions = {}
+    releases = []
+    for release_version, release_files in library_info['releases'].items():
+        release = build_release(library, release_version, release_files)
+        if release:
+            releases.append(release)
+            releases_python_versions[release_version] = extract_python_versions(release_files)
+    models.CachedRepositoryPythonLibraryRelease.objects.bulk_create(releases)
+
+    release_ids = dict(library.releases.values_list('version', 'id'))
+    models.CachedRepositoryPythonLibraryReleaseCompatibility.objects.bulk_create(
+        models.CachedRepositoryPythonLibraryReleaseCompatibility(release_id=release_ids[release_version], python_version=python_version)
+        for release_version, python_versions in releases_python_versions.items()
+        for python_version in python_versions)
+
+    library.releases_etag = etag
+    library.releases_indexed_at = timezone.now()
+    library.save(update_fields=['releases_etag', 'releases_indexed_at'])
+    return library
+
+
+def build_release(library, release_version, release_files):
+    """
+    Files built for Windows and Mac are not taken into account, release without other files is skipped.
+    Files without python tag, such as source distributions, are considered compatible with any python version.
+    """
+    supported_files = get_supported_files(release_files)
+    if not supported_files:
+        return None
+
+    return models.CachedRepositoryPythonLibraryRelease(
+        library=library,
+        version=release_version,
+        upload_time=min(parse_upload_time(release_file['upload_time']) for release_file in supported_files),
+        python_version_not_specified=any(not extract_python_versions([release_file]) for release_file in supported_files),
+    )
+
+
+def get_supported_files(release_files):
+    return [release_file for release_file in release_files
+            if not any(os_version in release_file['filename'] for os_version in WRONG_OS_VERSIONS)]
+
+
+def extract_python_versions(release_files):
+    """
+    Python tags such as "cp36", "py2.py3" or plain versions such as "3.6" are converted to major.minor versions,
+    major version is stored only for tags without minor version, e.g. "py3", which are compatible with any 3.x version.
+    """
+    python_versions = set()
+    for release_file in get_supported_files(release_files):
+        python_tag = release_file['python_version'] or ''
+        version_match = PYTHON_VERSION_PATTERN.match(python_tag)
+        matches = [version_match.groups()] if version_match else PYTHON_TAG_PATTERN.findall(python_tag)
+        for major, minor in matches:
+            python_versions.add('%s.%s' % (major, minor) if minor else major)
+    return python_versions
+
+
+def build_python_version_keys(python_version):
+    """
+    Release is compatible with python version "3.6.5" if it supports either "3.6" or any "3" version, e.g. "py3" wheel.
+    Python version of previously initialized python managements is stored with a leading space.
+    """
+    python_version = python_version.strip()
+    version_match = PYTHON_VERSION_PATTERN.match(python_version)
+    if not version_match:
         return [python_version]
+    major, minor = version_match.groups()
+    return ['%s.%s' % (major, minor), major] if minor else [major]
+
 
+def parse_upload_time(upload_time):
+    parsed_upload_time = dateparse.parse_datetime(upload_time)
+    if settings.USE_TZ and timezone.is_naive(parsed_upload_time):
+        parsed_upload_time = timezone.make_aware(parsed_upload_time, timezone.utc)
+    return parsed_upload_time
 
-def find_nth(target_string, substring, n):
-    start = target_string.find(substring)
-    while start >= 0 and n > 1:
-        start = target_string.find(substring, start + len(substring))
-        n -= 1
-    return start
 
+def autocomplete_library_name(queried_library_name):
+    """
+    Libraries whose normalized name starts with the normalized query, the most popular come first.
+    """
+    python_management_settings = settings.WALDUR_PYTHON_MANAGEMENT
+    normalized_prefix = models.CachedRepositoryPythonLibrary.normalize_name(queried_library_name)
+    limit = python_management_settings.get('AUTOCOMPLETE_RESULTS_LIMIT', 30)
 
-def version_not_specified(python_version):
-    return 'cp' not in python_version and 'py' not in python_version
+    if python_management_settings.get('AUTOCOMPLETE_SNAPSHOT_ENABLED', False):
+        return library_names_snapshot.find(normalized_prefix, limit)
 
+    return models.CachedRepositoryPythonLibrary.objects \
+        .filter(normalized_name__startswith=normalized_prefix) \
+        .order_by('-popularity', 'normalized_name')[0:limit]
 
-def contains_any_string(target_string, strings):
-    for item in strings:
-        if item in target_string:
-            return True
-    return False
 
+def increase_popularity(library):
+    models.CachedRepositoryPythonLibrary.objects.filter(pk=library.pk).update(popularity=F('popularity') + 1)
 
-def autocomplete_library_name(queried_library_name):
-    return models.CachedRepositoryPythonLibrary.objects.filter(name__startswith=queried_library_name).order_by('name')[0:30]
+
+LibrarySuggestion = namedtuple('LibrarySuggestion', ('normalized_name', 'name', 'uuid', 'popularity'))
+
+
+class LibraryNamesSnapshot(object):
+    """
+    In-process array of library names sorted by normalized name, prefix lookups are done with binary search.
+    Snapshot is reloaded from the database once it gets older than AUTOCOMPLETE_SNAPSHOT_TTL.
+    """
+
+    def __init__(self):
+        self.normalized_names = []
+        self.suggestions = []
+        self.loaded_at = None
+        self.lock = threading.Lock()
+
+    def find(self, normalized_prefix, limit):
+        self.reload_if_stale()
+        normalized_names, suggestions = self.normalized_names, self.suggestions
+        start = bisect.bisect_left(normalized_names, normalized_prefix)
+        end = bisect.bisect_left(normalized_names, normalized_prefix + '\uffff', start)
+        return heapq.nsmallest(limit, suggestions[start:end], key=lambda suggestion: (-suggestion.popularity, suggestion.normalized_name))
+
+    def reload_if_stale(self):
+        ttl = settings.WALDUR_PYTHON_MANAGEMENT.get('AUTOCOMPLETE_SNAPSHOT_TTL', 5 * 60)
+        with self.lock:
+            if self.loaded_at is None or time.time() - self.loaded_at >= ttl:
+                self.reload()
+
+    def reload(self):
+        suggestions = sorted(LibrarySuggestion(*values) for values in models.CachedRepositoryPythonLibrary.objects
+                             .values_list('normalized_name', 'name', 'uuid', 'popularity').iterator())
+        self.normalized_names = [suggestion.normalized_name for suggestion in suggestions]
+        self.suggestions = suggestions
+        self.loaded_at = time.time()
+
+
+library_names_snapshot = LibraryNamesSnapshot()
@@ -0,0 +1,183 @@
+import logging
+import random
+import re
+import socket
+import threading
+import time
+# patched with xmlrpc.monkey_patch() below
+import xmlrpclib  # nosec
+from multiprocessing.pool import ThreadPool
+
+import requests
+from defusedxml import xmlrpc
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from requests.adapters import HTTPAdapter
+
+xmlrpc.monkey_patch()
+logger = logging.getLogger(__name__)
+
+DEFAULT_JSON_API_URL = 'https://pypi.org/pypi/'
+DEFAULT_SIMPLE_API_URL = 'https://pypi.org/simple/'
+DEFAULT_XMLRPC_API_URL = 'https://pypi.org/pypi'
+SIMPLE_INDEX_LINK_PATTERN = re.compile(r'<a[^>]*>([^<]+)</a>', re.IGNORECASE)
+RETRIED_STATUS_CODES = (
+    requests.codes.too_many_requests,
+    requests.codes.internal_server_error,
+    requests.codes.bad_gateway,
+    requests.codes.service_unavailable,
+    requests.codes.gateway_timeout,
+)
+
+
+class TimeoutTransport(xmlrpclib.Transport):
+    """
+    Standard XML-RPC transports wait for the response forever, connection is kept alive between calls.
+    """
+
+    def __init__(self, timeout, *args, **kwargs):
+        xmlrpclib.Transport.__init__(self, *args, **kwargs)
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        connection = xmlrpclib.Transport.make_connection(self, host)
+        connection.timeout = self.timeout
+        return connection
+
+
+class TimeoutSafeTransport(xmlrpclib.SafeTransport):
+    def __init__(self, timeout, *args, **kwargs):
+        xmlrpclib.SafeTransport.__init__(self, *args, **kwargs)
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        connection = xmlrpclib.SafeTransport.make_connection(self, host)
+        connection.timeout = self.timeout
+        return connection
+
+
+class PyPIClient(object):
+    """
+    Keeps connections to PyPI alive: requests to JSON and Simple APIs share connections pool of the session,
+    XML-RPC calls reuse connection of the proxy transport.
+    Requests are retried with exponential backoff and full jitter on connection errors,
+    timeouts and responses which indicate that PyPI is overloaded.
+    Index URLs can point to a mirror, if it does not provide XML-RPC API, packages are listed
+    using Simple API and changelog is not available.
+    """
+
+    def __init__(self):
+        python_management_settings = settings.WALDUR_PYTHON_MANAGEMENT
+        self.json_api_url = python_management_settings.get('PYPI_JSON_API_URL', DEFAULT_JSON_API_URL)
+        self.simple_api_url = python_management_settings.get('PYPI_SIMPLE_API_URL', DEFAULT_SIMPLE_API_URL)
+        self.xmlrpc_api_url = python_management_settings.get('PYPI_XMLRPC_API_URL', DEFAULT_XMLRPC_API_URL)
+        self.timeout = python_management_settings.get('PYPI_REQUEST_TIMEOUT', 10)
+        self.max_retries = python_management_settings.get('PYPI_MAX_RETRIES', 3)
+        self.retry_backoff = python_management_settings.get('PYPI_RETRY_BACKOFF', 0.5)
+        self.max_concurrent_requests = python_management_settings.get('PYPI_MAX_CONCURRENT_REQUESTS', 10)
+
+        self.xmlrpc_proxy = None
+        self.xmlrpc_proxy_lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrent_requests)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get_library_info(self, library_name, etag=None):
+        """
+        Returns response of JSON API, which is either 200, 304 if ETag matches or 404 if library does not exist.
+        """
+        headers = {'If-None-Match': etag} if etag else {}
+        response = self.execute_with_retries(
+            lambda: self.session.get(self.build_json_api_url(library_name), headers=headers, timeout=self.timeout))
+        if response.status_code not in (requests.codes.not_modified, requests.codes.not_found):
+            response.raise_for_status()
+        return response
+
+    def library_exists(self, library_name):
+        response = self.execute_with_retries(
+            lambda: self.session.head(self.build_json_api_url(library_name), allow_redirects=True, timeout=self.timeout))
+        if response.status_code == requests.codes.not_found:
+            return False
+        response.raise_for_status()
+        return True
+
+    def build_json_api_url(self, library_name):
+        return '%s/%s/json' % (self.json_api_url.rstrip('/'), library_name)
+
+    def is_changelog_supported(self):
+        return bool(self.xmlrpc_api_url)
+
+    def list_packages(self):
+        if self.is_changelog_supported():
+            return self.execute_with_retries(lambda: self.get_xmlrpc_proxy().list_packages())
+
+        response = self.execute_with_retries(lambda: self.session.get(self.simple_api_url, timeout=self.timeout))
+        response.raise_for_status()
+        return [name.strip() for name in SIMPLE_INDEX_LINK_PATTERN.findall(response.text)]
+
+    def changelog_last_serial(self):
+        return self.execute_with_retries(lambda: self.get_xmlrpc_proxy().changelog_last_serial())
+
+    def changelog_since_serial(self, serial):
+        return self.execute_with_retries(lambda: self.get_xmlrpc_proxy().changelog_since_serial(serial))
+
+    def get_xmlrpc_proxy(self):
+        """
+        Proxy is created once per client, so that its transport keeps connection alive between calls.
+        Client is recreated if settings are changed.
+        """
+        with self.xmlrpc_proxy_lock:
+            if self.xmlrpc_proxy is None:
+                transport_class = TimeoutSafeTransport if self.xmlrpc_api_url.startswith('https') else TimeoutTransport
+                self.xmlrpc_proxy = xmlrpclib.ServerProxy(self.xmlrpc_api_url, transport=transport_class(self.timeout))
+            return self.xmlrpc_proxy
+
+    def map_concurrently(self, function, items):
+        """
+        Applies function to the items using at most PYPI_MAX_CONCURRENT_REQUESTS threads.
+        """
+        pool = ThreadPool(self.max_concurrent_requests)
+        try:
+            return pool.map(function, items)
+        finally:
+            pool.close()
+            pool.join()
+
+    def execute_with_retries(self, request):
+        attempt = 0
+        while True:
+            try:
+                result = request()
+            except (requests.ConnectionError, requests.Timeout, socket.error, xmlrpclib.ProtocolError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                error = e
+            else:
+                is_overloaded = isinstance(result, requests.Response) and result.status_code in RETRIED_STATUS_CODES
+                if not is_overloaded or attempt >= self.max_retries:
+                    return result
+                error = 'status code %s' % result.status_code
+
+            delay = random.uniform(0, self.retry_backoff * 2 ** attempt)
+            logger.info('Request to PyPI has failed with %s, retrying in %.2f seconds.', error, delay)
+            time.sleep(delay)
+            attempt += 1
+
+
+_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = PyPIClient()
+    return _client
+
+
+@receiver(setting_changed)
+def reset_client(setting, **kwargs):
+    global _client
+    if setting == 'WALDUR_PYTHON_MANAGEMENT':
+        _client = None
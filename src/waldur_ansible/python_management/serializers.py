@@ -1,16 +1,14 @@
 from __future__ import unicode_literals
 
-import datetime
-
 from django.core.validators import RegexValidator
 from django.db import transaction
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import serializers, exceptions
 from waldur_ansible.common import serializers as common_serializers
 
-from waldur_core.core import models as core_models, serializers as core_serializers
+from waldur_core.core import serializers as core_serializers
 from waldur_core.structure import permissions as structure_permissions, serializers as structure_serializers, models as structure_models
-from . import models, utils
+from . import models
 
 REQUEST_TYPES_PLAIN_NAMES = {
     models.PythonManagement: 'overall',
@@ -18,6 +16,7 @@ REQUEST_TYPES_PLAIN_NAMES = {
     models.PythonManagementSynchronizeRequest: 'synchronization',
     models.PythonManagementFindVirtualEnvsRequest: 'virtual_envs_search',
     models.PythonManagementFindInstalledLibrariesRequest: 'installed_libraries_search',
+    models.PythonManagementFindInstalledLibrariesBatchRequest: 'installed_libraries_batch_search',
     models.PythonManagementDeleteRequest: 'python_management_deletion',
     models.PythonManagementDeleteVirtualEnvRequest: 'virtual_environment_deletion',
 }
@@ -65,7 +64,7 @@ class PythonManagementRequestMixin(common_serializers.BaseApplicationSerializer)
 
     def get_output(self, obj):
         if self.context.get('select_output'):
-            return obj.output
+            return obj.get_output()
         else:
             return None
 
@@ -92,6 +91,12 @@ class PythonManagementFindInstalledLibrariesRequestSerializer(PythonManagementRe
         fields = PythonManagementRequestMixin.Meta.fields + ('virtual_env_name',)
 
 
+class PythonManagementFindInstalledLibrariesBatchRequestSerializer(PythonManagementRequestMixin):
+    class Meta(PythonManagementRequestMixin.Meta):
+        model = models.PythonManagementFindInstalledLibrariesBatchRequest
+        fields = PythonManagementRequestMixin.Meta.fields + ('virtual_env_names',)
+
+
 class PythonManagementDeleteRequestSerializer(PythonManagementRequestMixin):
     class Meta(PythonManagementRequestMixin.Meta):
         model = models.PythonManagementDeleteRequest
@@ -116,7 +121,6 @@ class PythonManagementSynchronizeRequestSerializer(PythonManagementRequestMixin)
 class PythonManagementSerializer(
         common_serializers.BaseApplicationSerializer,
         structure_serializers.PermissionFieldFilteringMixin):
-    REQUEST_IN_PROGRESS_STATES = (core_models.StateMixin.States.CREATION_SCHEDULED, core_models.StateMixin.States.CREATING)
 
     state = serializers.SerializerMethodField()
     virtual_environments = VirtualEnvironmentSerializer(many=True)
@@ -153,79 +157,7 @@ class PythonManagementSerializer(
         return 'project'
 
     def get_state(self, python_management):
-        states = []
-        initialize_request = utils.execute_safely(
-            lambda: models.PythonManagementInitializeRequest.objects.filter(python_management=python_management).latest('id'))
-        if initialize_request and self.is_in_progress_or_errored(initialize_request):
-            return [self.build_state(initialize_request)]
-
-        states.extend(self.get_request_state(
-            utils.execute_safely(lambda: models.PythonManagementDeleteRequest.objects.filter(python_management=python_management).latest('id'))))
-        states.extend(
-            self.get_request_state(
-                utils.execute_safely(
-                    lambda: models.PythonManagementDeleteVirtualEnvRequest.objects.filter(python_management=python_management).latest('id'))))
-        states.extend(self.build_search_requests_states(python_management))
-        states.extend(self.build_states_from_last_group_of_the_request(python_management, models.PythonManagementSynchronizeRequest))
-
-        if not states:
-            return core_models.StateMixin(state=core_models.StateMixin.States.OK).human_readable_state
-        else:
-            creation_scheduled_state = core_models.StateMixin(state=core_models.StateMixin.States.CREATION_SCHEDULED).human_readable_state
-            creating_state = core_models.StateMixin(state=core_models.StateMixin.States.CREATING).human_readable_state
-            erred_state = core_models.StateMixin(state=core_models.StateMixin.States.ERRED).human_readable_state
-            if creating_state in states:
-                return creating_state
-            elif creation_scheduled_state in states:
-                return creation_scheduled_state
-            elif erred_state in states:
-                return erred_state
-
-    def build_search_requests_states(self, python_management):
-        states = []
-        states.extend(
-            self.get_request_state(
-                utils.execute_safely(
-                    lambda: models.PythonManagementFindVirtualEnvsRequest.objects
-                    .filter(python_management=python_management).latest('id'))))
-        states.extend(self.build_states_from_last_group_of_the_request(python_management, models.PythonManagementFindInstalledLibrariesRequest))
-        return states
-
-    def get_request_state(self, request):
-        if request and self.is_in_progress_or_errored(request):
-            return [self.build_state(request)]
-        else:
-            return []
-
-    def build_states_from_last_group_of_the_request(self, python_management, request_class):
-        states = []
-        requests = request_class.objects.filter(python_management=python_management).order_by('-id')
-        last_request_group = self.get_last_requests_group(requests)
-        for request in last_request_group:
-            if self.is_in_progress_or_errored(request):
-                states.append(self.build_state(request))
-        return states
-
-    def get_last_requests_group(self, requests):
-        last_request_group = []
-
-        last_request_time = None
-        for request in requests:
-            if not last_request_time:
-                last_request_time = request.created - datetime.timedelta(minutes=1)
-            if request.created < last_request_time:
-                break
-            last_request_group.append(request)
-
-        return last_request_group
-
-    def is_in_progress_or_errored(self, request):
-        return request.state in PythonManagementSerializer.REQUEST_IN_PROGRESS_STATES \
-            or request.state == core_models.StateMixin.States.ERRED
-
-    def build_state(self, request, state=None):
-        request_state = state if state else request
-        return request_state.human_readable_state
+        return python_management.human_readable_aggregate_state
 
     @transaction.atomic
     def create(self, validated_data):
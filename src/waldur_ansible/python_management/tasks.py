@@ -1,17 +1,26 @@
 import logging
-# patched with xmlrpc.monkey_patch() below
+# patched with xmlrpc.monkey_patch() in pypi_client
 import xmlrpclib  # nosec
 
+import requests
 from celery import shared_task
-from defusedxml import xmlrpc
 from django.conf import settings
-from django.core.validators import MaxValueValidator
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 
-from . import models
+from . import models, pip_service, pypi_client
 
-xmlrpc.monkey_patch()
 logger = logging.getLogger(__name__)
 
+SYNC_PIP_LIBRARIES_LOCK = 'waldur_ansible_sync_pip_libraries'
+SYNC_PIP_LIBRARIES_LOCK_TIMEOUT = 60 * 60
+CHANGELOG_CREATE_ACTION = 'create'
+CHANGELOG_REMOVE_PROJECT_ACTION = 'remove project'
+# removal of a release or a file is logged as 'remove release' or 'remove file <name>',
+# legacy events use bare 'remove' for removal of the project as well
+CHANGELOG_REMOVE_ACTION_PREFIX = 'remove'
+
 
 @shared_task(name='waldur_ansible.sync_pip_libraries')
 def sync_pip_libraries():
@@ -36,38 +45,173 @@ def schedule_sync():
 def _sync_pip_libraries():
     """
     This task is called asynchronously by Celery beat schedule.
+    Only changes made since the last synchronization are fetched, whole index is fetched on the first run.
+    If index does not provide changelog, whole index is fetched once per SYNC_PIP_PACKAGES_FULL_RESYNC_INTERVAL.
+    Lock prevents concurrent synchronizations from inserting the same libraries twice.
     """
-    logger.info('Started synching PIP packages.')
-    client = xmlrpclib.ServerProxy('https://pypi.python.org/pypi')
-    actual_repository_packages = client.list_packages()
-    previously_cached_packages = models.CachedRepositoryPythonLibrary.objects.values_list('name', flat=True)
+    if not cache.add(SYNC_PIP_LIBRARIES_LOCK, True, SYNC_PIP_LIBRARIES_LOCK_TIMEOUT):
+        logger.info('Skipped synching PIP packages: synchronization is already in progress.')
+        return
+
+    try:
+        client = pypi_client.get_client()
+        sync_state = models.CachedRepositorySyncState.get_solo()
+        if not client.is_changelog_supported() and not is_full_resync_due(sync_state):
+            logger.info('Skipped synching PIP packages: index does not provide changelog and '
+                        'full synchronization has been performed at %s.', sync_state.last_full_sync_at)
+            return
+
+        if sync_state.last_serial is None or not client.is_changelog_supported():
+            last_serial = sync_all_libraries(client)
+            sync_state.last_full_sync_at = timezone.now()
+        else:
+            try:
+                last_serial = sync_changed_libraries(client, sync_state.last_serial)
+            except (xmlrpclib.Error, requests.RequestException, ChangelogTooLargeError):
+                logger.warning('Could not apply PyPI changelog since serial %s, falling back to full resync.',
+                               sync_state.last_serial, exc_info=True)
+                last_serial = sync_all_libraries(client)
+                sync_state.last_full_sync_at = timezone.now()
+
+        sync_state.last_serial = last_serial
+        sync_state.save()
+    finally:
+        cache.delete(SYNC_PIP_LIBRARIES_LOCK)
+
 
-    delete_removed_libraries(actual_repository_packages, previously_cached_packages)
+def is_full_resync_due(sync_state):
+    interval = settings.WALDUR_PYTHON_MANAGEMENT.get('SYNC_PIP_PACKAGES_FULL_RESYNC_INTERVAL', 24 * 60 * 60)
+    return sync_state.last_full_sync_at is None or \
+        (timezone.now() - sync_state.last_full_sync_at).total_seconds() >= interval
 
-    persist_new_libraries(actual_repository_packages, previously_cached_packages)
 
+class ChangelogTooLargeError(Exception):
+    pass
 
-def persist_new_libraries(actual_repository_packages, previously_cached_packages):
-    current_batch = []
-    for library_name in actual_repository_packages:
-        if library_name not in previously_cached_packages:
-            if len(current_batch) == settings.WALDUR_PYTHON_MANAGEMENT.get('SYNC_PIP_PACKAGES_BATCH_SIZE'):
-                try:
-                    models.CachedRepositoryPythonLibrary.objects.bulk_create(current_batch)
-                except MaxValueValidator:
-                    logger.exception('Pip backend could not save "%s" python library: name is too long.', library_name)
-                current_batch = []
 
-            current_batch.append(models.CachedRepositoryPythonLibrary(name=library_name))
+def sync_all_libraries(client):
+    """
+    Serial is fetched before the packages list, so that changes made in between are applied by the next run.
+    """
+    logger.info('Started full synching of PIP packages.')
+    last_serial = client.changelog_last_serial() if client.is_changelog_supported() else None
+    actual_repository_packages = set(client.list_packages())
+    previously_cached_packages = set(
+        models.CachedRepositoryPythonLibrary.objects.values_list('name', flat=True).iterator())
 
-    if current_batch:
-        models.CachedRepositoryPythonLibrary.objects.bulk_create(current_batch)
+    removed_libraries = previously_cached_packages - actual_repository_packages
+    new_libraries = actual_repository_packages - previously_cached_packages
+    delete_removed_libraries(removed_libraries)
+    persist_new_libraries(new_libraries)
+    logger.info('Finished full synching of PIP packages: %s added, %s removed.', len(new_libraries), len(removed_libraries))
+    return last_serial
 
 
-def delete_removed_libraries(actual_repository_packages, previously_cached_packages):
-    library_names_to_delete = []
-    for previously_cached_package in previously_cached_packages:
-        if previously_cached_package not in actual_repository_packages:
-            library_names_to_delete.append(previously_cached_package)
-    if library_names_to_delete:
-        models.CachedRepositoryPythonLibrary.objects.filter(name__in=library_names_to_delete).delete()
+def sync_changed_libraries(client, since_serial):
+    """
+    Applies events of PyPI changelog, each of which is (name, version, timestamp, action, serial) tuple.
+    Only creation and removal of the whole project affect the list of cached libraries.
+    Other removals do not tell whether the project has been removed, so its existence is checked with PyPI.
+    """
+    changelog = client.changelog_since_serial(since_serial)
+    max_changelog_size = settings.WALDUR_PYTHON_MANAGEMENT.get('SYNC_PIP_PACKAGES_MAX_CHANGELOG_SIZE', 50000)
+    if len(changelog) > max_changelog_size:
+        raise ChangelogTooLargeError('PyPI changelog contains %s events.' % len(changelog))
+
+    created_libraries = set()
+    removed_libraries = set()
+    possibly_removed_libraries = set()
+    updated_libraries = set()
+    last_serial = since_serial
+    for library_name, _, _, action, serial in changelog:
+        last_serial = max(last_serial, serial)
+        if action == CHANGELOG_CREATE_ACTION:
+            created_libraries.add(library_name)
+            removed_libraries.discard(library_name)
+        elif action == CHANGELOG_REMOVE_PROJECT_ACTION:
+            removed_libraries.add(library_name)
+            created_libraries.discard(library_name)
+        else:
+            if action.startswith(CHANGELOG_REMOVE_ACTION_PREFIX):
+                possibly_removed_libraries.add(library_name)
+            updated_libraries.add(library_name)
+
+    missing_libraries = find_missing_libraries(client, possibly_removed_libraries - removed_libraries)
+    removed_libraries |= missing_libraries
+    created_libraries -= missing_libraries
+
+    previously_cached_packages = set()
+    for library_names_batch in split_into_batches(sorted(created_libraries)):
+        previously_cached_packages.update(models.CachedRepositoryPythonLibrary.objects
+                                          .filter(name__in=library_names_batch)
+                                          .values_list('name', flat=True))
+
+    delete_removed_libraries(removed_libraries)
+    persist_new_libraries(created_libraries - previously_cached_packages)
+    refresh_indexed_releases(updated_libraries - removed_libraries)
+    logger.info('Applied %s PyPI changelog events since serial %s.', len(changelog), since_serial)
+    return last_serial
+
+
+def find_missing_libraries(client, library_names):
+    library_names = sorted(library_names)
+    exists = client.map_concurrently(client.library_exists, library_names)
+    return {library_name for library_name, library_exists in zip(library_names, exists) if not library_exists}
+
+
+def refresh_indexed_releases(library_names):
+    """
+    Releases are refreshed only for libraries which have been looked up already, others are indexed on demand.
+    Metadata is fetched concurrently, whereas database is updated in the current thread.
+    """
+    client = pypi_client.get_client()
+    for library_names_batch in split_into_batches(sorted(library_names)):
+        indexed_libraries = list(models.CachedRepositoryPythonLibrary.objects.filter(
+            name__in=library_names_batch, releases_indexed_at__isnull=False))
+        responses = client.map_concurrently(fetch_library_info, indexed_libraries)
+        for library, response in zip(indexed_libraries, responses):
+            if response is not None:
+                pip_service.apply_library_info(library.name, library, response)
+
+
+def fetch_library_info(library):
+    try:
+        return pypi_client.get_client().get_library_info(library.name, pip_service.get_releases_etag(library))
+    except requests.RequestException:
+        logger.warning('Could not refresh releases of "%s" python library.', library.name, exc_info=True)
+        return None
+
+
+def persist_new_libraries(library_names):
+    max_name_length = models.CachedRepositoryPythonLibrary._meta.get_field('name').max_length
+    valid_library_names = []
+    for library_name in library_names:
+        if len(library_name) > max_name_length:
+            logger.warning('Pip backend could not save "%s" python library: name is too long.', library_name)
+        else:
+            valid_library_names.append(library_name)
+
+    for library_names_batch in split_into_batches(sorted(valid_library_names)):
+        try:
+            with transaction.atomic():
+                models.CachedRepositoryPythonLibrary.objects.bulk_create(
+                    models.CachedRepositoryPythonLibrary(
+                        name=library_name, normalized_name=models.CachedRepositoryPythonLibrary.normalize_name(library_name))
+                    for library_name in library_names_batch)
+        except IntegrityError:
+            # library could have been created by versions lookup in the meantime
+            for library_name in library_names_batch:
+                models.CachedRepositoryPythonLibrary.objects.get_or_create(
+                    normalized_name=models.CachedRepositoryPythonLibrary.normalize_name(library_name),
+                    defaults={'name': library_name})
+
+
+def delete_removed_libraries(library_names):
+    for library_names_batch in split_into_batches(sorted(library_names)):
+        models.CachedRepositoryPythonLibrary.objects.filter(name__in=library_names_batch).delete()
+
+
+def split_into_batches(items):
+    batch_size = settings.WALDUR_PYTHON_MANAGEMENT.get('SYNC_PIP_PACKAGES_BATCH_SIZE', 300)
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size]
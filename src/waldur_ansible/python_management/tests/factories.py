@@ -51,6 +51,14 @@ class PythonManagementSynchronizeRequestFactory(factory.DjangoModelFactory):
     virtual_env_name = factory.Sequence(lambda n: n)
 
 
+class PythonManagementFindVirtualEnvsRequestFactory(factory.DjangoModelFactory):
+    class Meta(object):
+        model = models.PythonManagementFindVirtualEnvsRequest
+
+    python_management = factory.SubFactory(PythonManagementFactory)
+    output = factory.Sequence(lambda n: n)
+
+
 class VirtualEnvironmentFactory(factory.DjangoModelFactory):
     class Meta(object):
         model = models.VirtualEnvironment
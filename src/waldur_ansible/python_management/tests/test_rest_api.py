@@ -2,11 +2,15 @@ from __future__ import unicode_literals
 
 import uuid
 
+import mock
 from ddt import data, ddt
+from django.test import override_settings
 from rest_framework import status
 from rest_framework.test import APITransactionTestCase
 from waldur_openstack.openstack_tenant.tests import factories as openstack_factories
 
+from waldur_ansible.jupyter_hub_management.tests import factories as jupyter_hub_factories
+
 from . import factories, fixtures
 
 
@@ -59,3 +63,89 @@ class PythonManagementCreateTest(PythonManagementBaseTest):
         response = self.client.post(factories.PythonManagementFactory.get_list_url(), data=payload)
 
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class PythonManagementRequestOutputTest(PythonManagementBaseTest):
+    def setUp(self):
+        super(PythonManagementRequestOutputTest, self).setUp()
+        self.request = factories.PythonManagementSynchronizeRequestFactory(
+            python_management=self.python_management, virtual_env_name='virtual-env', output='header\n')
+        self.request.output_chunks.create(sequence=1, content='first\n')
+        self.request.output_chunks.create(sequence=2, content='second\n')
+        self.url = factories.PythonManagementFactory.get_url(
+            self.python_management, action='requests/%s/output' % self.request.uuid.hex)
+        self.client.force_authenticate(self.fixture.staff)
+
+    def test_whole_output_is_returned_if_cursor_is_not_specified(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['output'], 'header\nfirst\nsecond\n')
+        self.assertEqual(response.data['cursor'], 2)
+
+    def test_only_output_appended_after_cursor_is_returned(self):
+        response = self.client.get(self.url, {'cursor': 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['output'], 'second\n')
+        self.assertEqual(response.data['cursor'], 2)
+
+    def test_cursor_is_not_moved_if_there_is_no_new_output(self):
+        response = self.client.get(self.url, {'cursor': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['output'], '')
+        self.assertEqual(response.data['cursor'], 2)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.url, {'cursor': 'abc'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @mock.patch('waldur_ansible.common.output_readers.time')
+    def test_client_is_not_blocked_if_long_polling_is_disabled(self, mocked_time):
+        mocked_time.time.return_value = 0
+
+        response = self.client.get(self.url, {'cursor': 2, 'wait': 30})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mocked_time.sleep.assert_not_called()
+
+    @override_settings(WALDUR_ANSIBLE_COMMON={'OUTPUT_LONG_POLL_MAX_WAIT': 5, 'OUTPUT_LONG_POLL_INTERVAL': 1})
+    @mock.patch('waldur_ansible.common.output_readers.time')
+    def test_client_waits_for_new_output_if_long_polling_is_enabled(self, mocked_time):
+        mocked_time.time.side_effect = [0, 1, 5]
+
+        response = self.client.get(self.url, {'cursor': 2, 'wait': 30})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['output'], '')
+        mocked_time.sleep.assert_called_once_with(1)
+
+
+class PythonManagementValidForJupyterHubTest(PythonManagementBaseTest):
+    def setUp(self):
+        super(PythonManagementValidForJupyterHubTest, self).setUp()
+        self.client.force_authenticate(self.fixture.staff)
+        self.url = factories.PythonManagementFactory.get_list_url() + 'validForJupyterHub/'
+
+    def test_python_managements_with_jupyter_hub_are_excluded(self):
+        python_management_with_jupyter_hub = factories.PythonManagementFactory(
+            project=self.fixture.project, instance=self.fixture.instance, virtual_envs_dir_path='other-virtual-envs')
+        jupyter_hub_factories.JupyterHubManagementFactory(python_management=python_management_with_jupyter_hub)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['uuid'] for item in response.data], [self.python_management.uuid.hex])
+        self.assertEqual(response.data[0]['instance']['name'], self.fixture.instance.name)
+
+    def test_pagination_is_applied_to_filtered_python_managements(self):
+        python_management_with_jupyter_hub = factories.PythonManagementFactory(
+            project=self.fixture.project, instance=self.fixture.instance, virtual_envs_dir_path='other-virtual-envs')
+        jupyter_hub_factories.JupyterHubManagementFactory(python_management=python_management_with_jupyter_hub)
+
+        response = self.client.get(self.url, {'page_size': 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Result-Count'], '1')
@@ -0,0 +1,65 @@
+from django.test import TestCase
+
+from waldur_core.core import models as core_models
+from waldur_ansible.python_management.tests import factories
+
+States = core_models.StateMixin.States
+
+
+class PythonManagementAggregateStateTest(TestCase):
+    def setUp(self):
+        self.python_management = factories.PythonManagementFactory()
+
+    def create_request(self):
+        return factories.PythonManagementSynchronizeRequestFactory(python_management=self.python_management)
+
+    def assert_aggregate_state(self, state):
+        self.python_management.refresh_from_db()
+        self.assertEqual(self.python_management.aggregate_state, state)
+
+    def test_state_is_ok_if_there_are_no_requests(self):
+        self.assert_aggregate_state(States.OK)
+
+    def test_state_is_scheduled_when_request_is_created(self):
+        self.create_request()
+
+        self.assert_aggregate_state(States.CREATION_SCHEDULED)
+        self.assertEqual(self.python_management.scheduled_requests_count, 1)
+
+    def test_state_is_creating_while_any_request_is_processed(self):
+        self.create_request()
+        request = self.create_request()
+
+        request.begin_creating()
+        request.save()
+
+        self.assert_aggregate_state(States.CREATING)
+        self.assertEqual(self.python_management.scheduled_requests_count, 1)
+        self.assertEqual(self.python_management.creating_requests_count, 1)
+
+    def test_state_is_erred_when_request_fails(self):
+        successful_request = self.create_request()
+        failed_request = self.create_request()
+        successful_request.begin_creating()
+        failed_request.begin_creating()
+
+        failed_request.set_erred()
+        self.assert_aggregate_state(States.CREATING)
+
+        successful_request.set_ok()
+        self.assert_aggregate_state(States.ERRED)
+        self.assertEqual(self.python_management.creating_requests_count, 0)
+        self.assertEqual(self.python_management.erred_requests_count, 1)
+
+    def test_errors_are_reset_when_new_requests_group_is_started(self):
+        failed_request = self.create_request()
+        failed_request.begin_creating()
+        failed_request.set_erred()
+        self.assert_aggregate_state(States.ERRED)
+
+        request = self.create_request()
+        request.begin_creating()
+        request.set_ok()
+
+        self.assert_aggregate_state(States.OK)
+        self.assertEqual(self.python_management.erred_requests_count, 0)
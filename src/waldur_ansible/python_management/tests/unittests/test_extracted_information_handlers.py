@@ -0,0 +1,99 @@
+from django.test import TestCase, override_settings
+from mock import patch
+from waldur_ansible.python_management import models
+from waldur_ansible.python_management.backend import extracted_information_handlers, output_lines_post_processors
+from waldur_ansible.python_management.tests import factories, fixtures
+
+
+class InstalledLibrariesExtractedInformationHandlerTest(TestCase):
+    def setUp(self):
+        self.fixture = fixtures.PythonManagementFixture()
+        self.handler = extracted_information_handlers.InstalledLibrariesExtractedInformationHandler()
+
+    def test_installed_libraries_are_synchronized(self):
+        virtual_env = factories.VirtualEnvironmentFactory(name='virtual-env', python_management=self.fixture.python_management)
+        factories.InstalledLibraryFactory(name='removed', version='1', virtual_environment=virtual_env)
+        factories.InstalledLibraryFactory(name='kept', version='1', virtual_environment=virtual_env)
+        factories.InstalledLibraryFactory(name='upgraded', version='1', virtual_environment=virtual_env)
+        existing_packages = [
+            output_lines_post_processors.LibraryDs(name='kept', version='1'),
+            output_lines_post_processors.LibraryDs(name='upgraded', version='2'),
+            output_lines_post_processors.LibraryDs(name='installed', version='1'),
+        ]
+
+        self.handler.persist_installed_libraries_in_db(self.fixture.python_management, 'virtual-env', existing_packages)
+
+        self.assertEqual(
+            set(virtual_env.installed_libraries.values_list('name', 'version')),
+            {('kept', '1'), ('upgraded', '2'), ('installed', '1')})
+
+    def test_virtual_environment_is_created_if_it_does_not_exist(self):
+        existing_packages = [output_lines_post_processors.LibraryDs(name='numpy', version='1.3')]
+
+        self.handler.persist_installed_libraries_in_db(self.fixture.python_management, 'new-virtual-env', existing_packages)
+
+        virtual_env = self.fixture.python_management.virtual_environments.get(name='new-virtual-env')
+        self.assertEqual(list(virtual_env.installed_libraries.values_list('name', 'version')), [('numpy', '1.3')])
+
+    def test_virtual_environment_is_deleted_if_there_are_no_libraries(self):
+        factories.VirtualEnvironmentFactory(name='virtual-env', python_management=self.fixture.python_management)
+
+        self.handler.persist_installed_libraries_in_db(self.fixture.python_management, 'virtual-env', [])
+
+        self.assertFalse(self.fixture.python_management.virtual_environments.filter(name='virtual-env').exists())
+
+
+class InstalledLibrariesOfVirtualEnvironmentsExtractedInformationHandlerTest(TestCase):
+    def setUp(self):
+        self.fixture = fixtures.PythonManagementFixture()
+        self.handler = extracted_information_handlers.InstalledLibrariesOfVirtualEnvironmentsExtractedInformationHandler()
+
+    def test_installed_libraries_of_all_virtual_environments_are_synchronized(self):
+        python_management = self.fixture.python_management
+        virtual_env = factories.VirtualEnvironmentFactory(name='virtual-env', python_management=python_management)
+        factories.InstalledLibraryFactory(name='removed', version='1', virtual_environment=virtual_env)
+        factories.InstalledLibraryFactory(name='kept', version='1', virtual_environment=virtual_env)
+        empty_virtual_env = factories.VirtualEnvironmentFactory(name='empty-virtual-env', python_management=python_management)
+        missing_virtual_env = factories.VirtualEnvironmentFactory(name='missing-virtual-env', python_management=python_management)
+
+        self.handler.persist_installed_libraries_in_db(python_management, {
+            'virtual-env': [output_lines_post_processors.LibraryDs(name='kept', version='1'),
+                            output_lines_post_processors.LibraryDs(name='installed', version='1')],
+            'new-virtual-env': [output_lines_post_processors.LibraryDs(name='numpy', version='1.3')],
+            'empty-virtual-env': [],
+        })
+
+        self.assertEqual(set(virtual_env.installed_libraries.values_list('name', 'version')), {('kept', '1'), ('installed', '1')})
+        new_virtual_env = python_management.virtual_environments.get(name='new-virtual-env')
+        self.assertEqual(list(new_virtual_env.installed_libraries.values_list('name', 'version')), [('numpy', '1.3')])
+        self.assertFalse(python_management.virtual_environments.filter(pk=empty_virtual_env.pk).exists())
+        self.assertTrue(python_management.virtual_environments.filter(pk=missing_virtual_env.pk).exists())
+
+
+class PythonManagementFindVirtualEnvsRequestExtractedInformationHandlerTest(TestCase):
+    def setUp(self):
+        self.fixture = fixtures.PythonManagementFixture()
+        self.request = factories.PythonManagementFindVirtualEnvsRequestFactory(python_management=self.fixture.python_management)
+        self.lines_post_processor = output_lines_post_processors.InstalledVirtualEnvironmentsOutputLinesPostProcessor()
+        self.lines_post_processor.installed_virtual_environments = ['first-virt-env', 'second-virt-env']
+
+    def find_enqueued_requests(self):
+        handler = extracted_information_handlers.PythonManagementFindVirtualEnvsRequestExtractedInformationHandler()
+        with patch('waldur_ansible.python_management.backend.queueing_service.requests_queue.enqueue') as enqueue:
+            handler.handle_extracted_information(self.request, self.lines_post_processor)
+        return [call[0][0] for call in enqueue.call_args_list]
+
+    @override_settings(WALDUR_PYTHON_MANAGEMENT={'FIND_INSTALLED_LIBRARIES_BATCH_ENABLED': False})
+    def test_libraries_are_found_by_separate_requests_if_batch_is_disabled(self):
+        enqueued_requests = self.find_enqueued_requests()
+
+        self.assertTrue(all(isinstance(request, models.PythonManagementFindInstalledLibrariesRequest) for request in enqueued_requests))
+        self.assertEqual([request.virtual_env_name for request in enqueued_requests], ['first-virt-env', 'second-virt-env'])
+
+    @override_settings(WALDUR_PYTHON_MANAGEMENT={'FIND_INSTALLED_LIBRARIES_BATCH_ENABLED': True})
+    def test_libraries_of_all_virtual_environments_are_found_by_single_request_if_batch_is_enabled(self):
+        enqueued_requests = self.find_enqueued_requests()
+
+        self.assertEqual(len(enqueued_requests), 1)
+        self.assertIsInstance(enqueued_requests[0], models.PythonManagementFindInstalledLibrariesBatchRequest)
+        self.assertEqual(enqueued_requests[0].virtual_env_names, ['first-virt-env', 'second-virt-env'])
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from waldur_ansible.python_management.backend import locking_service
+from waldur_ansible.python_management.tests import factories
+
+LockingService = locking_service.PythonManagementBackendLockingService
+
+
+@override_settings(WALDUR_ANSIBLE_COMMON={'ANSIBLE_LOCK_TIMEOUT': 60})
+class PythonManagementBackendLockingServiceTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.python_management = factories.PythonManagementFactory()
+
+    def create_sync_request(self, virtual_env_name='virtual-env'):
+        return factories.PythonManagementSynchronizeRequestFactory(
+            python_management=self.python_management, virtual_env_name=virtual_env_name)
+
+    def test_lock_is_acquired_only_once(self):
+        first_request = self.create_sync_request()
+        second_request = self.create_sync_request()
+
+        self.assertTrue(LockingService.lock_for_processing(first_request))
+        self.assertFalse(LockingService.lock_for_processing(second_request))
+        self.assertFalse(LockingService.is_processing_allowed(second_request))
+
+    def test_lock_is_not_released_by_another_request(self):
+        first_request = self.create_sync_request()
+        second_request = self.create_sync_request()
+        LockingService.lock_for_processing(first_request)
+
+        LockingService.handle_on_processing_finished(second_request)
+
+        self.assertFalse(LockingService.lock_for_processing(second_request))
+
+    def test_lock_is_released_by_owner(self):
+        first_request = self.create_sync_request()
+        second_request = self.create_sync_request()
+        LockingService.lock_for_processing(first_request)
+
+        LockingService.handle_on_processing_finished(first_request)
+
+        self.assertTrue(LockingService.lock_for_processing(second_request))
+
+    def test_virtual_env_lock_is_given_back_if_global_lock_is_held(self):
+        find_virtual_envs_request = factories.PythonManagementFindVirtualEnvsRequestFactory(
+            python_management=self.python_management)
+        sync_request = self.create_sync_request()
+        LockingService.lock_for_processing(find_virtual_envs_request)
+
+        self.assertFalse(LockingService.lock_for_processing(sync_request))
+
+        LockingService.handle_on_processing_finished(find_virtual_envs_request)
+        self.assertTrue(LockingService.lock_for_processing(sync_request))
+
+    def test_lock_is_renewed_only_by_owner(self):
+        first_request = self.create_sync_request()
+        second_request = self.create_sync_request()
+        LockingService.lock_for_processing(first_request)
+
+        self.assertTrue(LockingService.renew_lock_for_processing(first_request))
+        self.assertFalse(LockingService.renew_lock_for_processing(second_request))
+
+    def test_expired_lock_is_not_renewed(self):
+        request = self.create_sync_request()
+        LockingService.lock_for_processing(request)
+        cache.clear()
+
+        self.assertFalse(LockingService.renew_lock_for_processing(request))
@@ -23,3 +23,29 @@ class PythonManagementServiceTest(TestCase):
 
         self.assertIn('first-virt-env', output_lines_post_processor.installed_virtual_environments)
         self.assertIn('second-virt-env', output_lines_post_processor.installed_virtual_environments)
+
+    def test_extracts_python_version(self):
+        output_lines_post_processor = output_lines_post_processors.InitializationOutputLinesPostProcessor()
+
+        output_lines_post_processor.post_process_line(output_lines_post_processors.InitializationOutputLinesPostProcessor.PYTHON_VERSION_IDENTIFYING_TASK)
+        output_lines_post_processor.post_process_line('ok: [remote_ip] => {"stdout_lines": ["Python 3.5.2"]}')
+
+        self.assertEqual(output_lines_post_processor.python_version, '3.5.2')
+
+    def test_extracts_installed_libs_of_several_virtual_envs(self):
+        post_processor_class = output_lines_post_processors.InstalledLibrariesOfVirtualEnvironmentsOutputLinesPostProcessor
+        output_lines_post_processor = post_processor_class()
+
+        for output in [
+            'TASK [%s] ***' % post_processor_class.INSTALLED_LIBRARIES_TASK,
+            'ok: [remote_ip] => (item=first-virt-env) => {"item": "first-virt-env", "stdout_lines": ["pkg-resources==0.0", "numpy==1.3"]}',
+            'ok: [remote_ip] => (item=second-virt-env) => {"item": "second-virt-env", "stdout_lines": []}',
+            'PLAY RECAP ***',
+            'ok: [remote_ip] => (item=third-virt-env) => {"item": "third-virt-env", "stdout_lines": ["scipy==1.0"]}',
+        ]:
+            output_lines_post_processor.post_process_line(output)
+
+        self.assertEqual(output_lines_post_processor.installed_libraries_by_virtual_environment, {
+            'first-virt-env': [output_lines_post_processors.LibraryDs('numpy', '1.3')],
+            'second-virt-env': [],
+        })
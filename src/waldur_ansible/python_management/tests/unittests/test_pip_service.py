@@ -0,0 +1,137 @@
+import datetime
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from mock import patch, Mock
+
+from waldur_ansible.python_management import models, pip_service
+from waldur_ansible.python_management.backend import output_lines_post_processors
+
+LIBRARY_INFO = {
+    'releases': {
+        '1.0': [{'filename': 'numpy-1.0.tar.gz', 'python_version': 'source', 'upload_time': '2017-01-01T00:00:00'}],
+        '1.1': [{'filename': 'numpy-1.1-cp36-cp36m-manylinux1_x86_64.whl', 'python_version': 'cp36', 'upload_time': '2018-01-01T00:00:00'}],
+        '1.2': [{'filename': 'numpy-1.2-cp27-cp27m-win32.whl', 'python_version': 'cp27', 'upload_time': '2019-01-01T00:00:00'}],
+        '1.3': [{'filename': 'numpy-1.3-py2-none-any.whl', 'python_version': 'py2', 'upload_time': '2019-02-01T00:00:00'}],
+        '1.4': [{'filename': 'numpy-1.4-py2.py3-none-any.whl', 'python_version': 'py2.py3', 'upload_time': '2019-03-01T00:00:00'}],
+    }
+}
+
+
+def build_response(status_code=200, json=None, etag='"etag"'):
+    return Mock(status_code=status_code, headers={'ETag': etag}, json=Mock(return_value=json))
+
+
+@override_settings(WALDUR_PYTHON_MANAGEMENT={'PYPI_METADATA_CACHE_TTL': 60})
+class FindVersionsTest(TestCase):
+    def setUp(self):
+        self.client_patcher = patch('waldur_ansible.python_management.pip_service.pypi_client.get_client')
+        self.get_library_info = self.client_patcher.start().return_value.get_library_info
+        self.get_library_info.return_value = build_response(json=LIBRARY_INFO)
+
+    def tearDown(self):
+        self.client_patcher.stop()
+
+    def test_compatible_versions_are_sorted_by_upload_time(self):
+        self.assertEqual(pip_service.find_versions('numpy', '3.6.5'), ['1.4', '1.1', '1.0'])
+        self.assertEqual(pip_service.find_versions('numpy', '2.7'), ['1.4', '1.3', '1.0'])
+
+    def test_releases_compatibility_is_indexed(self):
+        pip_service.find_versions('numpy', '3')
+
+        release = models.CachedRepositoryPythonLibraryRelease.objects.get(library__name='numpy', version='1.1')
+        self.assertEqual(set(release.compatible_python_versions.values_list('python_version', flat=True)), {'3.6'})
+        self.assertFalse(models.CachedRepositoryPythonLibraryRelease.objects.filter(version='1.2').exists())
+
+    def test_fresh_releases_are_served_from_index(self):
+        pip_service.find_versions('numpy', '3.6.5')
+        pip_service.find_versions('numpy', '3')
+
+        self.get_library_info.assert_called_once()
+
+    def test_stale_releases_are_revalidated_with_etag(self):
+        pip_service.find_versions('numpy', '3.6.5')
+        self.get_library_info.return_value = build_response(status_code=304)
+
+        with patch('waldur_ansible.python_management.pip_service.timezone.now',
+                   return_value=timezone.now() + datetime.timedelta(minutes=2)):
+            versions = pip_service.find_versions('numpy', '3.6.5')
+
+        self.assertEqual(versions, ['1.4', '1.1', '1.0'])
+        self.get_library_info.assert_called_with('numpy', '"etag"')
+
+    def test_release_for_other_minor_version_is_not_compatible(self):
+        self.get_library_info.return_value = build_response(json={'releases': {
+            '1.0': [{'filename': 'scipy-1.0-cp35-cp35m-manylinux1_x86_64.whl', 'python_version': 'cp35', 'upload_time': '2018-01-01T00:00:00'}],
+            '1.1': [{'filename': 'scipy-1.1-py3-none-any.whl', 'python_version': 'py3', 'upload_time': '2019-01-01T00:00:00'}],
+        }})
+
+        self.assertEqual(pip_service.find_versions('scipy', '3.8.1'), ['1.1'])
+        self.assertEqual(pip_service.find_versions('scipy', '3.5.2'), ['1.1', '1.0'])
+
+    def test_library_is_looked_up_by_normalized_name(self):
+        pip_service.find_versions('numpy', '3.6.5')
+
+        self.assertEqual(pip_service.find_versions('NumPy', '3.6.5'), ['1.4', '1.1', '1.0'])
+        self.get_library_info.assert_called_once()
+        self.assertEqual(models.CachedRepositoryPythonLibrary.objects.count(), 1)
+
+    def test_versions_are_found_for_python_version_identified_by_initialization(self):
+        post_processor = output_lines_post_processors.InitializationOutputLinesPostProcessor()
+        post_processor.post_process_line(post_processor.PYTHON_VERSION_IDENTIFYING_TASK)
+        post_processor.post_process_line('ok: [remote_ip] => {"stdout_lines": ["Python 3.6.5"]}')
+
+        self.assertEqual(pip_service.find_versions('numpy', post_processor.python_version), ['1.4', '1.1', '1.0'])
+        self.assertEqual(pip_service.find_versions('numpy', ' 3.6.5'), ['1.4', '1.1', '1.0'])
+
+    def test_index_built_by_concurrent_lookup_is_not_rebuilt(self):
+        library = models.CachedRepositoryPythonLibrary.objects.create(name='numpy')
+        pip_service.find_versions('numpy', '3.6.5')
+        release_ids = set(models.CachedRepositoryPythonLibraryRelease.objects.values_list('id', flat=True))
+
+        indexed_library = pip_service.index_library_releases('numpy', library, LIBRARY_INFO, '"etag"')
+
+        self.assertEqual(indexed_library.pk, library.pk)
+        self.assertEqual(set(models.CachedRepositoryPythonLibraryRelease.objects.values_list('id', flat=True)), release_ids)
+
+    def test_library_created_by_concurrent_lookup_is_reused(self):
+        pip_service.find_versions('numpy', '3.6.5')
+
+        pip_service.index_library_releases('NumPy', None, LIBRARY_INFO, '"etag"')
+
+        self.assertEqual(models.CachedRepositoryPythonLibrary.objects.filter(normalized_name='numpy').count(), 1)
+        self.assertEqual(pip_service.find_versions('numpy', '3.6.5'), ['1.4', '1.1', '1.0'])
+
+    def test_unknown_library_has_no_versions(self):
+        self.get_library_info.return_value = build_response(status_code=404)
+
+        self.assertEqual(pip_service.find_versions('unknown', '3'), [])
+
+
+class AutocompleteLibraryNameTest(TestCase):
+    def setUp(self):
+        for name, popularity in (('Django', 5), ('django_filter', 10), ('django-rest', 0), ('numpy', 100)):
+            models.CachedRepositoryPythonLibrary.objects.create(name=name, popularity=popularity)
+
+    def get_suggested_names(self, query):
+        return [library.name for library in pip_service.autocomplete_library_name(query)]
+
+    def test_lookup_is_case_insensitive_and_ranked_by_popularity(self):
+        self.assertEqual(self.get_suggested_names('DJANGO'), ['django_filter', 'Django', 'django-rest'])
+
+    def test_separators_are_normalized(self):
+        self.assertEqual(self.get_suggested_names('django.f'), ['django_filter'])
+
+    @override_settings(WALDUR_PYTHON_MANAGEMENT={'AUTOCOMPLETE_SNAPSHOT_ENABLED': True, 'AUTOCOMPLETE_RESULTS_LIMIT': 2})
+    def test_snapshot_returns_same_suggestions(self):
+        pip_service.library_names_snapshot.loaded_at = None
+
+        self.assertEqual(self.get_suggested_names('django'), ['django_filter', 'Django'])
+
+    def test_version_lookup_increases_popularity(self):
+        library = models.CachedRepositoryPythonLibrary.objects.get(name='numpy')
+
+        pip_service.increase_popularity(library)
+
+        library.refresh_from_db()
+        self.assertEqual(library.popularity, 101)
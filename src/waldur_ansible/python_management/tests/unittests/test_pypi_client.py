@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+
+from django.test import SimpleTestCase, override_settings
+from six.moves import BaseHTTPServer, socketserver
+
+from waldur_ansible.python_management import pypi_client
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class FakePyPIHTTPAPI(object):
+    """
+    Local stand-in for PyPI JSON and Simple APIs, which fails predefined number of requests with 503 status code.
+    """
+
+    def __init__(self, failures_count=0, response_delay=0):
+        self.failures_count = failures_count
+        self.response_delay = response_delay
+        self.requests_count = 0
+        self.concurrent_requests = 0
+        self.max_concurrent_requests = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.build_handler_class())
+
+    def build_handler_class(self):
+        fake_api = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            def do_GET(self):
+                with fake_api.lock:
+                    fake_api.requests_count += 1
+                    fake_api.concurrent_requests += 1
+                    fake_api.max_concurrent_requests = max(fake_api.max_concurrent_requests, fake_api.concurrent_requests)
+                    should_fail = fake_api.requests_count <= fake_api.failures_count
+                time.sleep(fake_api.response_delay)
+
+                if should_fail:
+                    self.send_response(503)
+                    self.end_headers()
+                elif self.path.startswith('/simple/'):
+                    self.send_body('<html><body><a href="/simple/numpy/">numpy</a>\n<a href="/simple/scipy/">scipy</a></body></html>')
+                elif self.headers.get('If-None-Match') == '"etag"':
+                    self.send_response(304)
+                    self.end_headers()
+                else:
+                    self.send_body(json.dumps({'releases': {}}), etag='"etag"')
+
+                with fake_api.lock:
+                    fake_api.concurrent_requests -= 1
+
+            def send_body(self, body, etag=None):
+                body = body.encode('utf-8')
+                self.send_response(200)
+                if etag:
+                    self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @property
+    def url(self):
+        return 'http://%s:%s/' % self.server.server_address
+
+    def build_client(self):
+        with override_settings(WALDUR_PYTHON_MANAGEMENT={
+            'PYPI_JSON_API_URL': self.url + 'pypi/',
+            'PYPI_SIMPLE_API_URL': self.url + 'simple/',
+            'PYPI_XMLRPC_API_URL': '',
+            'PYPI_RETRY_BACKOFF': 0.01,
+            'PYPI_MAX_RETRIES': 2,
+            'PYPI_MAX_CONCURRENT_REQUESTS': 2,
+        }):
+            return pypi_client.PyPIClient()
+
+    def __enter__(self):
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class PyPIClientTest(SimpleTestCase):
+    def test_request_is_retried_if_pypi_is_unavailable(self):
+        with FakePyPIHTTPAPI(failures_count=2) as fake_api:
+            response = fake_api.build_client().get_library_info('numpy')
+
+        self.assertEqual(response.json(), {'releases': {}})
+        self.assertEqual(fake_api.requests_count, 3)
+
+    def test_last_response_is_returned_if_retries_are_exhausted(self):
+        with FakePyPIHTTPAPI(failures_count=5) as fake_api:
+            with self.assertRaises(pypi_client.requests.HTTPError):
+                fake_api.build_client().get_library_info('numpy')
+
+        self.assertEqual(fake_api.requests_count, 3)
+
+    def test_etag_is_sent_for_revalidation(self):
+        with FakePyPIHTTPAPI() as fake_api:
+            response = fake_api.build_client().get_library_info('numpy', etag='"etag"')
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_concurrent_requests_are_bounded(self):
+        with FakePyPIHTTPAPI(response_delay=0.05) as fake_api:
+            client = fake_api.build_client()
+            responses = client.map_concurrently(client.get_library_info, ['library%s' % i for i in range(6)])
+
+        self.assertEqual([response.status_code for response in responses], [200] * 6)
+        self.assertLessEqual(fake_api.max_concurrent_requests, 2)
+
+    def test_xmlrpc_proxy_is_reused_until_settings_are_changed(self):
+        with override_settings(WALDUR_PYTHON_MANAGEMENT={'PYPI_XMLRPC_API_URL': 'https://pypi.example.com/pypi'}):
+            client = pypi_client.get_client()
+            proxy = client.get_xmlrpc_proxy()
+
+            self.assertIs(client.get_xmlrpc_proxy(), proxy)
+
+        self.assertIsNot(pypi_client.get_client().get_xmlrpc_proxy(), proxy)
+
+    def test_packages_are_listed_using_simple_api_if_xmlrpc_is_not_available(self):
+        with FakePyPIHTTPAPI() as fake_api:
+            client = fake_api.build_client()
+            packages = client.list_packages()
+
+        self.assertFalse(client.is_changelog_supported())
+        self.assertEqual(packages, ['numpy', 'scipy'])
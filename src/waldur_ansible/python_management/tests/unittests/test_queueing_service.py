@@ -0,0 +1,192 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from mock import patch
+
+from waldur_core.core import models as core_models
+from waldur_ansible.common import request_queue
+from waldur_ansible.python_management import models
+from waldur_ansible.python_management.backend import queueing_service
+from waldur_ansible.python_management.tests import factories
+
+States = core_models.StateMixin.States
+
+
+class PythonManagementRequestsQueueTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.python_management = factories.PythonManagementFactory()
+        self.queue = queueing_service.requests_queue
+        patcher = patch('waldur_ansible.python_management.backend.queueing_service.executors.PythonManagementRequestExecutor.execute')
+        self.execute = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def enqueue(self, request):
+        request = self.queue.enqueue(request)
+        # requests are dispatched once transaction is committed, which never happens in the test case
+        request_queue.dispatch()
+        return request
+
+    def enqueue_sync_request(self, virtual_env_name='virtual-env', python_management=None, **kwargs):
+        return self.enqueue(models.PythonManagementSynchronizeRequest(
+            python_management=python_management or self.python_management, virtual_env_name=virtual_env_name, **kwargs))
+
+    def finish(self, request, state=States.OK):
+        request.begin_creating()
+        if state == States.OK:
+            request.set_ok()
+        else:
+            request.set_erred()
+        request.save()
+        request_queue.dispatch()
+
+    def assert_queued(self, request, queued=True):
+        request.refresh_from_db()
+        self.assertEqual(request.queued, queued)
+
+    def test_request_is_started_if_nothing_is_processed(self):
+        request = self.enqueue_sync_request()
+
+        self.assert_queued(request, False)
+        self.execute.assert_called_once_with(request, async=True)
+
+    def test_request_waits_for_conflicting_request(self):
+        first_request = self.enqueue_sync_request()
+        second_request = self.enqueue_sync_request()
+
+        self.assert_queued(second_request)
+
+        self.finish(first_request)
+        self.assert_queued(second_request, False)
+
+    def test_requests_for_different_virtual_envs_are_started_concurrently(self):
+        self.enqueue_sync_request('first-env')
+        request = self.enqueue_sync_request('second-env')
+
+        self.assert_queued(request, False)
+
+    def test_request_does_not_overtake_earlier_conflicting_request(self):
+        first_request = self.enqueue_sync_request('first-env')
+        find_virtual_envs_request = self.enqueue(models.PythonManagementFindVirtualEnvsRequest(python_management=self.python_management))
+        other_env_request = self.enqueue_sync_request('second-env')
+
+        self.assert_queued(find_virtual_envs_request)
+        self.assert_queued(other_env_request)
+
+        self.finish(first_request)
+        self.assert_queued(find_virtual_envs_request, False)
+        self.assert_queued(other_env_request)
+
+    def test_lost_request_does_not_block_queue(self):
+        lost_request = self.enqueue_sync_request()
+        models.PythonManagementSynchronizeRequest.objects.filter(pk=lost_request.pk).update(
+            state=States.CREATING, modified=timezone.now() - datetime.timedelta(days=1))
+        request = self.enqueue_sync_request()
+
+        self.assert_queued(request, False)
+
+    @override_settings(WALDUR_ANSIBLE_COMMON={'MAX_CONCURRENT_REQUESTS_PER_INSTANCE': 2})
+    def test_requests_to_the_same_instance_are_limited(self):
+        requests = [self.enqueue_sync_request('env-%s' % i) for i in range(3)]
+        other_instance_request = self.enqueue_sync_request(python_management=factories.PythonManagementFactory())
+
+        self.assert_queued(requests[2])
+        self.assert_queued(other_instance_request, False)
+
+        self.finish(requests[0])
+        self.assert_queued(requests[2], False)
+
+    @override_settings(WALDUR_ANSIBLE_COMMON={'MAX_CONCURRENT_REQUESTS': 1})
+    def test_requests_are_limited_globally(self):
+        first_request = self.enqueue_sync_request()
+        other_instance_request = self.enqueue_sync_request(python_management=factories.PythonManagementFactory())
+
+        self.assert_queued(other_instance_request)
+
+        self.finish(first_request)
+        self.assert_queued(other_instance_request, False)
+
+    def test_synchronization_requests_are_started_after_initialization(self):
+        initialization_request = self.enqueue(models.PythonManagementInitializeRequest(python_management=self.python_management))
+        sync_request = factories.PythonManagementSynchronizeRequestFactory(
+            python_management=self.python_management, initialization_request=initialization_request, queued=True)
+        request_queue.dispatch()
+
+        self.assert_queued(sync_request)
+
+        self.finish(initialization_request)
+        self.assert_queued(sync_request, False)
+
+    def test_synchronization_requests_are_erred_if_initialization_fails(self):
+        initialization_request = self.enqueue(models.PythonManagementInitializeRequest(python_management=self.python_management))
+        sync_request = factories.PythonManagementSynchronizeRequestFactory(
+            python_management=self.python_management, initialization_request=initialization_request, queued=True)
+
+        self.finish(initialization_request, States.ERRED)
+
+        sync_request.refresh_from_db()
+        self.assertEqual(sync_request.state, States.ERRED)
+
+    def test_synchronization_requests_of_the_same_virtual_env_are_merged_while_queued(self):
+        self.enqueue_sync_request()
+        queued_request = self.enqueue_sync_request(libraries_to_install=[library('numpy', '1.3')])
+        merged_request = self.enqueue_sync_request(libraries_to_install=[library('scipy', '1.0')])
+
+        self.assertEqual(merged_request.pk, queued_request.pk)
+        queued_request.refresh_from_db()
+        self.assertEqual(queued_request.libraries_to_install, [library('numpy', '1.3'), library('scipy', '1.0')])
+        self.assertEqual(models.PythonManagementSynchronizeRequest.objects.count(), 2)
+
+    def test_synchronization_request_is_not_merged_into_started_request(self):
+        started_request = self.enqueue_sync_request()
+        request = self.enqueue_sync_request()
+
+        self.assertNotEqual(started_request.pk, request.pk)
+
+    def test_synchronization_request_is_not_merged_ahead_of_conflicting_request(self):
+        self.enqueue_sync_request()
+        queued_request = self.enqueue_sync_request()
+        self.enqueue(models.PythonManagementDeleteVirtualEnvRequest(
+            python_management=self.python_management, virtual_env_name='virtual-env'))
+        request = self.enqueue_sync_request()
+
+        self.assertNotEqual(queued_request.pk, request.pk)
+        self.assert_queued(request)
+
+
+def library(name, version):
+    return {'name': name, 'version': version}
+
+
+class MergeSynchronizationRequestsTest(TestCase):
+    def merge(self, pending_changes, changes):
+        pending_request = models.PythonManagementSynchronizeRequest(
+            libraries_to_install=pending_changes[0], libraries_to_remove=pending_changes[1])
+        request = models.PythonManagementSynchronizeRequest(libraries_to_install=changes[0], libraries_to_remove=changes[1])
+        queueing_service.merge_synchronization_requests(pending_request, request)
+        return pending_request.libraries_to_install, pending_request.libraries_to_remove
+
+    def test_independent_changes_are_combined(self):
+        self.assertEqual(
+            self.merge(([library('numpy', '1.3')], []), ([], [library('scipy', '1.0')])),
+            ([library('numpy', '1.3')], [library('scipy', '1.0')]))
+
+    def test_installation_is_cancelled_by_removal(self):
+        self.assertEqual(self.merge(([library('numpy', '1.3')], []), ([], [library('numpy', '1.3')])), ([], []))
+
+    def test_removal_is_cancelled_by_installation(self):
+        self.assertEqual(self.merge(([], [library('numpy', '1.3')]), ([library('numpy', '1.3')], [])), ([], []))
+
+    def test_latest_version_wins(self):
+        self.assertEqual(
+            self.merge(([library('numpy', '1.4')], [library('numpy', '1.3')]),
+                       ([library('numpy', '1.5')], [library('numpy', '1.4')])),
+            ([library('numpy', '1.5')], [library('numpy', '1.3')]))
+
+    def test_upgrade_revert_results_in_no_changes(self):
+        self.assertEqual(
+            self.merge(([library('numpy', '1.4')], [library('numpy', '1.3')]),
+                       ([library('numpy', '1.3')], [library('numpy', '1.4')])),
+            ([], []))
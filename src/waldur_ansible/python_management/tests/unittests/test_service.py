@@ -1,13 +1,20 @@
+from django.core.cache import cache
 from django.test import TestCase
 from mock import patch
-from rest_framework.exceptions import APIException
-from waldur_ansible.python_management import python_management_service
+from waldur_ansible.python_management import models, python_management_service
 from waldur_ansible.python_management.tests import factories, fixtures
 
 
 class PythonManagementServiceTest(TestCase):
+    executor_path = 'waldur_ansible.python_management.backend.queueing_service.executors.PythonManagementRequestExecutor.execute'
+
     def setUp(self):
         self.fixture = fixtures.PythonManagementFixture()
+        cache.clear()
+        # requests are dispatched once transaction is committed, which never happens in the test case
+        patcher = patch('waldur_ansible.common.request_queue.transaction.on_commit', side_effect=lambda callback: callback())
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
     def test_identifies_removed_virtual_envs(self):
         virtual_env = factories.VirtualEnvironmentFactory(name='first-virt-env', python_management=self.fixture.python_management)
@@ -55,75 +62,98 @@ class PythonManagementServiceTest(TestCase):
 
         self.assertIn(new_virtual_env, created_virtual_envs)
 
-    def test_identifies_blocked_requests(self):
-        sync_request = factories.PythonManagementSynchronizeRequestFactory(
+    def test_blocked_requests_are_queued(self):
+        factories.PythonManagementSynchronizeRequestFactory(
+            python_management=self.fixture.python_management, virtual_env_name='virtual-env')
+        sync_request = models.PythonManagementSynchronizeRequest(
             python_management=self.fixture.python_management, virtual_env_name='virtual-env')
 
-        with patch(
-                'waldur_ansible.python_management.python_management_service.locking_service.PythonManagementBackendLockingService.is_processing_allowed') as mocked_locking_service, \
-                patch('waldur_ansible.python_management.python_management_service.executors.PythonManagementRequestExecutor.execute') as executor:
-            mocked_locking_service.return_value = False
-
-            python_management_service.PythonManagementService().create_or_refuse_request(sync_request)
-
-            executor.assert_not_called()
-
-    def returns_true(self, lock_value):
-        return True
+        with patch(self.executor_path) as execute:
+            python_management_service.PythonManagementService().requests_queue.enqueue(sync_request)
 
-    def returns_false(self, lock_value):
-        return False
+            execute.assert_not_called()
+            self.assertTrue(sync_request.queued)
 
-    def test_removal_not_possible_to_process_if_is_processing(self):
+    def test_environments_reconciliation_does_not_query_libraries_per_environment(self):
+        virtual_envs_count, libraries_count = 100, 500
+        transient_virtual_envs = []
+        persisted_libraries = []
+        for virtual_env_index in range(virtual_envs_count):
+            virtual_env = factories.VirtualEnvironmentFactory(
+                name='virtual-env-%s' % virtual_env_index, python_management=self.fixture.python_management)
+            persisted_libraries.extend(
+                models.InstalledLibrary(name='lib%s' % i, version='1', virtual_environment=virtual_env) for i in range(libraries_count))
+            transient_libs = [self.transient_lib('lib%s' % i, '2' if i == 0 else '1') for i in range(libraries_count)]
+            transient_virtual_envs.append(self.transient_virtual_env(virtual_env.name, transient_libs))
+        models.InstalledLibrary.objects.bulk_create(persisted_libraries)
+
+        service = python_management_service.PythonManagementService()
+        persisted_virtual_envs = service.get_persisted_virtual_environments(self.fixture.python_management)
+        # environments and their libraries are fetched with one query each regardless of their number
+        with self.assertNumQueries(2):
+            created_virtual_envs, changed_virtual_envs, removed_virtual_envs = service.identify_changed_created_removed_envs(
+                transient_virtual_envs, persisted_virtual_envs)
+
+        self.assertEqual(created_virtual_envs, [])
+        self.assertEqual(removed_virtual_envs, [])
+        self.assertEqual(len(changed_virtual_envs), virtual_envs_count)
+        for changed_virtual_env in changed_virtual_envs:
+            self.assertEqual(changed_virtual_env['libraries_to_install'], [self.transient_lib('lib0', '2')])
+            self.assertEqual(changed_virtual_env['libraries_to_remove'], [self.transient_lib('lib0', '1')])
+
+    def test_removal_is_queued_if_is_processing(self):
         python_management = self.fixture.python_management
-        with patch('waldur_ansible.python_management.python_management_service.locking_service.PythonManagementBackendLockingService.is_processing_allowed',
-                   side_effect=self.returns_false):
-            self.assertRaises(APIException, lambda: python_management_service.PythonManagementService().schedule_python_management_removal(python_management))
+        factories.PythonManagementSynchronizeRequestFactory(python_management=python_management)
+        with patch(self.executor_path) as execute:
+            python_management_service.PythonManagementService().schedule_python_management_removal(python_management)
+
+            execute.assert_not_called()
+            self.assertTrue(models.PythonManagementDeleteRequest.objects.get(python_management=python_management).queued)
 
     def test_removal_possible_when_not_processing(self):
         python_management = self.fixture.python_management
-        with patch('waldur_ansible.python_management.python_management_service.executors.PythonManagementRequestExecutor.execute') as execute:
+        with patch(self.executor_path) as execute:
             python_management_service.PythonManagementService().schedule_python_management_removal(python_management)
             execute.assert_called_once()
 
-    def test_virtual_env_search_not_possible_to_process_if_is_processing(self):
+    def test_virtual_env_search_is_queued_if_is_processing(self):
         python_management = self.fixture.python_management
-        with patch('waldur_ansible.python_management.python_management_service.locking_service.PythonManagementBackendLockingService.is_processing_allowed',
-                   side_effect=self.returns_false):
-            self.assertRaises(APIException, lambda: python_management_service.PythonManagementService().schedule_virtual_environments_search(python_management))
+        factories.PythonManagementSynchronizeRequestFactory(python_management=python_management)
+        with patch(self.executor_path) as execute:
+            python_management_service.PythonManagementService().schedule_virtual_environments_search(python_management)
+
+            execute.assert_not_called()
+            self.assertTrue(models.PythonManagementFindVirtualEnvsRequest.objects.get(python_management=python_management).queued)
 
     def test_virtual_env_search_possible_when_not_processing(self):
         python_management = self.fixture.python_management
-        with patch('waldur_ansible.python_management.python_management_service.executors.PythonManagementRequestExecutor.execute') as execute:
+        with patch(self.executor_path) as execute:
             python_management_service.PythonManagementService().schedule_virtual_environments_search(python_management)
             execute.assert_called_once()
 
-    def test_installed_libs_search_not_possible_to_process_if_is_processing(self):
+    def test_installed_libs_search_is_queued_if_is_processing(self):
         python_management = self.fixture.python_management
         virtual_env_name = 'oh-my-env'
-        with patch('waldur_ansible.python_management.python_management_service.locking_service.PythonManagementBackendLockingService.is_processing_allowed',
-                   side_effect=self.returns_false):
-            self.assertRaises(APIException, lambda: python_management_service.PythonManagementService().schedule_installed_libraries_search(python_management, virtual_env_name))
+        factories.PythonManagementSynchronizeRequestFactory(python_management=python_management, virtual_env_name=virtual_env_name)
+        with patch(self.executor_path) as execute:
+            python_management_service.PythonManagementService().schedule_installed_libraries_search(python_management, virtual_env_name)
+
+            execute.assert_not_called()
 
     def test_installed_libs_search_possible_when_not_processing(self):
         python_management = self.fixture.python_management
         virtual_env_name = 'oh-my-env'
-        with patch('waldur_ansible.python_management.python_management_service.executors.PythonManagementRequestExecutor.execute') as execute:
+        with patch(self.executor_path) as execute:
             python_management_service.PythonManagementService().schedule_installed_libraries_search(python_management, virtual_env_name)
             execute.assert_called_once()
 
-    def test_update_not_possible_to_process_if_is_processing(self):
-        python_management = self.fixture.python_management
-        with patch('waldur_ansible.python_management.python_management_service.cache_utils.is_syncing', side_effect=self.returns_true):
-            self.assertRaises(APIException, lambda: python_management_service.PythonManagementService().schedule_virtual_environments_update([], python_management))
-
     def test_update_possible_when_not_processing(self):
         python_management = self.fixture.python_management
-        with patch('waldur_ansible.python_management.python_management_service.executors.PythonManagementRequestExecutor.execute'), \
-                patch('waldur_ansible.python_management.python_management_service.PythonManagementService.create_or_refuse_requests') as create_or_refuse_requests:
-            create_or_refuse_requests.return_value = []
+        with patch(self.executor_path), \
+                patch('waldur_ansible.python_management.python_management_service.PythonManagementService.enqueue_requests') as enqueue_requests:
+            enqueue_requests.return_value = []
             python_management_service.PythonManagementService().schedule_virtual_environments_update([], python_management)
-            create_or_refuse_requests.assert_called_once()
+            enqueue_requests.assert_called_once()
 
     def transient_lib(self, name, version):
         return dict(
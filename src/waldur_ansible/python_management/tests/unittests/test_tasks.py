@@ -0,0 +1,165 @@
+import datetime
+import threading
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from mock import patch
+from six.moves.xmlrpc_server import SimpleXMLRPCServer
+
+from waldur_ansible.python_management import models, tasks
+
+
+@override_settings(WALDUR_PYTHON_MANAGEMENT={'SYNC_PIP_PACKAGES_BATCH_SIZE': 2})
+class SyncPipLibrariesTest(TestCase):
+    def setUp(self):
+        self.client_patcher = patch('waldur_ansible.python_management.tasks.pypi_client.get_client')
+        self.client = self.client_patcher.start().return_value
+        self.client.changelog_last_serial.return_value = 100
+
+    def tearDown(self):
+        self.client_patcher.stop()
+
+    def get_cached_library_names(self):
+        return set(models.CachedRepositoryPythonLibrary.objects.values_list('name', flat=True))
+
+    def test_new_libraries_are_added_and_removed_are_deleted(self):
+        for name in ('kept', 'removed', 'another-removed'):
+            models.CachedRepositoryPythonLibrary.objects.create(name=name)
+        self.client.list_packages.return_value = ['kept', 'numpy', 'scipy', 'pandas']
+
+        tasks._sync_pip_libraries()
+
+        self.assertEqual(self.get_cached_library_names(), {'kept', 'numpy', 'scipy', 'pandas'})
+
+    def test_libraries_with_too_long_names_are_skipped(self):
+        self.client.list_packages.return_value = ['numpy', 'a' * 256]
+
+        tasks._sync_pip_libraries()
+
+        self.assertEqual(self.get_cached_library_names(), {'numpy'})
+
+    def test_index_without_changelog_is_synchronized_once_per_full_resync_interval(self):
+        self.client.is_changelog_supported.return_value = False
+        self.client.list_packages.return_value = ['numpy']
+
+        tasks._sync_pip_libraries()
+        tasks._sync_pip_libraries()
+
+        self.assertEqual(self.client.list_packages.call_count, 1)
+        with patch('waldur_ansible.python_management.tasks.timezone.now',
+                   return_value=timezone.now() + datetime.timedelta(days=1)):
+            tasks._sync_pip_libraries()
+
+        self.assertEqual(self.client.list_packages.call_count, 2)
+
+    def test_synchronization_is_skipped_if_another_one_is_in_progress(self):
+        self.client.list_packages.return_value = ['numpy']
+
+        with patch('waldur_ansible.python_management.tasks.cache.add', return_value=False):
+            tasks._sync_pip_libraries()
+
+        self.assertEqual(self.get_cached_library_names(), set())
+
+
+class FakePyPIServer(object):
+    """
+    Local stand-in for PyPI XML-RPC API, which serves predefined packages list and changelog.
+    """
+
+    def __init__(self, packages, changelog, last_serial):
+        self.packages = packages
+        self.changelog = changelog
+        self.last_serial = last_serial
+        self.list_packages_calls = 0
+        self.server = SimpleXMLRPCServer(('127.0.0.1', 0), logRequests=False)
+        self.server.register_function(self.list_packages, 'list_packages')
+        self.server.register_function(lambda: self.last_serial, 'changelog_last_serial')
+        self.server.register_function(
+            lambda serial: [event for event in self.changelog if event[4] > serial], 'changelog_since_serial')
+
+    def list_packages(self):
+        self.list_packages_calls += 1
+        return self.packages
+
+    @property
+    def url(self):
+        return 'http://%s:%s/' % self.server.server_address
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class IncrementalSyncPipLibrariesTest(TestCase):
+    def setUp(self):
+        self.pypi = FakePyPIServer(packages=['numpy', 'scipy'], changelog=[], last_serial=10)
+        self.pypi.start()
+        self.settings_override = override_settings(WALDUR_PYTHON_MANAGEMENT={
+            'SYNC_PIP_PACKAGES_BATCH_SIZE': 2,
+            'SYNC_PIP_PACKAGES_MAX_CHANGELOG_SIZE': 5,
+            'PYPI_XMLRPC_API_URL': self.pypi.url,
+        })
+        self.settings_override.enable()
+        # JSON API is not served by the stand-in, project exists as long as it is listed
+        self.library_exists_patcher = patch('waldur_ansible.python_management.pypi_client.PyPIClient.library_exists',
+                                            side_effect=lambda library_name: library_name in self.pypi.packages)
+        self.library_exists_patcher.start()
+
+    def tearDown(self):
+        self.library_exists_patcher.stop()
+        self.settings_override.disable()
+        self.pypi.stop()
+
+    def get_cached_library_names(self):
+        return set(models.CachedRepositoryPythonLibrary.objects.values_list('name', flat=True))
+
+    def test_first_synchronization_fetches_whole_index_and_persists_serial(self):
+        tasks._sync_pip_libraries()
+
+        self.assertEqual(self.get_cached_library_names(), {'numpy', 'scipy'})
+        self.assertEqual(models.CachedRepositorySyncState.get_solo().last_serial, 10)
+
+    def test_subsequent_synchronization_applies_only_changelog(self):
+        tasks._sync_pip_libraries()
+        self.pypi.changelog = [
+            ('pandas', '', 0, 'create', 11),
+            ('scipy', '1.0', 0, 'remove release', 12),
+            ('scipy', '0.9', 0, 'remove file scipy-0.9.tar.gz', 13),
+            ('numpy', '', 0, 'remove project', 14),
+        ]
+
+        tasks._sync_pip_libraries()
+
+        self.assertEqual(self.pypi.list_packages_calls, 1)
+        self.assertEqual(self.get_cached_library_names(), {'scipy', 'pandas'})
+        self.assertEqual(models.CachedRepositorySyncState.get_solo().last_serial, 14)
+
+    def test_project_is_deleted_by_legacy_removal_event_only_if_it_does_not_exist(self):
+        tasks._sync_pip_libraries()
+        self.pypi.packages = ['scipy']
+        self.pypi.changelog = [
+            ('scipy', '1.0', 0, 'remove', 11),
+            ('numpy', '', 0, 'remove', 12),
+        ]
+
+        tasks._sync_pip_libraries()
+
+        self.assertEqual(self.get_cached_library_names(), {'scipy'})
+        self.assertEqual(models.CachedRepositorySyncState.get_solo().last_serial, 12)
+
+    def test_full_resync_is_performed_if_changelog_is_too_large(self):
+        tasks._sync_pip_libraries()
+        self.pypi.packages = ['numpy', 'scipy', 'pandas', 'django']
+        self.pypi.changelog = [(name, '', 0, 'create', serial) for serial, name in enumerate(['pandas', 'django', 'x', 'y', 'z', 'w'], 11)]
+        self.pypi.last_serial = 16
+
+        tasks._sync_pip_libraries()
+
+        self.assertEqual(self.pypi.list_packages_calls, 2)
+        self.assertEqual(self.get_cached_library_names(), {'numpy', 'scipy', 'pandas', 'django'})
+        self.assertEqual(models.CachedRepositorySyncState.get_solo().last_serial, 16)
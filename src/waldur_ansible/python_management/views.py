@@ -1,34 +1,39 @@
 import logging
 
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import decorators, response
 from rest_framework.viewsets import GenericViewSet
 
-from waldur_ansible.common import serializers as common_serializers
+from waldur_ansible.common import serializers as common_serializers, views as common_views
 from waldur_ansible.jupyter_hub_management import models as jupyter_hub_models
 
 from waldur_core.core import views as core_views, managers as core_managers, mixins as core_mixins
 from waldur_core.structure import serializers as core_structure_serializers, filters as structure_filters
-from . import models, serializers, executors, pip_service, python_management_service, utils
+from . import filters, models, serializers, pip_service, python_management_service
 
 python_management_requests_models = [models.PythonManagementInitializeRequest,
                                      models.PythonManagementSynchronizeRequest,
                                      models.PythonManagementFindVirtualEnvsRequest,
                                      models.PythonManagementFindInstalledLibrariesRequest,
+                                     models.PythonManagementFindInstalledLibrariesBatchRequest,
                                      models.PythonManagementDeleteVirtualEnvRequest,
                                      models.PythonManagementDeleteRequest]
 
 logger = logging.getLogger(__name__)
 
 
-class PythonManagementViewSet(core_mixins.AsyncExecutor, core_views.ActionsViewSet):
+class PythonManagementViewSet(core_mixins.AsyncExecutor,
+                              common_views.RequestOutputTailMixin,
+                              common_views.RequestCancellationMixin,
+                              core_views.ActionsViewSet):
     lookup_field = 'uuid'
     queryset = models.PythonManagement.objects.all().order_by('pk')
     serializer_class = serializers.PythonManagementSerializer
-    python_management_request_executor = executors.PythonManagementRequestExecutor
     service = python_management_service.PythonManagementService()
 
     filter_backends = (structure_filters.GenericRoleFilter, DjangoFilterBackend)
+    filter_class = filters.PythonManagementFilter
 
     def retrieve(self, request, *args, **kwargs):
         python_management = self.get_object()
@@ -49,7 +54,7 @@ class PythonManagementViewSet(core_mixins.AsyncExecutor, core_views.ActionsViewS
         virtual_environments = serializer.validated_data.get('virtual_environments')
 
         initialization_request = models.PythonManagementInitializeRequest(python_management=python_management)
-        initialization_request.save()
+        self.service.requests_queue.enqueue(initialization_request)
 
         for virtual_environment in virtual_environments:
             libraries_to_install = []
@@ -59,9 +64,8 @@ class PythonManagementViewSet(core_mixins.AsyncExecutor, core_views.ActionsViewS
                 python_management=python_management,
                 initialization_request=initialization_request,
                 libraries_to_install=libraries_to_install,
-                virtual_env_name=virtual_environment['name'])
-
-        self.python_management_request_executor.execute(initialization_request, async=self.async_executor)
+                virtual_env_name=virtual_environment['name'],
+                queued=True)
 
     @core_mixins.ensure_atomic_transaction
     def perform_destroy(self, persisted_python_management):
@@ -89,7 +93,19 @@ class PythonManagementViewSet(core_mixins.AsyncExecutor, core_views.ActionsViewS
 
         return self.service.schedule_installed_libraries_search(persisted_python_management, virtual_env_name)
 
-    @decorators.detail_route(url_path="requests/(?P<request_uuid>.+)", methods=['get'])
+    @decorators.detail_route(url_path="requests/(?P<request_uuid>[^/]+)/cancel", methods=['post'])
+    def cancel_request(self, request, uuid=None, request_uuid=None):
+        requests = core_managers.SummaryQuerySet(python_management_requests_models).filter(
+            python_management=self.get_object(), uuid=request_uuid)
+        return self.build_cancellation_response(requests)
+
+    @decorators.detail_route(url_path="requests/(?P<request_uuid>[^/]+)/output", methods=['get'])
+    def find_request_output_tail(self, request, uuid=None, request_uuid=None):
+        requests = core_managers.SummaryQuerySet(python_management_requests_models).filter(
+            python_management=self.get_object(), uuid=request_uuid)
+        return self.build_output_tail_response(requests)
+
+    @decorators.detail_route(url_path="requests/(?P<request_uuid>[^/]+)", methods=['get'])
     def find_request_with_output_by_uuid(self, request, uuid=None, request_uuid=None):
         requests = core_managers.SummaryQuerySet(python_management_requests_models).filter(python_management=self.get_object(),
                                                                                            uuid=request_uuid)
@@ -99,18 +115,24 @@ class PythonManagementViewSet(core_mixins.AsyncExecutor, core_views.ActionsViewS
 
     @decorators.list_route(url_path="validForJupyterHub", methods=['get'])
     def find_valid_for_jupyter_hub_python_managements_with_instance_info(self, request):
-        result = super(PythonManagementViewSet, self).list(request)
-        result.data = filter(
-            lambda pm: not utils.execute_safely(
-                lambda: jupyter_hub_models.JupyterHubManagement.objects.get(python_management__uuid=pm['uuid'])),
-            result.data)
-
-        for python_management in result.data:
-            instance = models.PythonManagement.objects.get(uuid=python_management['uuid']).instance
-            instance_serializer = core_structure_serializers.SummaryResourceSerializer(instance=instance, context={'request': request})
-            python_management['instance'] = instance_serializer.data
-
-        return result
+        jupyter_hub_managements = jupyter_hub_models.JupyterHubManagement.objects.filter(python_management=OuterRef('pk'))
+        queryset = self.filter_queryset(self.get_queryset()) \
+            .annotate(has_jupyter_hub_management=Exists(jupyter_hub_managements)) \
+            .filter(has_jupyter_hub_management=False) \
+            .prefetch_related('instance', 'virtual_environments__installed_libraries')
+
+        page = self.paginate_queryset(queryset)
+        python_managements = page if page is not None else list(queryset)
+        python_managements_data = self.get_serializer(python_managements, many=True).data
+
+        for python_management_data, python_management in zip(python_managements_data, python_managements):
+            instance_serializer = core_structure_serializers.SummaryResourceSerializer(
+                instance=python_management.instance, context={'request': request})
+            python_management_data['instance'] = instance_serializer.data
+
+        if page is not None:
+            return self.get_paginated_response(python_managements_data)
+        return response.Response(python_managements_data)
 
 
 class PipPackagesViewSet(GenericViewSet):